@@ -32,7 +32,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    'core.staticfiles.StaticFilesConfig',  # django.contrib.staticfiles + STATICFILES_PRUNE_PATTERNS
 
     # Third-party apps
     'ckeditor',
@@ -55,12 +55,14 @@ INSTALLED_APPS = [
     'content',
     'core',
     'bookings',
+    'notifications',
 ]
 
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',  # Query count / timing per route
     'django.middleware.security.SecurityMiddleware',
-    # 'whitenoise.middleware.WhiteNoiseMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',  # Hashed, precompressed static files
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -80,7 +82,8 @@ ROOT_URLCONF = 'GoldenSection.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing renders for the request metrics (see core.metrics)
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -98,6 +101,20 @@ TEMPLATES = [
     },
 ]
 
+# HTMX fragments render without the full-page context processors (see core.partials)
+TEMPLATES.append({
+    **TEMPLATES[0],
+    'NAME': 'partials',
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'context_processors': [
+            'django.template.context_processors.request',
+            'core.context_processors.lazy_site_settings',
+            'core.context_processors.lazy_navbar',
+        ],
+    },
+})
+
 
 
 WSGI_APPLICATION = 'GoldenSection.wsgi.application'
@@ -110,10 +127,44 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # atomic() takes the write lock up front, so transactions that check
+            # then write (e.g. booking a slot, see bookings.availability) run one
+            # at a time instead of failing with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
 
+# Cache
+# Must be shared by every worker process: cache versions bumped on save (see
+# core.caching) invalidate other processes' copies only through it. A warm
+# page reads it once (the versions, in one get_many); cached values are kept
+# in each process. The database cache needs no extra service;
+# ``python manage.py migrate`` creates its table. Set REDIS_URL to use Redis
+# instead (needs the redis package).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            # Room for the availability indexes, service cards and snapshots
+            'MAX_ENTRIES': 50000,
+        },
+    },
+}
+
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+        'TIMEOUT': 300,
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -159,11 +210,28 @@ STORAGES = {
     "default": {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
     },
-    # "staticfiles": {
-    #     "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
-    # },
+    # Hashed names + gzip/brotli copies need collectstatic, so only outside DEBUG (see core.staticfiles)
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage" if DEBUG
+            else "core.staticfiles.StaticFilesStorage"
+        ),
+    },
 }
 
+# Only the hashed copies are served, so don't keep (or compress) the originals
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+# Templates refer to a few files that aren't shipped (favicon.ico, js/index.umd.js, ...);
+# keep their plain URLs instead of failing the page
+WHITENOISE_MANIFEST_STRICT = False
+
+# Never referenced by a page; skipped by collectstatic (see manage.py static_report --unused)
+STATICFILES_PRUNE_PATTERNS = [
+    'scss',  # Sources of css/style_template.css
+    'plugins/select2/*',  # No page renders a select2 <select>
+    'plugins/intltelinput/*',  # ... or an intl-tel-input field
+]
+
 
 
 
@@ -227,12 +295,56 @@ HONEYPOT_FIELD_NAME = 'email_confirm'
 
 
 
+# Logging: JSON lines written from a background thread (see core.logs)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sampling': {
+            '()': 'core.logs.SamplingFilter',
+            # logger name -> fraction of INFO/DEBUG records kept
+            'rates': {},
+        },
+    },
+    'formatters': {
+        'json': {'()': 'core.logs.JSONFormatter'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+        'queue': {
+            'class': 'core.logs.QueueHandler',
+            'handlers': ['console'],
+            'queue': {'()': 'queue.Queue', 'maxsize': 10000},
+            'filters': ['sampling'],
+        },
+    },
+    'loggers': {
+        app: {'handlers': ['queue'], 'level': 'INFO', 'propagate': False}
+        for app in ['core', 'bookings', 'quotations', 'notifications']
+    },
+}
+
+
 # ImageKit Configuration
-IMAGEKIT_DEFAULT_CACHEFILE_BACKEND = 'imagekit.cachefiles.backends.Simple'
+# Missing specs are generated in a background thread; set IMAGEKIT_POOL_WORKERS to
+# generate them in a background process pool instead (see core.images)
+IMAGEKIT_DEFAULT_CACHEFILE_BACKEND = 'core.images.PoolBackend'
+IMAGEKIT_DEFAULT_CACHEFILE_STRATEGY = 'core.images.BackgroundStrategy'
 IMAGEKIT_CACHEFILE_DIR = 'CACHE/images'
 IMAGEKIT_DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
 IMAGEKIT_SPEC_CACHEFILE_NAMER = 'imagekit.cachefiles.namers.source_name_as_path'
 
+# Responsive width ladders (srcset) for listing images (see core.responsive)
+RESPONSIVE_IMAGE_WIDTHS = (320, 640, 960, 1280)
+RESPONSIVE_IMAGE_AVIF = True
+
+# Conditional GET (ETag / 304) for catalog pages (see core.conditional); seconds a
+# CDN or reverse proxy may serve an anonymous page before revalidating
+CONDITIONAL_GET_S_MAXAGE = 60
+
 # CKEditor Configuration
 CKEDITOR_UPLOAD_PATH = "uploads/"
 CKEDITOR_IMAGE_BACKEND = "pillow"
@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from core.exports import ExportActionMixin
+from . import availability, matching
 from .models import Booking
 
 
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(ExportActionMixin, admin.ModelAdmin):
     list_display = [
         'booking_reference',
         'customer_name_display',
@@ -157,32 +159,50 @@ class BookingAdmin(admin.ModelAdmin):
         return '-'
     google_maps_display.short_description = 'Map Location'
     
-    actions = ['mark_as_confirmed', 'mark_as_completed', 'mark_as_cancelled', 'resend_whatsapp']
+    actions = ['mark_as_confirmed', 'mark_as_completed', 'mark_as_cancelled', 'assign_nearest_provider', 'resend_whatsapp', 'export_selected']
+    export_dataset = 'bookings'
     
     def mark_as_confirmed(self, request, queryset):
         """Mark selected bookings as confirmed"""
+        calendars = availability.calendars_of(queryset)
         updated = queryset.update(status='confirmed')
+        availability.invalidate(calendars)
         self.message_user(request, f'{updated} booking(s) marked as confirmed.')
     mark_as_confirmed.short_description = 'Mark as Confirmed'
     
     def mark_as_completed(self, request, queryset):
         """Mark selected bookings as completed"""
+        calendars = availability.calendars_of(queryset)
         updated = queryset.update(status='completed')
+        availability.invalidate(calendars)
         self.message_user(request, f'{updated} booking(s) marked as completed.')
     mark_as_completed.short_description = 'Mark as Completed'
     
     def mark_as_cancelled(self, request, queryset):
         """Mark selected bookings as cancelled"""
+        calendars = availability.calendars_of(queryset)
         updated = queryset.update(status='cancelled')
+        availability.invalidate(calendars)
         self.message_user(request, f'{updated} booking(s) marked as cancelled.')
     mark_as_cancelled.short_description = 'Mark as Cancelled'
     
+    def assign_nearest_provider(self, request, queryset):
+        """Give selected pending bookings without a provider the nearest free one"""
+        bookings = list(queryset.filter(status='pending', provider__isnull=True).select_related('service'))
+        matched, unmatched, _ = matching.assign(bookings)
+        self.message_user(
+            request,
+            f'{matched} booking(s) assigned a provider, {unmatched} without a provider '
+            f'within {matching.RADIUS_KM:g} km.'
+        )
+    assign_nearest_provider.short_description = 'Assign Nearest Provider'
+    
     def resend_whatsapp(self, request, queryset):
-        """Resend WhatsApp notification for selected bookings"""
-        from .utils import send_whatsapp_notification
-        sent_count = 0
+        """Queue the WhatsApp notification again for selected bookings"""
+        from notifications.models import NotificationJob
+        queued_count = 0
         for booking in queryset:
-            if send_whatsapp_notification(booking):
-                sent_count += 1
-        self.message_user(request, f'WhatsApp notification sent for {sent_count} booking(s).')
+            NotificationJob.enqueue('booking_whatsapp', booking)
+            queued_count += 1
+        self.message_user(request, f'WhatsApp notification queued for {queued_count} booking(s).')
     resend_whatsapp.short_description = 'Resend WhatsApp Notification'
@@ -0,0 +1,318 @@
+"""
+Bookable slots from BusinessHours
+
+A service can be booked in BOOKING_SLOT_MINUTES slots between the opening
+and closing time of its BusinessHours, BOOKING_SLOT_CAPACITY times per
+slot. Bookings in BOOKING_BLOCKING_STATUSES take a place in every slot
+they overlap. They count against the service's provider, because a
+provider can't be in two places at once. Services without a provider
+count only their own bookings.
+
+For each service, a SlotIndex of its free slots over the next
+BOOKING_HORIZON_DAYS days is built with one BusinessHours query and one
+bookings query, then stored in the cache and in a per-process LRU
+(like core.caching.CachedValue). The free slots are a sorted
+array of minute offsets from the horizon start, so "is this slot free"
+and "next N free slots" are a bisect: O(log n), plus N for the slots
+returned. n is about 2-3k for a 90-day horizon.
+
+An index is keyed by:
+- the service's updated_at, which is touched when its BusinessHours
+  change (see core.signals)
+- a version per provider (or service), bumped whenever one of its
+  bookings changes
+- the current date
+
+So it is only rebuilt when something it was built from changes.
+
+Versions are bumped on commit, so an index can briefly miss a booking
+confirmed in another request. Creating a booking therefore locks its
+calendar (lock_calendars) and checks the slot against the database
+(check_slot(..., fresh=True)) in the same transaction.
+
+Settings:
+    BOOKING_SLOT_MINUTES       slot length (default 30)
+    BOOKING_SLOT_CAPACITY      bookings per slot (default 1)
+    BOOKING_HORIZON_DAYS       how far ahead slots are offered (default 90)
+    BOOKING_BLOCKING_STATUSES  statuses that take a slot (default confirmed, in_progress)
+    BOOKING_SLOT_INDEX_LOCAL_SIZE  indexes kept per process (default 5000)
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from core.caching import CacheVersion
+from providers.models import Provider
+from services.models import BusinessHours, Service
+
+
+SLOT_MINUTES = getattr(settings, 'BOOKING_SLOT_MINUTES', 30)
+CAPACITY = getattr(settings, 'BOOKING_SLOT_CAPACITY', 1)
+HORIZON_DAYS = getattr(settings, 'BOOKING_HORIZON_DAYS', 90)
+BLOCKING_STATUSES = tuple(getattr(settings, 'BOOKING_BLOCKING_STATUSES', ('confirmed', 'in_progress')))
+
+CACHE_TIMEOUT = 60 * 60 * 24
+# Indexes kept in each process (a few KB each)
+LOCAL_SIZE = getattr(settings, 'BOOKING_SLOT_INDEX_LOCAL_SIZE', 5000)
+
+# Booking.appointment_time is free text: "10:00 AM", "9:30 am", "14:00"
+TIME_FORMATS = ['%I:%M %p', '%I:%M%p', '%H:%M', '%H:%M:%S']
+DISPLAY_FORMAT = '%I:%M %p'
+
+DAY = 24 * 60
+
+
+def parse_time(value):
+    """time from an appointment_time string, or None"""
+    value = str(value or '').strip().upper()
+    for time_format in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format).time()
+        except ValueError:
+            continue
+    return None
+
+
+def format_time(value):
+    return value.strftime(DISPLAY_FORMAT)
+
+
+def minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def resource(service_id, provider_id):
+    """The calendar a service's bookings are counted on"""
+    return f'provider:{provider_id}' if provider_id else f'service:{service_id}'
+
+
+def resource_version(name):
+    return CacheVersion(f'availability:{name}:version', prefetch=False)
+
+
+class SlotIndex:
+    """The free slots of one service, from ``start`` for HORIZON_DAYS days"""
+
+    def __init__(self, start, slots, free):
+        self.start = start
+        self.has_hours = bool(slots)
+        self.slots = slots  # every slot, free or not
+        self.free = free
+
+    @classmethod
+    def build(cls, service_id, provider_id, start):
+        hours = {
+            weekday: (minutes(opening), minutes(closing))
+            for weekday, opening, closing in BusinessHours.objects.filter(
+                service_id=service_id,
+                is_closed=False,
+                opening_time__isnull=False,
+                closing_time__isnull=False,
+            ).values_list('weekday', 'opening_time', 'closing_time')
+        }
+
+        slots = array('l')
+        for day in range(HORIZON_DAYS):
+            opening_closing = hours.get((start + timedelta(days=day)).weekday())
+            if opening_closing:
+                opening, closing = opening_closing
+                slots.extend(range(day * DAY + opening, day * DAY + closing - SLOT_MINUTES + 1, SLOT_MINUTES))
+
+        taken = Counter()
+        if slots:
+            for appointment_date, appointment_time, status in cls.calendar_bookings(service_id, provider_id, start):
+                parsed = parse_time(appointment_time)
+                if status not in BLOCKING_STATUSES or parsed is None:
+                    continue
+                at = (appointment_date - start).days * DAY + minutes(parsed)
+                # Every slot the booking overlaps
+                for i in range(bisect_right(slots, at - SLOT_MINUTES), bisect_left(slots, at + SLOT_MINUTES)):
+                    taken[slots[i]] += 1
+
+        free = array('l', (slot for slot in slots if taken[slot] < CAPACITY))
+        return cls(start, slots, free)
+
+    @staticmethod
+    def calendar_bookings(service_id, provider_id, start, days=HORIZON_DAYS):
+        # Statuses are checked by the caller: with a status filter SQLite picks the
+        # (status, appointment_date) index and reads every calendar's bookings
+        from .models import Booking
+
+        if provider_id:
+            on_calendar = Q(provider_id=provider_id) | Q(
+                service_id__in=Service.objects.filter(provider_id=provider_id).values('pk')
+            )
+        else:
+            on_calendar = Q(service_id=service_id)
+        return Booking.objects.filter(
+            on_calendar,
+            appointment_date__gte=start,
+            appointment_date__lt=start + timedelta(days=days),
+        ).order_by().values_list('appointment_date', 'appointment_time', 'status').iterator()
+
+    def offset(self, when):
+        return (when.date() - self.start).days * DAY + when.hour * 60 + when.minute
+
+    def at(self, offset):
+        return datetime.combine(self.start, time()) + timedelta(minutes=offset)
+
+    def is_open(self, when):
+        """Whether ``when`` is the start of a slot, booked or not"""
+        offset = self.offset(when)
+        i = bisect_left(self.slots, offset)
+        return i < len(self.slots) and self.slots[i] == offset
+
+    def is_free(self, when):
+        offset = self.offset(when)
+        i = bisect_left(self.free, offset)
+        return i < len(self.free) and self.free[i] == offset
+
+    def next_free(self, after, count):
+        """The first ``count`` free slots starting at or after ``after``"""
+        i = bisect_left(self.free, self.offset(after))
+        return [self.at(offset) for offset in self.free[i:i + count]]
+
+    def free_on(self, day, after=None):
+        """The free slots of one day (from ``after`` on, if given)"""
+        day_start = (day - self.start).days * DAY
+        lo = bisect_left(self.free, max(day_start, self.offset(after) if after else day_start))
+        hi = bisect_left(self.free, day_start + DAY)
+        return [self.at(offset) for offset in self.free[lo:hi]]
+
+
+_local = OrderedDict()  # key -> SlotIndex, least recently used first
+_local_lock = threading.Lock()
+
+
+def get_index(service, provider_id=None):
+    """
+    The SlotIndex of a service from today on: from this process's LRU, the
+    shared cache, or built on a miss. Costs one shared-cache read (the
+    calendar version) when the index is already in this process.
+
+    With ``provider_id``, the service's hours on that provider's calendar
+    instead of the service's own provider (e.g. to match a provider to a
+    booking, see bookings.matching).
+    """
+    start = timezone.localdate()
+    provider_id = provider_id or service.provider_id
+    calendar = resource(service.pk, provider_id)
+    key = (
+        f'availability:{service.pk}:{calendar}:{service.updated_at.timestamp() if service.updated_at else 0}:'
+        f'{resource_version(calendar).get()}:{start.isoformat()}:{SLOT_MINUTES}:{CAPACITY}'
+    )
+    with _local_lock:
+        index = _local.get(key)
+        if index is not None:
+            _local.move_to_end(key)
+            return index
+
+    index = cache.get(key)
+    if index is None:
+        index = SlotIndex.build(service.pk, provider_id, start)
+        cache.set(key, index, CACHE_TIMEOUT)
+
+    with _local_lock:
+        _local[key] = index
+        while len(_local) > LOCAL_SIZE:
+            _local.popitem(last=False)
+    return index
+
+
+def now():
+    return timezone.localtime().replace(tzinfo=None)
+
+
+def taken_at(service_id, provider_id, when):
+    """Bookings taking the slot at ``when`` on the calendar, counted from the database"""
+    start = when.date() - timedelta(days=1)  # Late bookings the day before overlap too
+    at = DAY + minutes(when)
+    taken = 0
+    for appointment_date, appointment_time, status in SlotIndex.calendar_bookings(service_id, provider_id, start, days=3):
+        parsed = parse_time(appointment_time)
+        if status in BLOCKING_STATUSES and parsed is not None:
+            if abs((appointment_date - start).days * DAY + minutes(parsed) - at) < SLOT_MINUTES:
+                taken += 1
+    return taken
+
+
+def check_slot(service, appointment_date, appointment_time, provider_id=None, fresh=False):
+    """
+    Error message if the slot can't be booked, None if it can. Services
+    without business hours accept any time.
+
+    The slot is checked on ``provider_id``'s calendar (default: the
+    service's provider). With ``fresh``, whether it is free is read from
+    the database instead of the cached index; call it that way with the
+    calendar locked (lock_calendars) right before creating the booking.
+    """
+    provider_id = provider_id or service.provider_id
+    index = get_index(service, provider_id)
+    if not index.has_hours:
+        return None
+    parsed = parse_time(appointment_time)
+    if parsed is None:
+        return f'Invalid appointment time: {appointment_time}'
+    when = datetime.combine(appointment_date, parsed)
+    if when < now() or (when - now()).days >= HORIZON_DAYS:
+        return 'Appointment time is outside the booking window'
+    if not index.is_open(when):
+        return f'{service.name} is not open at {format_time(parsed)} on {appointment_date:%B %d, %Y}'
+    free = taken_at(service.pk, provider_id, when) < CAPACITY if fresh else index.is_free(when)
+    if not free:
+        return 'This time slot is already booked'
+    return None
+
+
+def lock_calendars(calendars):
+    """
+    Inside transaction.atomic(): hold the calendars (see resource()) until
+    commit, so concurrent bookings on them are checked and created one at
+    a time. Locks the provider or service rows, in primary key order. On
+    SQLite, where select_for_update() does nothing, the IMMEDIATE
+    transaction mode (settings.DATABASES) serialises the transactions
+    instead.
+    """
+    ids = {'provider': set(), 'service': set()}
+    for calendar in calendars:
+        kind, pk = calendar.split(':')
+        ids[kind].add(int(pk))
+    for model, pks in ((Provider, ids['provider']), (Service, ids['service'])):
+        if pks:
+            list(model.objects.select_for_update().filter(pk__in=pks).order_by('pk').values_list('pk', flat=True))
+
+
+def calendar_of(service, provider_id=None):
+    """The calendar a booking of ``service`` (with ``provider_id``, if given) is checked on"""
+    return resource(service.pk, provider_id or service.provider_id)
+
+
+def calendars_of(bookings):
+    """
+    The calendars the given bookings count against: an iterable of Booking
+    instances, or a queryset (read it before queryset.update(), which sends
+    no signals)
+    """
+    if hasattr(bookings, 'values_list'):
+        rows = bookings.values_list('service_id', 'provider_id', 'service__provider_id').distinct()
+    else:
+        rows = [(booking.service_id, booking.provider_id, booking.service.provider_id) for booking in bookings]
+    calendars = set()
+    for service_id, provider_id, service_provider_id in rows:
+        if provider_id:
+            calendars.add(resource(service_id, provider_id))
+        calendars.add(resource(service_id, service_provider_id))
+    return calendars
+
+
+def invalidate(calendars):
+    """Rebuild the slot indexes of these calendars on their next use"""
+    for calendar in calendars:
+        resource_version(calendar).bump()
@@ -0,0 +1,292 @@
+"""
+Bulk booking ingestion for partner integrations
+
+Every row is validated first. Services, providers and sub-services for the
+whole batch are then loaded with one ``in`` query each, and the bookings,
+their sub-service links and their notification jobs are inserted with
+bulk_create. Booking references are drawn for the whole batch at once
+(Booking.generate_references), without a lookup per row.
+
+Each row's slot is checked like a single booking's
+(bookings.availability.check_slot), against the cached slot index of its
+calendar, with the batch's calendars locked until the rows are inserted.
+"""
+import hmac
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from core import home_snapshot
+from notifications.models import NotificationJob
+from providers.models import Provider
+from services.models import Service, SubService
+from . import availability
+from .models import Booking, normalize_phone
+
+
+REQUIRED_FIELDS = [
+    'service_id', 'customer_first_name', 'customer_last_name',
+    'customer_email', 'customer_phone', 'location_lat', 'location_lng',
+    'location_address', 'appointment_date', 'appointment_time'
+]
+
+# Booking fields taken as text from a row
+TEXT_FIELDS = [
+    'customer_first_name', 'customer_last_name', 'customer_email', 'customer_phone',
+    'location_address', 'appointment_time', 'notes',
+]
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y']
+
+NDJSON_CONTENT_TYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/json-lines'}
+
+MAX_ROWS = getattr(settings, 'BOOKINGS_BULK_MAX_ROWS', 10000)
+MAX_BYTES = getattr(settings, 'BOOKINGS_BULK_MAX_BYTES', 20 * 1024 * 1024)
+BATCH_SIZE = 500
+
+
+class BulkPayloadError(ValueError):
+    """The request body can't be read as a list of booking rows"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def is_authorized(request):
+    """Staff users, or partners sending a token from BOOKINGS_BULK_API_TOKENS as a Bearer header"""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return False
+    token = header[len('Bearer '):].strip()
+    return any(
+        hmac.compare_digest(token, allowed)
+        for allowed in getattr(settings, 'BOOKINGS_BULK_API_TOKENS', [])
+    )
+
+
+def parse_rows(stream, content_type):
+    """
+    Read booking rows from a JSON array (or {"bookings": [...]}) or an NDJSON
+    stream. NDJSON lines that aren't valid JSON come back as ValueError
+    instances so they get their own row error.
+    """
+    if content_type in NDJSON_CONTENT_TYPES:
+        rows = []
+        size = 0
+        for line in stream:
+            size += len(line)
+            if size > MAX_BYTES:
+                raise BulkPayloadError(f'Request body larger than {MAX_BYTES} bytes', status=413)
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                rows.append(ValueError(f'Invalid JSON: {e}'))
+            if len(rows) > MAX_ROWS:
+                raise BulkPayloadError(f'At most {MAX_ROWS} bookings per request', status=413)
+        return rows
+
+    body = stream.read(MAX_BYTES + 1)
+    if len(body) > MAX_BYTES:
+        raise BulkPayloadError(f'Request body larger than {MAX_BYTES} bytes', status=413)
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise BulkPayloadError(f'Invalid JSON: {e}')
+    if isinstance(data, dict):
+        data = data.get('bookings')
+    if not isinstance(data, list):
+        raise BulkPayloadError('Expected a JSON array of bookings (or {"bookings": [...]})')
+    if len(data) > MAX_ROWS:
+        raise BulkPayloadError(f'At most {MAX_ROWS} bookings per request', status=413)
+    return data
+
+
+def parse_appointment_date(value):
+    """Date from a YYYY-MM-DD, DD/MM/YYYY or MM/DD/YYYY string"""
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid date: {json.dumps(value)}. Expected format: YYYY-MM-DD")
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date format: {value}. Expected format: YYYY-MM-DD")
+
+
+def sub_service_ids_from(value):
+    """Sub-service ids from a list of ids or {"id": ...} objects (or that list as a JSON string)"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    ids = []
+    for item in value or []:
+        if isinstance(item, dict):
+            item = item.get('id')
+        try:
+            ids.append(int(item))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def clean_row(row):
+    """Validated Booking field values for one row. Raises ValidationError listing every problem."""
+    if isinstance(row, Exception):
+        raise ValidationError(str(row))
+    if not isinstance(row, dict):
+        raise ValidationError('Each booking must be a JSON object')
+
+    missing_fields = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing_fields:
+        raise ValidationError(f'Missing required fields: {", ".join(missing_fields)}')
+
+    errors = []
+    cleaned = {
+        'customer_first_name': str(row['customer_first_name']).strip(),
+        'customer_last_name': str(row['customer_last_name']).strip(),
+        'customer_email': str(row['customer_email']).strip().lower(),
+        'customer_phone': normalize_phone(str(row['customer_phone'])),
+        'location_address': str(row['location_address']).strip(),
+        'appointment_time': str(row['appointment_time']).strip(),
+        'notes': str(row.get('notes') or '').strip(),
+        'sub_service_ids': sub_service_ids_from(row.get('selected_sub_services')),
+    }
+
+    # Over-long values would fail the whole bulk insert, so they are this row's error
+    for field in TEXT_FIELDS:
+        max_length = Booking._meta.get_field(field).max_length
+        if max_length and len(cleaned[field]) > max_length:
+            errors.append(f'{field} is longer than {max_length} characters')
+
+    for field, key in (('service_id', 'service_id'), ('provider_id', 'provider_id')):
+        value = row.get(key)
+        try:
+            cleaned[field] = int(value) if value else None
+        except (TypeError, ValueError):
+            errors.append(f'Invalid {key}: {value}')
+
+    try:
+        validate_email(cleaned['customer_email'])
+    except ValidationError:
+        errors.append(f"Invalid email: {cleaned['customer_email']}")
+
+    try:
+        Booking.phone_regex(cleaned['customer_phone'])
+    except ValidationError as e:
+        errors.extend(e.messages)
+
+    try:
+        cleaned['appointment_date'] = parse_appointment_date(row['appointment_date'])
+    except ValueError as e:
+        errors.append(str(e))
+
+    try:
+        cleaned['location_latitude'] = float(row['location_lat'])
+        cleaned['location_longitude'] = float(row['location_lng'])
+        if not (-90 <= cleaned['location_latitude'] <= 90 and -180 <= cleaned['location_longitude'] <= 180):
+            errors.append('Location coordinates out of range')
+    except (TypeError, ValueError) as e:
+        errors.append(f'Invalid location coordinates: {e}')
+
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+
+def ingest(rows, notify=True, all_or_nothing=False):
+    """
+    Validate and insert booking rows. Returns one result per row, in order:
+    {'row': i, 'success': True, 'id': ..., 'booking_reference': ...} or
+    {'row': i, 'success': False, 'errors': [...]}
+    """
+    results = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, clean_row(row)))
+        except ValidationError as e:
+            results[index] = {'row': index, 'success': False, 'errors': e.messages}
+
+    # Everything the batch references, one query per model
+    services = Service.objects.only('pk', 'name', 'provider_id', 'updated_at').in_bulk(
+        {data['service_id'] for _, data in valid}
+    )
+    provider_ids = set(Provider.objects.filter(
+        pk__in={data['provider_id'] for _, data in valid if data['provider_id']}
+    ).values_list('pk', flat=True))
+    sub_service_owners = dict(SubService.objects.filter(
+        pk__in={pk for _, data in valid for pk in data['sub_service_ids']}
+    ).values_list('pk', 'service_id'))
+
+    Through = Booking.sub_services.through
+    with transaction.atomic():
+        for _, data in valid:
+            if data['provider_id'] not in provider_ids:
+                data['provider_id'] = None
+        # Slots are checked and taken with the batch's calendars locked, as in create_booking
+        availability.lock_calendars({
+            availability.calendar_of(services[data['service_id']], data['provider_id'])
+            for _, data in valid
+            if data['service_id'] in services
+        })
+
+        to_create = []
+        for index, data in valid:
+            service = services.get(data['service_id'])
+            if service is None:
+                results[index] = {'row': index, 'success': False, 'errors': ['Service not found']}
+                continue
+            slot_error = availability.check_slot(
+                service, data['appointment_date'], data['appointment_time'], provider_id=data['provider_id']
+            )
+            if slot_error:
+                results[index] = {'row': index, 'success': False, 'errors': [slot_error]}
+                continue
+            sub_service_ids = [
+                pk for pk in dict.fromkeys(data.pop('sub_service_ids'))
+                if sub_service_owners.get(pk) == data['service_id']
+            ]
+            to_create.append((index, Booking(**data), sub_service_ids))
+
+        if all_or_nothing and len(to_create) < len(rows):
+            for index, booking, _ in to_create:
+                results[index] = {
+                    'row': index,
+                    'success': False,
+                    'errors': ['Not created: other bookings in the batch are invalid'],
+                }
+            return results
+
+        for (_, booking, _), reference in zip(to_create, Booking.generate_references(len(to_create))):
+            booking.booking_reference = reference
+
+        bookings = Booking.objects.bulk_create([booking for _, booking, _ in to_create], batch_size=BATCH_SIZE)
+        Through.objects.bulk_create([
+            Through(booking_id=booking.pk, subservice_id=sub_service_id)
+            for (_, booking, sub_service_ids) in to_create
+            for sub_service_id in sub_service_ids
+        ], batch_size=BATCH_SIZE)
+        if notify and bookings:
+            NotificationJob.enqueue_many('booking_whatsapp', bookings)
+        # bulk_create sends no post_save, so refresh the booking stats ourselves
+        home_snapshot.invalidate_for_instance(Booking)
+
+    for index, booking, _ in to_create:
+        results[index] = {
+            'row': index,
+            'success': True,
+            'id': booking.pk,
+            'booking_reference': booking.booking_reference,
+        }
+    return results
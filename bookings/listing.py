@@ -0,0 +1,96 @@
+"""
+Customer booking listing (my_bookings)
+
+Bookings are listed newest first with keyset pagination
+(core.pagination.CursorPaginator, sort 'newest'), so a page costs one
+index range scan of per_page + 1 rows however many bookings there are.
+Customer lookups use the (lower(customer_email) | customer_phone,
+created_at, id) indexes; staff listings without a customer use (created_at, id).
+
+Whose bookings are listed:
+    - staff: every booking, optionally narrowed with ?email= / ?phone=
+    - logged-in customers: bookings made with their account email or phone
+    - anyone else: bookings matching both ?email= and ?phone=
+
+Status (?status=, repeatable) and appointment date range (?date_from=,
+?date_to=) filters apply on top.
+
+Settings:
+    MY_BOOKINGS_PAGE_SIZE  bookings per page (default 20)
+"""
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from core.pagination import CursorPaginator
+from .bulk import parse_appointment_date
+from .models import Booking, normalize_phone
+
+
+PAGE_SIZE = getattr(settings, 'MY_BOOKINGS_PAGE_SIZE', 20)
+
+STATUSES = dict(Booking.STATUS_CHOICES)
+
+
+def parse_date(value):
+    try:
+        return parse_appointment_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def parse_filters(params):
+    """Listing filters from query parameters; invalid values are dropped"""
+    return {
+        'email': params.get('email', '').strip().lower(),
+        'phone': normalize_phone(params.get('phone', '')),
+        'status': [status for status in params.getlist('status') if status in STATUSES],
+        'date_from': parse_date(params.get('date_from', '').strip()),
+        'date_to': parse_date(params.get('date_to', '').strip()),
+    }
+
+
+def customer_filter(user, filters):
+    """
+    Q() selecting the bookings this visitor may list, or None when they
+    haven't identified themselves yet
+    """
+    email, phone = filters['email'], filters['phone']
+    if user.is_authenticated and user.is_staff:
+        q = Q()
+        if email:
+            q &= Q(customer_email_lower=email)
+        if phone:
+            q &= Q(customer_phone=phone)
+        return q
+    if user.is_authenticated:
+        q = Q(customer_email_lower=user.email.lower()) if user.email else Q(pk__in=[])
+        if getattr(user, 'phone', ''):
+            q |= Q(customer_phone=normalize_phone(user.phone))
+        return q
+    if email and phone:
+        return Q(customer_email_lower=email, customer_phone=phone)
+    return None
+
+
+def customer_bookings(user, filters, cursor=None, per_page=PAGE_SIZE):
+    """One CursorPage of bookings for the visitor, or None if they must identify themselves"""
+    q = customer_filter(user, filters)
+    if q is None:
+        return None
+
+    # Lower() rather than __iexact, which is a LIKE on SQLite and can't use the index
+    bookings = Booking.objects.alias(customer_email_lower=Lower('customer_email')).filter(q)
+    if filters['status']:
+        bookings = bookings.filter(status__in=filters['status'])
+    if filters['date_from']:
+        bookings = bookings.filter(appointment_date__gte=filters['date_from'])
+    if filters['date_to']:
+        bookings = bookings.filter(appointment_date__lte=filters['date_to'])
+
+    bookings = bookings.select_related(
+        'service',
+        'provider',
+        'service__category',
+    ).prefetch_related('sub_services')
+    return CursorPaginator(bookings, per_page, sort='newest').page(cursor)
@@ -0,0 +1,146 @@
+"""
+Assign providers to pending bookings
+
+A pending booking without a provider is given the nearest active,
+available provider offering its service within BOOKING_MATCH_RADIUS_KM of
+the booking location (providers.geo) whose calendar has the appointment
+slot free (bookings.availability). A provider that already has a pending
+booking at the same time, assigned by an earlier run or earlier in this
+one, is skipped, so matching never double-books anyone.
+
+match_pending() reads upcoming bookings soonest first in keyset batches
+over the (status, appointment_date) index, and saves each batch with one
+bulk_update. Assigned bookings stay pending: they take no slot until they
+are confirmed, so no slot index is invalidated.
+
+Settings:
+    BOOKING_MATCH_RADIUS_KM   how far away a provider may be (default GEO_SEARCH_RADIUS_KM)
+    BOOKING_MATCH_CANDIDATES  nearest providers tried per booking (default 10)
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from providers import geo
+from . import availability
+from .models import Booking
+
+
+RADIUS_KM = getattr(settings, 'BOOKING_MATCH_RADIUS_KM', geo.RADIUS_KM)
+CANDIDATES = getattr(settings, 'BOOKING_MATCH_CANDIDATES', 10)
+BATCH_SIZE = 500
+
+
+def appointment_of(booking):
+    """The appointment as a datetime, or None if its time can't be parsed"""
+    parsed = availability.parse_time(booking.appointment_time)
+    return datetime.combine(booking.appointment_date, parsed) if parsed else None
+
+
+def slot_of(provider_id, booking, when):
+    """What a booking with this provider takes: off-grid times are matched as typed"""
+    return provider_id, booking.appointment_date, when or booking.appointment_time
+
+
+def assigned_slots(bookings):
+    """
+    slot_of() every pending booking that already has a provider, on the
+    appointment dates of ``bookings`` (other than those bookings themselves)
+    """
+    dates = {booking.appointment_date for booking in bookings}
+    assigned = Booking.objects.filter(
+        status='pending',
+        provider__isnull=False,
+        appointment_date__in=dates,
+    ).exclude(pk__in=[booking.pk for booking in bookings]).only('provider_id', 'appointment_date', 'appointment_time')
+    return {slot_of(booking.provider_id, booking, appointment_of(booking)) for booking in assigned}
+
+
+def best_provider(booking, when, taken):
+    """(distance_km, provider_id) of the provider to assign, or None"""
+    found = geo.nearest(
+        booking.location_latitude,
+        booking.location_longitude,
+        limit=CANDIDATES,
+        radius_km=RADIUS_KM,
+        service=booking.service,
+    )
+    for distance, provider_id in found:
+        if slot_of(provider_id, booking, when) in taken:
+            continue
+        if when is not None:
+            index = availability.get_index(booking.service, provider_id)
+            # Times off the slot grid can't be checked; only a known taken slot rules a provider out
+            if index.has_hours and index.is_open(when) and not index.is_free(when):
+                continue
+        return distance, provider_id
+    return None
+
+
+def assign(bookings, taken=None, dry_run=False):
+    """
+    Match each booking (with its service loaded) to a provider and save
+    the matches. ``taken`` holds the slots given out so far; the pending
+    bookings already assigned on the same dates are added to it.
+    Returns (matched, unmatched, total distance in km).
+    """
+    taken = set() if taken is None else taken
+    taken |= assigned_slots(bookings)
+    matched, total_km = [], 0.0
+    for booking in bookings:
+        when = appointment_of(booking)
+        best = best_provider(booking, when, taken)
+        if best is None:
+            continue
+        distance, booking.provider_id = best
+        taken.add(slot_of(booking.provider_id, booking, when))
+        booking.updated_at = timezone.now()
+        matched.append(booking)
+        total_km += distance
+
+    if matched and not dry_run:
+        with transaction.atomic():
+            Booking.objects.bulk_update(matched, ['provider', 'updated_at'])
+    return len(matched), len(bookings) - len(matched), total_km
+
+
+def pending_batches(batch_size=BATCH_SIZE):
+    """Upcoming pending bookings without a provider, soonest first, in lists of ``batch_size``"""
+    bookings = Booking.objects.filter(
+        status='pending',
+        provider__isnull=True,
+    ).select_related('service').order_by('appointment_date', 'pk')
+    last_date, last_pk = timezone.localdate(), 0
+    while True:
+        # The redundant appointment_date bound keeps the seek on the index (see core.pagination)
+        batch = list(bookings.filter(
+            Q(appointment_date__gt=last_date) | Q(appointment_date=last_date, pk__gt=last_pk),
+            appointment_date__gte=last_date,
+        )[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_date, last_pk = batch[-1].appointment_date, batch[-1].pk
+
+
+def match_pending(batch_size=BATCH_SIZE, limit=None, dry_run=False):
+    """
+    Assign providers to upcoming pending bookings, at most ``limit`` of
+    them. Returns (matched, unmatched, total distance in km).
+    """
+    taken = set()
+    matched = unmatched = 0
+    total_km = 0.0
+    for batch in pending_batches(batch_size):
+        if limit is not None:
+            batch = batch[:limit - matched - unmatched]
+        batch_matched, batch_unmatched, batch_km = assign(batch, taken, dry_run=dry_run)
+        matched += batch_matched
+        unmatched += batch_unmatched
+        total_km += batch_km
+        if limit is not None and matched + unmatched >= limit:
+            break
+    return matched, unmatched, total_km
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-17 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_alter_booking_admin_notes_and_more'),
+        ('providers', '0003_alter_provider_address'),
+        ('services', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'appointment_date'], name='booking_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 23:31
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_hot_query_indexes'),
+        ('providers', '0003_alter_provider_address'),
+        ('services', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['created_at', 'id'], name='booking_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(django.db.models.functions.text.Lower('customer_email'), models.F('created_at'), models.F('id'), name='booking_customer_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['customer_phone', 'created_at', 'id'], name='booking_customer_phone_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-17 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_my_bookings_indexes'),
+        ('providers', '0003_alter_provider_address'),
+        ('services', '0008_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['service', 'appointment_date'], name='booking_service_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['provider', 'appointment_date'], name='booking_provider_date_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 10:12
+
+from django.db import migrations
+from django.db.models import Q
+
+from bookings.models import normalize_phone
+
+
+def normalize_customer_phones(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    bookings = list(
+        Booking.objects.filter(
+            Q(customer_phone__contains=' ') | Q(customer_phone__contains='-') | Q(customer_phone__contains='\t')
+        ).only('customer_phone')
+    )
+    for booking in bookings:
+        booking.customer_phone = normalize_phone(booking.customer_phone)
+    Booking.objects.bulk_update(bookings, ['customer_phone'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_availability_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_customer_phones, migrations.RunPython.noop),
+    ]
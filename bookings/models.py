@@ -1,10 +1,16 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.validators import RegexValidator
 from services.models import Service, SubService
 from providers.models import Provider
 from ckeditor.fields import RichTextField
 
 
+def normalize_phone(value):
+    """Phone number without whitespace or dashes, as customer_phone is stored and searched"""
+    return ''.join(value.split()).replace('-', '')
+
+
 class Booking(models.Model):
     """Booking/Appointment model"""
     
@@ -104,6 +110,17 @@ class Booking(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Booking'
         verbose_name_plural = 'Bookings'
+        indexes = [
+            # Admin status filter, upcoming appointments
+            models.Index(fields=['status', 'appointment_date'], name='booking_status_date_idx'),
+            # my_bookings: keyset pages newest first, per customer (see bookings.listing)
+            models.Index(fields=['created_at', 'id'], name='booking_created_idx'),
+            models.Index(Lower('customer_email'), 'created_at', 'id', name='booking_customer_email_idx'),
+            models.Index(fields=['customer_phone', 'created_at', 'id'], name='booking_customer_phone_idx'),
+            # Slot indexes: one calendar's bookings over the horizon (see bookings.availability)
+            models.Index(fields=['service', 'appointment_date'], name='booking_service_date_idx'),
+            models.Index(fields=['provider', 'appointment_date'], name='booking_provider_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.booking_reference} - {self.customer_full_name} - {self.service.name}"
@@ -111,15 +128,21 @@ class Booking(models.Model):
     def save(self, *args, **kwargs):
         # Generate booking reference if not exists
         if not self.booking_reference:
-            import uuid
-            from datetime import datetime
-            # Format: BK-YYYYMMDD-XXXX (e.g., BK-20251211-A1B2)
-            date_str = datetime.now().strftime('%Y%m%d')
-            unique_id = uuid.uuid4().hex[:4].upper()
-            self.booking_reference = f"BK-{date_str}-{unique_id}"
+            self.booking_reference = self.generate_references(1)[0]
+        # my_bookings looks customers up by the normalized number
+        self.customer_phone = normalize_phone(self.customer_phone)
         
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def generate_references(count):
+        """
+        ``count`` new booking references, e.g. BK-20251211-000042.
+        Numbered per day from a shared sequence, so they never collide.
+        """
+        from core.references import allocate
+        return allocate('BK', count)
+    
     @property
     def customer_full_name(self):
         """Return full customer name"""
@@ -153,15 +176,6 @@ class Booking(models.Model):
         return f"https://www.google.com/maps?q={self.location_latitude},{self.location_longitude}"
     
     def get_whatsapp_number(self):
-        """Get WhatsApp number for this booking (Service > Category > Default)"""
-        if self.service.whatsapp_number:
-            return self.service.whatsapp_number
-        elif self.service.category.whatsapp_number:
-            return self.service.category.whatsapp_number
-        else:
-            try:
-                from site_config.models import SiteConfiguration
-                config = SiteConfiguration.load()
-                return config.default_whatsapp if config and config.default_whatsapp else None
-            except Exception:
-                return None
+        """Normalized WhatsApp number for this booking (Service > Category > Default)"""
+        from core.whatsapp import number_for_service
+        return number_for_service(self.service)
@@ -0,0 +1,291 @@
+import io
+import json
+from datetime import time, timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmark_data import seed_providers, seed_services
+from notifications.models import NotificationJob
+from providers.models import Provider
+from services.models import BusinessHours, Service
+from . import availability, bulk, listing, matching
+from .models import Booking
+
+
+def booking_row(service, **fields):
+    return {
+        'service_id': service.pk,
+        'customer_first_name': 'Amina',
+        'customer_last_name': 'Rahman',
+        'customer_email': 'amina@example.com',
+        'customer_phone': '+971501234567',
+        'location_lat': '25.2',
+        'location_lng': '55.3',
+        'location_address': '12 Bench Street, Dubai',
+        'appointment_date': (timezone.localdate() + timedelta(days=3)).isoformat(),
+        'appointment_time': '10:00 AM',
+        **fields,
+    }
+
+
+class BulkIngestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_services(2)
+        cls.service = Service.objects.order_by('pk').first()
+
+    def test_invalid_rows_get_their_own_errors(self):
+        rows = [
+            booking_row(self.service),
+            booking_row(self.service, appointment_date=20261201),
+            booking_row(self.service, appointment_date=['2026-12-01']),
+            booking_row(self.service, customer_first_name='x' * 101),
+            booking_row(self.service, customer_email='not-an-email'),
+            booking_row(self.service, service_id=10 ** 9),
+            'not an object',
+            booking_row(self.service, customer_phone=''),
+            booking_row(self.service, appointment_time='02:00 PM'),
+        ]
+        results = bulk.ingest(rows, notify=False)
+
+        self.assertEqual([result['row'] for result in results], list(range(len(rows))))
+        self.assertEqual([result['success'] for result in results], [True, False, False, False, False, False, False, False, True])
+        self.assertIn('Invalid date: 20261201. Expected format: YYYY-MM-DD', results[1]['errors'])
+        self.assertIn('customer_first_name is longer than 100 characters', results[3]['errors'])
+        self.assertEqual(results[5]['errors'], ['Service not found'])
+        self.assertIn('customer_phone', results[7]['errors'][0])
+
+        created = Booking.objects.filter(pk__in=[results[0]['id'], results[8]['id']])
+        self.assertEqual(created.count(), 2)
+        self.assertEqual(
+            sorted(created.values_list('booking_reference', flat=True)),
+            sorted([results[0]['booking_reference'], results[8]['booking_reference']]),
+        )
+
+    def test_all_or_nothing_creates_nothing_if_a_row_is_invalid(self):
+        results = bulk.ingest(
+            [booking_row(self.service), booking_row(self.service, location_lat='north')],
+            notify=False,
+            all_or_nothing=True,
+        )
+        self.assertFalse(any(result['success'] for result in results))
+        self.assertEqual(results[0]['errors'], ['Not created: other bookings in the batch are invalid'])
+        self.assertFalse(Booking.objects.exists())
+
+    def test_ndjson_lines_that_are_not_json_are_row_errors(self):
+        body = b'{"service_id": 1}\nnot json\n\n[1, 2]\n'
+        rows = bulk.parse_rows(io.BytesIO(body), 'application/x-ndjson')
+        self.assertEqual(len(rows), 3)
+        results = bulk.ingest(rows, notify=False)
+        self.assertIn('Missing required fields', results[0]['errors'][0])
+        self.assertTrue(results[1]['errors'][0].startswith('Invalid JSON'))
+        self.assertEqual(results[2]['errors'], ['Each booking must be a JSON object'])
+
+
+class CheckSlotTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_services(3)
+        seed_providers(1)
+        cls.provider = Provider.objects.get()
+        cls.service, cls.sibling, cls.no_hours = Service.objects.order_by('pk')
+        Service.objects.filter(pk__in=[cls.service.pk, cls.sibling.pk]).update(provider=cls.provider)
+        cls.day = timezone.localdate() + timedelta(days=3)
+        BusinessHours.objects.bulk_create([
+            BusinessHours(service_id=service_id, weekday=weekday, opening_time=time(9), closing_time=time(17))
+            for service_id in (cls.service.pk, cls.sibling.pk)
+            for weekday in range(7)
+            if weekday != (cls.day + timedelta(days=1)).weekday()
+        ])
+
+    def setUp(self):
+        availability._local.clear()
+        for service in ('service', 'sibling', 'no_hours'):
+            setattr(self, service, Service.objects.get(pk=getattr(self, service).pk))
+
+    def book(self, service, appointment_time, status='confirmed', day=None):
+        # Calendars are invalidated on commit, as they would be outside a test
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                service=service,
+                status=status,
+                customer_first_name='Amina',
+                customer_last_name='Rahman',
+                customer_email='amina@example.com',
+                customer_phone='+971501234567',
+                location_latitude=25.2,
+                location_longitude=55.3,
+                location_address='12 Bench Street, Dubai',
+                appointment_date=day or self.day,
+                appointment_time=appointment_time,
+            )
+
+    def check(self, appointment_time, day=None, service=None, fresh=False):
+        return availability.check_slot(service or self.service, day or self.day, appointment_time, fresh=fresh)
+
+    def test_services_without_hours_accept_any_time(self):
+        self.assertIsNone(self.check('03:17 AM', service=self.no_hours))
+        self.assertIsNone(self.check('whenever', service=self.no_hours))
+
+    def test_times_outside_the_hours_are_refused(self):
+        self.assertIsNone(self.check('09:00 AM'))
+        self.assertIsNone(self.check('16:30'))
+        self.assertEqual(self.check('soon'), 'Invalid appointment time: soon')
+        for appointment_time, day in (
+            ('08:30 AM', None),
+            ('05:00 PM', None),  # The last slot starts half an hour before closing
+            ('10:15 AM', None),  # Not the start of a slot
+            ('10:00 AM', self.day + timedelta(days=1)),  # Closed all day
+        ):
+            with self.subTest(appointment_time=appointment_time, day=day):
+                self.assertIn('is not open at', self.check(appointment_time, day))
+        for day in (timezone.localdate() - timedelta(days=1), timezone.localdate() + timedelta(days=availability.HORIZON_DAYS)):
+            with self.subTest(day=day):
+                self.assertEqual(self.check('10:00 AM', day), 'Appointment time is outside the booking window')
+
+    def test_confirmed_bookings_take_the_slots_they_overlap(self):
+        self.book(self.service, '10:00 AM', status='pending')
+        self.assertIsNone(self.check('10:00 AM'))
+
+        # An off-slot time (e.g. typed in the admin) overlaps the slots either side
+        self.book(self.service, '10:15 AM')
+        for appointment_time, error in (
+            ('09:30 AM', None),
+            ('10:00 AM', 'This time slot is already booked'),
+            ('10:30 AM', 'This time slot is already booked'),
+            ('11:00 AM', None),
+        ):
+            with self.subTest(appointment_time=appointment_time):
+                self.assertEqual(self.check(appointment_time), error)
+                self.assertEqual(self.check(appointment_time, fresh=True), error)
+
+    def test_bookings_block_every_service_of_the_provider(self):
+        self.book(self.sibling, '02:00 PM', status='in_progress')
+        self.assertEqual(self.check('02:00 PM'), 'This time slot is already booked')
+        self.assertIsNone(self.check('02:00 PM', service=self.no_hours))
+
+    def test_fresh_checks_see_bookings_the_index_has_not_caught_up_with(self):
+        self.assertIsNone(self.check('11:00 AM'))
+        # Committed elsewhere, before the calendar version was bumped
+        Booking.objects.create(
+            service=self.service,
+            status='confirmed',
+            customer_first_name='Omar',
+            customer_last_name='Khan',
+            customer_email='omar@example.com',
+            customer_phone='+971501234568',
+            location_latitude=25.2,
+            location_longitude=55.3,
+            location_address='3 Creek Road, Dubai',
+            appointment_date=self.day,
+            appointment_time='11:00 AM',
+        )
+        self.assertIsNone(self.check('11:00 AM'))
+        self.assertEqual(self.check('11:00 AM', fresh=True), 'This time slot is already booked')
+
+    def test_create_booking_refuses_taken_and_closed_slots(self):
+        self.book(self.service, '10:00 AM')
+        payload = {
+            'service_id': self.service.pk,
+            'customer_first_name': 'Sara',
+            'customer_last_name': 'Haddad',
+            'customer_email': 'sara@example.com',
+            'customer_phone': '+971501234569',
+            'location_lat': 25.2,
+            'location_lng': 55.3,
+            'location_address': '7 Marina Walk, Dubai',
+            'appointment_date': self.day.isoformat(),
+        }
+        for appointment_time, status in (('10:00 AM', 409), ('08:00 AM', 409), ('10:30 AM', 200)):
+            with self.subTest(appointment_time=appointment_time):
+                response = self.client.post(
+                    reverse('bookings:create_booking'),
+                    json.dumps({**payload, 'appointment_time': appointment_time}),
+                    content_type='application/json',
+                )
+                self.assertEqual(response.status_code, status)
+        booking = Booking.objects.get(customer_email='sara@example.com')
+        # Its notification job is created in the same transaction
+        self.assertTrue(NotificationJob.objects.filter(kind='booking_whatsapp', object_id=booking.pk).exists())
+
+
+class MyBookingsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_services(1)
+        cls.service = Service.objects.get()
+
+    def test_bookings_are_found_by_the_phone_however_it_was_typed(self):
+        response = self.client.post(
+            reverse('bookings:create_booking'),
+            json.dumps({**booking_row(self.service), 'customer_phone': '+971 50-123 4567'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        booking = Booking.objects.get()
+        self.assertEqual(booking.customer_phone, '+971501234567')
+
+        for phone in ('+971 50-123 4567', '+971501234567', '+971 50 123 4567'):
+            with self.subTest(phone=phone):
+                params = QueryDict(mutable=True)
+                params.update({'email': 'amina@example.com', 'phone': phone})
+                page = listing.customer_bookings(AnonymousUser(), listing.parse_filters(params))
+                self.assertEqual([b.pk for b in page], [booking.pk])
+
+
+class MatchingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_services(1)
+        seed_providers(2)
+        cls.service = Service.objects.get()
+        cls.near, cls.far = Provider.objects.order_by('pk')
+        for provider, longitude in ((cls.near, '55.300000'), (cls.far, '55.320000')):
+            provider.latitude, provider.longitude = '25.200000', longitude
+            provider.is_active = provider.is_available = True
+            provider.save()
+            provider.services.add(cls.service)
+        cls.day = timezone.localdate() + timedelta(days=3)
+
+    def book(self, appointment_time='10:00 AM', provider=None):
+        return Booking.objects.create(
+            service=self.service,
+            provider=provider,
+            customer_first_name='Amina',
+            customer_last_name='Rahman',
+            customer_email='amina@example.com',
+            customer_phone='+971501234567',
+            location_latitude=25.2,
+            location_longitude=55.3,
+            location_address='12 Bench Street, Dubai',
+            appointment_date=self.day,
+            appointment_time=appointment_time,
+        )
+
+    def test_providers_get_the_nearest_pending_bookings_without_double_booking(self):
+        first, second, third = self.book(), self.book(), self.book()
+        other_time = self.book('02:00 PM')
+
+        matched, unmatched, _ = matching.match_pending()
+
+        self.assertEqual((matched, unmatched), (3, 1))
+        providers = dict(Booking.objects.values_list('pk', 'provider_id'))
+        self.assertEqual([providers[first.pk], providers[second.pk], providers[third.pk]], [self.near.pk, self.far.pk, None])
+        self.assertEqual(providers[other_time.pk], self.near.pk)
+
+    def test_slots_assigned_by_earlier_runs_stay_taken(self):
+        self.book(provider=self.near)
+        booking = self.book()
+        self.assertEqual(matching.match_pending()[:2], (1, 0))
+        self.assertEqual(Booking.objects.get(pk=booking.pk).provider_id, self.far.pk)
+
+        self.book()
+        self.assertEqual(matching.match_pending()[:2], (0, 1))
@@ -5,6 +5,8 @@ app_name = 'bookings'
 
 urlpatterns = [
     path('create/', views.create_booking, name='create_booking'),
+    path('bulk/', views.bulk_create_bookings, name='bulk_create_bookings'),
     path('success/<str:booking_reference>/', views.booking_success, name='booking_success'),
     path('my-bookings/', views.my_bookings, name='my_bookings'),
+    path('availability/<int:service_id>/', views.availability_slots, name='availability'),
 ]
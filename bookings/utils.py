@@ -1,62 +1,41 @@
+import logging
 import urllib.parse
 from datetime import datetime
 from django.utils import timezone
 
+from notifications.transports import PermanentNotificationError, get_transport
 
-def send_whatsapp_notification(booking):
+
+logger = logging.getLogger(__name__)
+
+
+def send_whatsapp_notification(booking, transport=None):
     """
     Send WhatsApp notification for a booking.
-    Returns True if successful, False otherwise.
+    Returns the transport's delivery reference; raises on failure.
     
-    Note: This generates a WhatsApp Web URL that can be opened to send the message.
-    For automated sending, you would need to integrate with WhatsApp Business API.
+    Runs in the notification worker (see notifications.worker), queued with
+    NotificationJob.enqueue('booking_whatsapp', booking).
     """
-    try:
-        # Get WhatsApp number
-        whatsapp_number = booking.get_whatsapp_number()
-        
-        if not whatsapp_number:
-            print(f"No WhatsApp number available for booking {booking.booking_reference}")
-            return False
-        
-        # Get country code from site configuration
-        try:
-            from site_config.models import SiteConfiguration
-            config = SiteConfiguration.load()
-            country_code = config.default_country_code if config and config.default_country_code else '971'
-        except Exception:
-            country_code = '971'
-        
-        # Clean WhatsApp number (remove spaces, dashes, etc.)
-        whatsapp_number = ''.join(filter(str.isdigit, whatsapp_number))
-        if whatsapp_number.startswith('0'):
-            whatsapp_number = country_code + whatsapp_number[1:]
-        elif not whatsapp_number.startswith('+'):
-            if not whatsapp_number.startswith(country_code):
-                whatsapp_number = country_code + whatsapp_number
-        
-        # Build message
-        message = build_booking_message(booking)
-        
-        # Update booking record
-        booking.whatsapp_number_used = whatsapp_number
-        booking.whatsapp_sent = True
-        booking.whatsapp_sent_at = timezone.now()
-        booking.save(update_fields=['whatsapp_number_used', 'whatsapp_sent', 'whatsapp_sent_at'])
-        
-        # Generate WhatsApp URL (for manual or automated sending)
-        whatsapp_url = generate_whatsapp_url(whatsapp_number, message)
-        
-        print(f"WhatsApp notification prepared for booking {booking.booking_reference}")
-        print(f"WhatsApp URL: {whatsapp_url}")
-        
-        return True
-        
-    except Exception as e:
-        import traceback
-        print(f"Error sending WhatsApp notification for booking {booking.booking_reference}: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return False
+    # Get WhatsApp number
+    whatsapp_number = booking.get_whatsapp_number()
+    
+    if not whatsapp_number:
+        raise PermanentNotificationError(f"No WhatsApp number available for booking {booking.booking_reference}")
+    
+    # Build message and hand it to the transport
+    message = build_booking_message(booking)
+    reference = (transport or get_transport()).send(whatsapp_number, message)
+    
+    # Update booking record
+    booking.whatsapp_number_used = whatsapp_number
+    booking.whatsapp_sent = True
+    booking.whatsapp_sent_at = timezone.now()
+    booking.save(update_fields=['whatsapp_number_used', 'whatsapp_sent', 'whatsapp_sent_at'])
+    
+    logger.info('WhatsApp notification sent', extra={'booking_reference': booking.booking_reference})
+    
+    return reference
 
 
 def build_booking_message(booking):
@@ -132,28 +111,8 @@ def get_whatsapp_web_url(booking):
         if not whatsapp_number:
             return None
         
-        # Get country code from site configuration
-        try:
-            from site_config.models import SiteConfiguration
-            config = SiteConfiguration.load()
-            country_code = config.default_country_code if config and config.default_country_code else '971'
-        except Exception:
-            country_code = '971'
-        
-        # Clean number
-        whatsapp_number = ''.join(filter(str.isdigit, whatsapp_number))
-        if not whatsapp_number:
-            return None
-            
-        if whatsapp_number.startswith('0'):
-            whatsapp_number = country_code + whatsapp_number[1:]
-        elif not whatsapp_number.startswith(country_code):
-            whatsapp_number = country_code + whatsapp_number
-        
         message = build_booking_message(booking)
         return generate_whatsapp_url(whatsapp_number, message)
-    except Exception as e:
-        import traceback
-        print(f"Error generating WhatsApp URL for booking {booking.booking_reference}: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.exception('Error generating WhatsApp URL', extra={'booking_reference': booking.booking_reference})
         return None
@@ -3,14 +3,23 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
+from django.db import transaction
 from django.utils import timezone
 from datetime import datetime
 import json
+import logging
 
+from notifications.models import NotificationJob
 from services.models import Service, SubService
 from providers.models import Provider
-from .models import Booking
-from .utils import send_whatsapp_notification, get_whatsapp_web_url
+from core.partials import render_partial
+from . import availability, bulk, listing
+from .bulk import parse_appointment_date, sub_service_ids_from
+from .models import Booking, normalize_phone
+from .utils import get_whatsapp_web_url
+
+
+logger = logging.getLogger(__name__)
 
 
 @require_http_methods(["POST"])
@@ -47,20 +56,7 @@ def create_booking(request):
             provider = Provider.objects.filter(id=data['provider_id']).first()
         
         # Parse appointment date - convert string to date object
-        appointment_date_str = data['appointment_date']
-        if isinstance(appointment_date_str, str):
-            # Try multiple date formats
-            for date_format in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y']:
-                try:
-                    appointment_date = datetime.strptime(appointment_date_str, date_format).date()
-                    break
-                except ValueError:
-                    continue
-            else:
-                # If no format matches, raise error
-                raise ValueError(f"Invalid date format: {appointment_date_str}. Expected format: YYYY-MM-DD")
-        else:
-            appointment_date = appointment_date_str
+        appointment_date = parse_appointment_date(data['appointment_date'])
         
         # Validate and format appointment time
         appointment_time = str(data['appointment_time']).strip()
@@ -72,77 +68,80 @@ def create_booking(request):
         except (ValueError, TypeError) as e:
             raise ValueError(f"Invalid location coordinates: {str(e)}")
         
-        # Create booking - STEP 1: Save to Database
-        print(f"Creating booking with data: service_id={service.id}, customer={data['customer_first_name']} {data['customer_last_name']}")
-        
-        booking = Booking.objects.create(
-            service=service,
-            provider=provider,
-            customer_first_name=data['customer_first_name'].strip(),
-            customer_last_name=data['customer_last_name'].strip(),
-            customer_email=data['customer_email'].strip().lower(),
-            customer_phone=data['customer_phone'].strip(),
-            location_latitude=location_latitude,
-            location_longitude=location_longitude,
-            location_address=data['location_address'].strip(),
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            notes=data.get('notes', '').strip()
-        )
-        
-        print(f"✅ STEP 1: Booking saved to database with ID={booking.id}, Reference={booking.booking_reference}")
-        
-        # Add sub-services if selected
-        selected_sub_services = data.get('selected_sub_services', [])
-        if isinstance(selected_sub_services, str):
-            try:
-                selected_sub_services = json.loads(selected_sub_services)
-            except:
-                selected_sub_services = []
-        
-        if selected_sub_services:
-            # Extract IDs from sub-services array
-            sub_service_ids = []
-            for item in selected_sub_services:
-                if isinstance(item, dict) and 'id' in item:
-                    sub_service_ids.append(item['id'])
-                elif isinstance(item, (int, str)):
-                    sub_service_ids.append(item)
+        provider_id = provider.pk if provider else None
+        with transaction.atomic():
+            # The slot must be open and free (services without business hours accept any time).
+            # The calendar stays locked until the booking is saved, so the check sees every booking before it.
+            availability.lock_calendars({
+                availability.calendar_of(service, provider_id),
+                availability.calendar_of(service),
+            })
+            slot_error = availability.check_slot(
+                service, appointment_date, appointment_time, provider_id=provider_id, fresh=True
+            )
+            if slot_error:
+                return JsonResponse({
+                    'success': False,
+                    'error': slot_error
+                }, status=409)
+            
+            # Create booking - STEP 1: Save to Database
+            booking = Booking.objects.create(
+                service=service,
+                provider=provider,
+                customer_first_name=data['customer_first_name'].strip(),
+                customer_last_name=data['customer_last_name'].strip(),
+                customer_email=data['customer_email'].strip().lower(),
+                customer_phone=normalize_phone(data['customer_phone']),
+                location_latitude=location_latitude,
+                location_longitude=location_longitude,
+                location_address=data['location_address'].strip(),
+                appointment_date=appointment_date,
+                appointment_time=appointment_time,
+                notes=data.get('notes', '').strip()
+            )
+            
+            # Add sub-services if selected
+            selected_sub_services = data.get('selected_sub_services', [])
+            if isinstance(selected_sub_services, str):
+                try:
+                    selected_sub_services = json.loads(selected_sub_services)
+                except:
+                    selected_sub_services = []
+            
+            if selected_sub_services:
+                sub_service_ids = sub_service_ids_from(selected_sub_services)
+                
+                if sub_service_ids:
+                    sub_services = SubService.objects.filter(
+                        id__in=sub_service_ids,
+                        service=service
+                    )
+                    booking.sub_services.set(sub_services)
             
-            if sub_service_ids:
-                sub_services = SubService.objects.filter(
-                    id__in=sub_service_ids,
-                    service=service
-                )
-                booking.sub_services.set(sub_services)
-                print(f"✅ Added {sub_services.count()} sub-services to booking")
+            # STEP 2: Queue the WhatsApp notification (sent by the notification worker).
+            # In the same transaction, so the job exists exactly when the booking does.
+            NotificationJob.enqueue('booking_whatsapp', booking)
         
-        # STEP 2: Send WhatsApp notification
-        print(f"🔄 STEP 2: Sending WhatsApp notification for booking {booking.booking_reference}")
-        try:
-            whatsapp_sent = send_whatsapp_notification(booking)
-            if whatsapp_sent:
-                print(f"✅ STEP 2: WhatsApp notification sent successfully")
-            else:
-                print(f"⚠️ STEP 2: WhatsApp notification failed but booking is saved")
-        except Exception as e:
-            print(f"❌ WhatsApp notification error for booking {booking.booking_reference}: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            whatsapp_sent = False
+        logger.info('Booking created', extra={
+            'booking_id': booking.id,
+            'booking_reference': booking.booking_reference,
+            'service_id': service.id,
+        })
         
         # Generate WhatsApp URL for redirect
         try:
             whatsapp_url = get_whatsapp_web_url(booking)
-        except Exception as e:
-            print(f"WhatsApp URL generation failed for booking {booking.booking_reference}: {str(e)}")
+        except Exception:
+            logger.exception('WhatsApp URL generation failed', extra={'booking_reference': booking.booking_reference})
             whatsapp_url = None
         
         return JsonResponse({
             'success': True,
             'booking_reference': booking.booking_reference,
             'message': 'Booking created successfully!',
-            'whatsapp_sent': whatsapp_sent,
+            'whatsapp_sent': booking.whatsapp_sent,
+            'whatsapp_queued': True,
             'whatsapp_url': whatsapp_url,
             'booking_details': {
                 'reference': booking.booking_reference,
@@ -160,15 +159,51 @@ def create_booking(request):
         }, status=404)
     
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Booking creation error: {error_details}")
+        logger.exception('Booking creation failed')
         return JsonResponse({
             'success': False,
             'error': str(e)
         }, status=500)
 
 
+@require_http_methods(["POST"])
+@csrf_exempt
+def bulk_create_bookings(request):
+    """
+    Create many bookings in one request (partner integrations).
+    Body: JSON array of bookings (same fields as create_booking) or NDJSON.
+    Query params: ?notify=false skips WhatsApp notifications,
+    ?atomic=true creates nothing unless every row is valid.
+    """
+    if not bulk.is_authorized(request):
+        return JsonResponse({
+            'success': False,
+            'error': 'Not authorized'
+        }, status=403)
+    
+    try:
+        rows = bulk.parse_rows(request, request.content_type)
+    except bulk.BulkPayloadError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=e.status)
+    
+    results = bulk.ingest(
+        rows,
+        notify=request.GET.get('notify', 'true').lower() != 'false',
+        all_or_nothing=request.GET.get('atomic', 'false').lower() == 'true',
+    )
+    created = sum(1 for result in results if result['success'])
+    
+    return JsonResponse({
+        'success': created == len(results),
+        'created': created,
+        'failed': len(results) - created,
+        'results': results,
+    })
+
+
 def booking_success(request, booking_reference):
     """Booking success page"""
     booking = get_object_or_404(Booking, booking_reference=booking_reference)
@@ -182,15 +217,63 @@ def booking_success(request, booking_reference):
 
 
 def my_bookings(request):
-    """List customer bookings (requires authentication in future)"""
-    # For now, show all bookings (in production, filter by user)
-    bookings = Booking.objects.all().select_related(
-        'service',
-        'provider',
-        'service__category'
-    ).prefetch_related('sub_services')
+    """List the visitor's bookings, newest first, one keyset page at a time (see bookings.listing)"""
+    filters = listing.parse_filters(request.GET)
+    page = listing.customer_bookings(request.user, filters, cursor=request.GET.get('cursor'))
     
     context = {
-        'bookings': bookings
+        'bookings': page,
+        'filters': filters,
+        'statuses': Booking.STATUS_CHOICES,
+        'needs_identity': page is None,
+        'filter_query': request.GET.copy(),
     }
+    context['filter_query'].pop('cursor', None)
     return render(request, 'my_bookings.html', context)
+
+
+@require_http_methods(["GET"])
+def availability_slots(request, service_id):
+    """
+    Free time slots of a service (see bookings.availability).
+    ?date=YYYY-MM-DD lists that day's free slots; the next ?next=N (default 5)
+    free slots from now are always included. JSON, or the time slot
+    buttons for HTMX requests.
+    """
+    service = get_object_or_404(Service.objects.only('id', 'name', 'provider_id', 'updated_at'), id=service_id)
+    index = availability.get_index(service)
+    now = availability.now()
+    
+    try:
+        day = parse_appointment_date(request.GET['date']) if request.GET.get('date') else None
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': f"Invalid date: {request.GET['date']}"
+        }, status=400)
+    try:
+        count = min(max(int(request.GET.get('next', 5)), 0), 50)
+    except ValueError:
+        count = 5
+    
+    slots = index.free_on(day, after=now) if day else []
+    next_slots = index.next_free(now, count)
+    
+    if request.htmx:
+        return render_partial(request, 'components/booking/time_slots_partial.html', {
+            'has_hours': index.has_hours,
+            'day': day,
+            'slots': [availability.format_time(slot) for slot in slots],
+        })
+    
+    return JsonResponse({
+        'success': True,
+        'service_id': service.id,
+        'has_hours': index.has_hours,
+        'date': day.isoformat() if day else None,
+        'slots': [availability.format_time(slot) for slot in slots],
+        'next': [
+            {'date': slot.date().isoformat(), 'time': availability.format_time(slot)}
+            for slot in next_slots
+        ],
+    })
@@ -5,3 +5,7 @@ class CategoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'categories'
     verbose_name = 'Categories & SubCategories'
+
+    def ready(self):
+        from .signals import connect_signals
+        connect_signals()
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-17 22:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_active_services(apps, schema_editor):
+    Category = apps.get_model('categories', 'Category')
+    SubCategory = apps.get_model('categories', 'SubCategory')
+    Service = apps.get_model('services', 'Service')
+
+    for model, field in ((Category, 'category'), (SubCategory, 'subcategory')):
+        counts = Service.objects.filter(
+            is_active=True, **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(total=Count('pk')).values('total')
+        model.objects.update(active_services_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_alter_category_description'),
+        ('services', '0007_alter_service_overview_alter_servicefaq_answer_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='active_services_count',
+            field=models.IntegerField(default=0, editable=False, help_text='Number of active services (maintained automatically)'),
+        ),
+        migrations.AddField(
+            model_name='subcategory',
+            name='active_services_count',
+            field=models.IntegerField(default=0, editable=False, help_text='Number of active services (maintained automatically)'),
+        ),
+        migrations.RunPython(count_active_services, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,14 @@ from imagekit.processors import ResizeToFill, ResizeToFit
 from ckeditor.fields import RichTextField
 
 
+def fields_except_counter(instance):
+    """Concrete fields to save, leaving active_services_count untouched"""
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name != 'active_services_count'
+    ]
+
+
 class Category(models.Model):
     """Service categories"""
     
@@ -55,6 +63,13 @@ class Category(models.Model):
     is_featured = models.BooleanField(default=False)
     order = models.IntegerField(default=0, help_text='Display order (lower numbers first)')
     
+    # Statistics (maintained by categories.signals)
+    active_services_count = models.IntegerField(
+        default=0,
+        editable=False,
+        help_text='Number of active services (maintained automatically)'
+    )
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -71,6 +86,9 @@ class Category(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Never write back a stale counter; signals update it in place
+            kwargs['update_fields'] = fields_except_counter(self)
         super().save(*args, **kwargs)
     
     def get_whatsapp(self):
@@ -82,7 +100,8 @@ class Category(models.Model):
     
     @property
     def total_services(self):
-        return self.services.filter(is_active=True).count()
+        """Number of active services (stored counter, no query)"""
+        return self.active_services_count
 
 
 class SubCategory(models.Model):
@@ -134,6 +153,13 @@ class SubCategory(models.Model):
     is_active = models.BooleanField(default=True)
     order = models.IntegerField(default=0, help_text='Display order (lower numbers first)')
     
+    # Statistics (maintained by categories.signals)
+    active_services_count = models.IntegerField(
+        default=0,
+        editable=False,
+        help_text='Number of active services (maintained automatically)'
+    )
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -151,8 +177,12 @@ class SubCategory(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Never write back a stale counter; signals update it in place
+            kwargs['update_fields'] = fields_except_counter(self)
         super().save(*args, **kwargs)
     
     @property
     def total_services(self):
-        return self.services.filter(is_active=True).count()
+        """Number of active services (stored counter, no query)"""
+        return self.active_services_count
@@ -0,0 +1,71 @@
+"""
+Keep Category.active_services_count and SubCategory.active_services_count exact
+
+Every Service save or delete adjusts the stored counters with F() updates in
+the same transaction, so listing pages read a column instead of counting.
+Queryset update()/bulk_create() bypass signals; run
+``python manage.py reconcile_service_counters`` after those.
+"""
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .models import Category, SubCategory
+
+
+# Service fields that decide which counters a service contributes to
+COUNTED_FIELDS = {'is_active', 'category', 'subcategory'}
+
+# Marker for saves that cannot change any counter
+UNCHANGED = object()
+
+
+def counted_in(is_active, category_id, subcategory_id):
+    """Counters a service with this state contributes to: {(model, pk), ...}"""
+    if not is_active:
+        return set()
+    counted = {(Category, category_id)}
+    if subcategory_id:
+        counted.add((SubCategory, subcategory_id))
+    return counted
+
+
+def adjust_counts(counters, delta):
+    for model, pk in counters:
+        model.objects.filter(pk=pk).update(
+            active_services_count=F('active_services_count') + delta
+        )
+
+
+def remember_counted_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Store the service's counted state as it is in the database before the save"""
+    if raw or (update_fields and not COUNTED_FIELDS & set(update_fields)):
+        instance._counted_state = UNCHANGED
+        return
+    previous = None
+    if instance.pk is not None:
+        previous = sender.objects.filter(pk=instance.pk).values_list(
+            'is_active', 'category_id', 'subcategory_id'
+        ).first()
+    instance._counted_state = previous
+
+
+def update_counts_on_save(sender, instance, raw=False, **kwargs):
+    previous = instance.__dict__.pop('_counted_state', UNCHANGED)
+    if raw or previous is UNCHANGED:
+        return
+    before = counted_in(*previous) if previous else set()
+    after = counted_in(instance.is_active, instance.category_id, instance.subcategory_id)
+    adjust_counts(before - after, -1)
+    adjust_counts(after - before, 1)
+
+
+def update_counts_on_delete(sender, instance, **kwargs):
+    adjust_counts(counted_in(instance.is_active, instance.category_id, instance.subcategory_id), -1)
+
+
+def connect_signals():
+    from services.models import Service
+
+    pre_save.connect(remember_counted_state, sender=Service, dispatch_uid='categories_service_counts_pre_save')
+    post_save.connect(update_counts_on_save, sender=Service, dispatch_uid='categories_service_counts_save')
+    post_delete.connect(update_counts_on_delete, sender=Service, dispatch_uid='categories_service_counts_delete')
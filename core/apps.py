@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import checks  # Registers the system checks
+        from .logs import start_queue_listeners
+        from .signals import connect_signals
+        connect_signals()
+        start_queue_listeners()
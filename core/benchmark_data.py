@@ -0,0 +1,227 @@
+"""
+Synthetic data for the benchmark management commands
+
+Everything is created inside ``rolled_back()`` so benchmarks never leave
+rows behind in the real database.
+"""
+import random
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from categories.models import Category, SubCategory
+from services.models import Service
+
+
+WORDS = [
+    'cleaning', 'deep', 'home', 'office', 'plumbing', 'electrical', 'repair', 'installation',
+    'painting', 'interior', 'design', 'garden', 'landscaping', 'moving', 'packing', 'pest',
+    'control', 'carpet', 'window', 'kitchen', 'bathroom', 'renovation', 'air', 'conditioning',
+    'maintenance', 'emergency', 'same', 'day', 'professional', 'certified', 'villa', 'apartment',
+    'laundry', 'ironing', 'sofa', 'mattress', 'disinfection', 'handyman', 'tiling', 'roofing',
+]
+
+
+# Less common made-up words so matches are as selective as in a real catalog
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'tu', 'sa', 'vor', 'ne', 'pi', 'dal', 'qu', 'zen']
+RARE_WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back"""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def sentence(rng, length):
+    return ' '.join(
+        rng.choice(WORDS) if rng.random() < 0.3 else rng.choice(RARE_WORDS)
+        for _ in range(length)
+    )
+
+
+def seed_categories(count=12, subcategories_per_category=4, seed=0):
+    """Create active categories with subcategories. Returns (categories, subcategories)."""
+    rng = random.Random(seed)
+    categories = Category.objects.bulk_create([
+        Category(
+            name=f'Bench {sentence(rng, 2).title()} {i}',
+            slug=f'bench-category-{seed}-{i}',
+            is_active=True,
+            is_featured=i < 6,
+            order=i,
+        )
+        for i in range(count)
+    ])
+    subcategories = SubCategory.objects.bulk_create([
+        SubCategory(
+            category=category,
+            name=f'{sentence(rng, 2).title()} {category.pk}-{j}',
+            slug=f'bench-subcategory-{seed}-{category.pk}-{j}',
+            is_active=True,
+            order=j,
+        )
+        for category in categories
+        for j in range(subcategories_per_category)
+    ])
+    return categories, subcategories
+
+
+def seed_services(count, categories=None, subcategories=None, seed=0, batch_size=5000):
+    """Bulk-create ``count`` services spread over the given (or new) categories"""
+    rng = random.Random(seed)
+    if categories is None:
+        categories, subcategories = seed_categories(seed=seed)
+    subcategories_by_category = {}
+    for subcategory in subcategories or []:
+        subcategories_by_category.setdefault(subcategory.category_id, []).append(subcategory)
+
+    services = []
+    for i in range(count):
+        category = rng.choice(categories)
+        candidates = subcategories_by_category.get(category.pk)
+        services.append(Service(
+            category=category,
+            subcategory=rng.choice(candidates) if candidates else None,
+            name=f'{sentence(rng, 3).title()} {i}',
+            slug=f'bench-service-{seed}-{i}',
+            short_description=sentence(rng, 12),
+            overview=f'<p>{sentence(rng, 40)}</p>',
+            featured_image='services/bench.webp',
+            rating=round(rng.uniform(0, 5), 1),
+            total_reviews=rng.randint(0, 500),
+            services_provided=rng.randint(0, 1000),
+            is_active=rng.random() > 0.1,
+            is_featured=rng.random() > 0.9,
+            is_popular=rng.random() > 0.9,
+        ))
+        if len(services) >= batch_size:
+            Service.objects.bulk_create(services)
+            services = []
+    Service.objects.bulk_create(services)
+    return categories, subcategories
+
+
+FIRST_NAMES = ['Amina', 'Omar', 'Sara', 'Yusuf', 'Layla', 'Karim', 'Noor', 'Hassan', 'Maya', 'Rafi']
+LAST_NAMES = ['Rahman', 'Khan', 'Haddad', 'Saleh', 'Farouk', 'Ali', 'Nasser', 'Hossain', 'Aziz', 'Malik']
+
+
+def seed_sub_services(services, per_service=3):
+    """Bulk-create sub-services for ``services``. Returns {service_id: [sub_service_id, ...]}"""
+    SubService = Service.sub_services.rel.related_model
+    created = SubService.objects.bulk_create([
+        SubService(service=service, name=f'Bench option {j}', price=10 * (j + 1), order=j)
+        for service in services
+        for j in range(per_service)
+    ])
+    by_service = {}
+    for sub_service in created:
+        by_service.setdefault(sub_service.service_id, []).append(sub_service.pk)
+    return by_service
+
+
+def booking_rows(count, sub_services_by_service, seed=0):
+    """Booking payloads in the create_booking / bulk endpoint format"""
+    rng = random.Random(seed)
+    service_ids = list(sub_services_by_service)
+    rows = []
+    for i in range(count):
+        service_id = rng.choice(service_ids)
+        sub_service_ids = sub_services_by_service[service_id]
+        rows.append({
+            'service_id': service_id,
+            'customer_first_name': rng.choice(FIRST_NAMES),
+            'customer_last_name': rng.choice(LAST_NAMES),
+            'customer_email': f'customer{seed}-{i}@example.com',
+            'customer_phone': f'+9715{rng.randint(10000000, 99999999)}',
+            'location_lat': f'{rng.uniform(24.9, 25.4):.6f}',
+            'location_lng': f'{rng.uniform(55.0, 55.6):.6f}',
+            'location_address': f'{rng.randint(1, 999)} {sentence(rng, 2).title()} Street, Dubai',
+            'appointment_date': f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+            'appointment_time': f'{rng.randint(8, 11)}:{rng.choice(["00", "30"])} AM',
+            'notes': sentence(rng, 6) if rng.random() < 0.3 else '',
+            'selected_sub_services': rng.sample(sub_service_ids, k=rng.randint(0, len(sub_service_ids))),
+        })
+    return rows
+
+
+def customer_identity(k):
+    """(email, phone) of synthetic customer ``k``"""
+    return f'customer{k}@example.com', f'+9715{k:08d}'
+
+
+def seed_bookings(count, services, customers=None, seed=0, batch_size=5000, start=0):
+    """
+    Bulk-create ``count`` bookings for ``services`` spread over ``customers``
+    synthetic customers (default count / 10). Customer 0 makes 1% of all
+    bookings, so one customer has a long history.
+    """
+    from bookings.models import Booking
+
+    rng = random.Random(seed + start)
+    customers = customers or max(count // 10, 1)
+    statuses = [value for value, _ in Booking.STATUS_CHOICES]
+    bookings = []
+    for i in range(start, start + count):
+        service = rng.choice(services)
+        email, phone = customer_identity(0 if rng.random() < 0.01 else rng.randrange(customers))
+        bookings.append(Booking(
+            service=service,
+            provider_id=service.provider_id,
+            customer_first_name=rng.choice(FIRST_NAMES),
+            customer_last_name=rng.choice(LAST_NAMES),
+            customer_email=email,
+            customer_phone=phone,
+            location_latitude=f'{rng.uniform(24.9, 25.4):.6f}',
+            location_longitude=f'{rng.uniform(55.0, 55.6):.6f}',
+            location_address=f'{rng.randint(1, 999)} Bench Street, Dubai',
+            appointment_date=f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+            appointment_time=f'{rng.randint(8, 11)}:{rng.choice(["00", "30"])} AM',
+            status=rng.choice(statuses),
+            booking_reference=f'BENCH-{seed}-{i}',
+        ))
+        if len(bookings) >= batch_size:
+            Booking.objects.bulk_create(bookings)
+            bookings = []
+    Booking.objects.bulk_create(bookings)
+
+
+def seed_providers(count, seed=0, batch_size=5000):
+    """Bulk-create ``count`` active providers (and their users) spread over Dubai"""
+    from django.contrib.auth import get_user_model
+    from providers import geo
+    from providers.models import Provider
+
+    User = get_user_model()
+    rng = random.Random(seed)
+    users = User.objects.bulk_create(
+        [User(username=f'bench-provider-{seed}-{i}', password='!') for i in range(count)],
+        batch_size=batch_size,
+    )
+    providers = []
+    for i, user in enumerate(users):
+        latitude, longitude = f'{rng.uniform(24.9, 25.4):.6f}', f'{rng.uniform(55.0, 55.6):.6f}'
+        providers.append(Provider(
+            user=user,
+            business_name=f'{sentence(rng, 2).title()} Services {i}',
+            phone=f'+9714{rng.randint(1000000, 9999999)}',
+            email=f'provider{seed}-{i}@example.com',
+            address=f'{rng.randint(1, 999)} Bench Street, Dubai',
+            city='Dubai',
+            postal_code='00000',
+            latitude=latitude,
+            longitude=longitude,
+            geo_cell=geo.cell_of(latitude, longitude),  # bulk_create skips Provider.save()
+            rating=round(rng.uniform(3, 5), 2),
+            is_active=rng.random() > 0.05,
+        ))
+    return Provider.objects.bulk_create(providers, batch_size=batch_size)
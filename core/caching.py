@@ -0,0 +1,219 @@
+"""
+Shared caching helpers
+
+Versions live in the default cache, which must be shared by every worker
+process (settings.CACHES: the database cache, or Redis). With a per-process
+backend such as LocMemCache a bump() only reaches the process that made it,
+and the others keep serving their copies (system check core.W001).
+
+Only the version tokens are read from the shared cache on each request:
+the first version read of a request fetches every registered version in
+one get_many(), and the request reuses them from then on (see
+begin_request). Values cached under a versioned key never change, so each
+process keeps them in memory (CachedValue, VersionedCache) and a warm page
+costs that single cache read.
+
+Settings:
+    VERSIONED_CACHE_LOCAL_SIZE  values kept per process by VersionedCache (default 10000)
+"""
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from asgiref.local import Local
+from django.conf import settings
+from django.core.cache import cache
+
+
+LOCAL_SIZE = getattr(settings, 'VERSIONED_CACHE_LOCAL_SIZE', 10000)
+
+VERSION_TOKEN = re.compile(r'^([0-9a-f]+)-[0-9a-f]{32}$')
+
+# Keys of the versions fetched together at the first version read of a request
+_prefetched = set()
+# The versions read during the current request (None outside requests)
+_request = Local()
+
+
+def begin_request(**kwargs):
+    """request_started receiver: versions are read again, once, by this request"""
+    _request.versions = {}
+
+
+def end_request(**kwargs):
+    """request_finished receiver"""
+    _request.versions = None
+
+
+def new_version():
+    """A fresh version token, starting with the time it was made (see version_time)"""
+    return f'{int(time.time() * 1000):x}-{uuid.uuid4().hex}'
+
+
+def version_time(token):
+    """Unix time at which a version token was made, or None if it isn't one"""
+    match = VERSION_TOKEN.match(token) if isinstance(token, str) else None
+    return int(match.group(1), 16) / 1000 if match else None
+
+
+def get_versions(keys):
+    """
+    {key: token} for the given version keys, creating missing ones. During
+    a request, versions are read from the shared cache once: on the first
+    call, together with every prefetched version.
+    """
+    seen = getattr(_request, 'versions', None)
+    if seen is None:
+        seen = {}
+        fetch = set(keys)
+    elif not seen:
+        fetch = _prefetched | set(keys)
+    else:
+        fetch = {key for key in keys if key not in seen}
+
+    if fetch:
+        seen.update(cache.get_many(fetch))
+        for key in keys:
+            if seen.get(key) is None:
+                version = new_version()
+                if not cache.add(key, version, None):
+                    version = cache.get(key) or version
+                seen[key] = version
+    return {key: seen[key] for key in keys}
+
+
+def bump_versions(keys):
+    """Give the version keys new tokens, invalidating everything cached under them"""
+    versions = {key: new_version() for key in keys}
+    cache.set_many(versions, None)
+    seen = getattr(_request, 'versions', None)
+    if seen is not None:
+        seen.update(versions)
+
+
+class CacheVersion:
+    """
+    A version token in the shared cache. Cache keys built from it are
+    invalidated everywhere at once by bump(), without deleting them.
+
+    ``prefetch=False`` leaves it out of the versions fetched at the start
+    of each request (for versions made on the fly, e.g. one per calendar).
+    """
+
+    def __init__(self, key, prefetch=True):
+        self.key = key
+        if prefetch:
+            _prefetched.add(key)
+
+    def get(self):
+        return get_versions([self.key])[self.key]
+
+    def bump(self):
+        bump_versions([self.key])
+
+
+class CachedValue:
+    """
+    A value cached at two levels: a process-local copy and the shared Django
+    cache. Both are tied to a version token stored in the shared cache, so a
+    single bump() (e.g. from a model save) invalidates every process that
+    shares that cache.
+
+    get() reads only the version (once per request, see get_versions); the
+    value itself is only fetched from the shared cache (or rebuilt with
+    ``loader``) when the version changes.
+    """
+
+    def __init__(self, name, loader, timeout=None):
+        self.name = name
+        self.loader = loader
+        self.timeout = timeout
+        self.version = CacheVersion(f'cached_value:{name}:version')
+        self._local = None  # (version, value)
+
+    def data_key(self, version):
+        return f'cached_value:{self.name}:{version}'
+
+    def get(self):
+        version = self.version.get()
+        local = self._local
+        if local is not None and local[0] == version:
+            return local[1]
+
+        value = cache.get(self.data_key(version))
+        if value is None:
+            value = self.loader()
+            cache.set(self.data_key(version), value, self.timeout)
+
+        self._local = (version, value)
+        return value
+
+    def bump(self):
+        """Invalidate the value in every process sharing the cache"""
+        self.version.bump()
+        self._local = None
+
+
+class VersionedCache:
+    """
+    The shared cache behind a per-process LRU, for keys that hold a
+    version or an updated_at: what is stored under such a key never
+    changes, so a process reuses its copy without asking the shared cache.
+    A copy is dropped after the timeout it was stored with (or read with).
+    """
+
+    def __init__(self, size=LOCAL_SIZE):
+        self.size = size
+        self._local = OrderedDict()  # key -> (expires, value), least recently used first
+        self._lock = threading.Lock()
+
+    def get_many(self, keys, timeout=None):
+        """{key: value} of the keys found; ``timeout`` bounds how long copies read from the shared cache are kept"""
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                entry = self._local.get(key)
+                if entry is not None and (entry[0] is None or entry[0] > now):
+                    self._local.move_to_end(key)
+                    found[key] = entry[1]
+                else:
+                    missing.append(key)
+        if missing:
+            shared = cache.get_many(missing)
+            self._keep(shared, timeout)
+            found.update(shared)
+        return found
+
+    def get(self, key, timeout=None):
+        return self.get_many([key], timeout).get(key)
+
+    def set_many(self, data, timeout):
+        cache.set_many(data, timeout)
+        self._keep(data, timeout)
+
+    def set(self, key, value, timeout):
+        self.set_many({key: value}, timeout)
+
+    def _keep(self, data, timeout):
+        expires = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            for key, value in data.items():
+                self._local[key] = (expires, value)
+                self._local.move_to_end(key)
+            while len(self._local) > self.size:
+                self._local.popitem(last=False)
+
+    def clear(self):
+        """Drop this process's copies"""
+        with self._lock:
+            self._local.clear()
+
+
+versioned_cache = VersionedCache()
+
+# Bumped whenever a Service, Category, SubCategory or Provider changes
+# (see core.signals); used to key caches of catalog listings.
+catalog_version = CacheVersion('catalog:version')
@@ -0,0 +1,29 @@
+"""
+System checks for settings the core helpers rely on
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Cache versions (core.caching) only reach other worker processes through a shared cache"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [Warning(
+        f'The default cache ({backend}) is not shared between processes.',
+        hint=(
+            'Cached navigation, site settings, WhatsApp numbers, catalog pages and booking '
+            'availability are invalidated through the cache, so other worker processes keep '
+            'stale copies. Use a shared backend (DatabaseCache, Redis or Memcached) when '
+            'running more than one process.'
+        ),
+        id='core.W001',
+    )]
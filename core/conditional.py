@@ -0,0 +1,140 @@
+"""
+Conditional GET for catalog pages
+
+Catalog pages (service details, categories, the services listing, the home
+page and its partials) change far less often than they are requested.
+``conditional_page`` computes their ETag from version tokens that are
+already kept in the cache instead of from the rendered body:
+
+    - catalog_version (bumped on Service/Category/SubCategory/Provider
+      changes, see core.signals), the home snapshot section versions or a
+      service's updated_at, depending on the page
+    - the site configuration and navbar versions and the static files
+      manifest hash, which every full page depends on
+    - the user (pages show the login state) and the HX-Request header
+
+so If-None-Match / If-Modified-Since is answered with 304 Not Modified
+before the view runs: no queries beyond the validator (the versions are
+read in one get_many, see core.caching), no rendering, and nothing is
+written. Last-Modified is the latest of the times the versions were bumped
+(tokens carry it), a service's updated_at and the start of the current
+CONDITIONAL_GET_TTL window.
+
+Anonymous responses get ``Cache-Control: public, max-age=0, s-maxage=N``:
+browsers revalidate on every visit and a CDN or reverse proxy may serve
+the page for N seconds. Responses for logged-in users, and pages with a
+CSRF form (service details), are private.
+
+Settings:
+    CONDITIONAL_GET_ENABLED   default True
+    CONDITIONAL_GET_S_MAXAGE  seconds a shared cache may serve an anonymous page (default 60)
+    CONDITIONAL_GET_TTL       validators roll over after this many seconds, so rows changed
+                              through queryset.update() (which sends no signals) heal (default 1 hour)
+"""
+import hashlib
+import json
+import time
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from site_config.models import site_configuration_cache
+from . import home_snapshot
+from .caching import catalog_version, version_time
+from .context_processors import nav_categories_cache
+
+
+ENABLED = getattr(settings, 'CONDITIONAL_GET_ENABLED', True)
+S_MAXAGE = getattr(settings, 'CONDITIONAL_GET_S_MAXAGE', 60)
+TTL = getattr(settings, 'CONDITIONAL_GET_TTL', 60 * 60)
+
+
+def page_versions(request):
+    """Validator parts shared by every page"""
+    return [
+        site_configuration_cache.version.get(),
+        nav_categories_cache.version.get(),
+        getattr(staticfiles_storage, 'manifest_hash', ''),
+        request.user.pk if request.user.is_authenticated else None,
+        bool(getattr(request, 'htmx', False)),
+        int(time.time() // TTL) if TTL else None,
+    ]
+
+
+def catalog_versions(request, *args, **kwargs):
+    """Validator of pages built from catalog listings"""
+    return [catalog_version.get()]
+
+
+def home_sections(names):
+    """Validator of pages built from home snapshot sections"""
+    def validator(request, *args, **kwargs):
+        versions = home_snapshot.get_versions(names)
+        return [versions[name] for name in names]
+    return validator
+
+
+def make_etag(parts):
+    return '"%s"' % hashlib.md5(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def last_modified(parts):
+    """Unix time of the latest change among the validator parts (None if none has a time)"""
+    times = [int(time.time() // TTL * TTL)] if TTL else []
+    for part in parts:
+        if isinstance(part, datetime):
+            times.append(part.timestamp())
+        elif version_time(part) is not None:
+            times.append(version_time(part))
+    return int(max(times)) if times else None
+
+
+def conditional_page(validator, shared=True, not_modified=None):
+    """
+    Answer conditional GETs of a view with 304 Not Modified.
+
+    ``validator(request, *args, **kwargs)`` returns the version parts the page
+    depends on besides page_versions(), or None to skip the check (e.g. the
+    object doesn't exist and the view should 404). ``shared=False`` keeps
+    responses out of shared caches; ``not_modified`` is called with the view
+    arguments whenever a 304 is returned instead of running the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not ENABLED or request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            parts = validator(request, *args, **kwargs)
+            if parts is None:
+                return view(request, *args, **kwargs)
+
+            parts = [*page_versions(request), *parts]
+            etag = make_etag(parts)
+            modified = last_modified(parts)
+            response = get_conditional_response(request, etag=etag, last_modified=modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            elif response.status_code == 304 and not_modified:
+                not_modified(request, *args, **kwargs)
+
+            if response.status_code in (200, 304):
+                response.headers.setdefault('ETag', etag)
+                if modified is not None:
+                    response.headers.setdefault('Last-Modified', http_date(modified))
+                set_cache_control(request, response, shared)
+            return response
+        return wrapper
+    return decorator
+
+
+def set_cache_control(request, response, shared=True):
+    patch_vary_headers(response, ['HX-Request'])
+    # A rendered {% csrf_token %} is tied to this client's cookie
+    if shared and not request.user.is_authenticated and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        patch_cache_control(response, public=True, max_age=0, s_maxage=S_MAXAGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
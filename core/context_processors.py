@@ -1,8 +1,24 @@
 """
 Context processors for global template variables
+
+Both processors run on every full-page render, so they read from
+process-local/shared caches instead of the database. The caches are
+invalidated from SiteConfiguration.save() and the Category/SubCategory
+signals in core.signals. HTMX partials use the lazy variants below (see
+core.partials).
 """
+from django.utils.functional import SimpleLazyObject
+
 from site_config.models import SiteConfiguration
 from categories.models import Category
+from .caching import CachedValue
+
+
+nav_categories_cache = CachedValue(
+    'nav_categories',
+    lambda: list(Category.objects.prefetch_related('subcategories')),
+)
+
 
 def site_settings(request):
     """
@@ -10,12 +26,23 @@ def site_settings(request):
     Usage in templates: {{ site_config.site_name }}
     """
     return {
-        'site_config': SiteConfiguration.load()
+        'site_config': SiteConfiguration.get_cached()
     }
 
 
 def navbar(request):
-    categories = Category.objects.all()
+    categories = nav_categories_cache.get()
     return {
         'nav_categories': categories  # এই নামেই টেমপ্লেটে লুপ চালাতে হবে
-    }
\ No newline at end of file
+    }
+
+
+# The 'partials' template engine (see core.partials) uses these instead:
+# the values are only loaded if a fragment actually reads them
+
+def lazy_site_settings(request):
+    return {'site_config': SimpleLazyObject(SiteConfiguration.get_cached)}
+
+
+def lazy_navbar(request):
+    return {'nav_categories': SimpleLazyObject(nav_categories_cache.get)}
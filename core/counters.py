@@ -0,0 +1,154 @@
+"""
+Write-behind counters
+
+The service page-view counter (Service.views_count) used to be written
+with a read-modify-write save() on every view, which loses increments
+under concurrency and takes a SQLite write lock per request.
+BufferedCounter accumulates increments in process memory and flushes them
+in batches as ``UPDATE ... SET field = field + n`` statements from a
+background thread.
+
+Usage:
+    service_views.increment(service.pk)
+    service_views.flush()  # normally done by the flusher thread
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds between background flushes
+FLUSH_INTERVAL = getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 5)
+
+# Flush early once this many increments are pending
+MAX_PENDING = getattr(settings, 'VIEW_COUNTER_MAX_PENDING', 1000)
+
+
+class BufferedCounter:
+    """Buffers integer increments of ``field`` on ``model_label`` rows, keyed by pk"""
+
+    def __init__(self, model_label, field):
+        self.model_label = model_label
+        self.field = field
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)
+        self._pending_total = 0
+
+    def __repr__(self):
+        return f'<BufferedCounter {self.model_label}.{self.field}>'
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def increment(self, pk, amount=1):
+        with self._lock:
+            self._pending[pk] += amount
+            self._pending_total += amount
+            pending_total = self._pending_total
+
+        _flusher.ensure_started()
+        if pending_total >= MAX_PENDING:
+            _flusher.wake()
+
+    def pending(self):
+        """Copy of the increments not yet written to the database"""
+        with self._lock:
+            return dict(self._pending)
+
+    def _take(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = defaultdict(int)
+            self._pending_total = 0
+        return pending
+
+    def _restore(self, pending):
+        with self._lock:
+            for pk, amount in pending.items():
+                self._pending[pk] += amount
+                self._pending_total += amount
+
+    def flush(self):
+        """
+        Write pending increments with one UPDATE per distinct amount.
+        On failure the increments are put back and retried on the next flush.
+        Returns the number of rows updated.
+        """
+        pending = self._take()
+        if not pending:
+            return 0
+
+        by_amount = defaultdict(list)
+        for pk, amount in pending.items():
+            by_amount[amount].append(pk)
+
+        try:
+            updated = 0
+            with transaction.atomic():
+                for amount, pks in by_amount.items():
+                    updated += self.model.objects.filter(pk__in=pks).update(
+                        **{self.field: F(self.field) + amount}
+                    )
+            return updated
+        except Exception:
+            self._restore(pending)
+            raise
+
+
+class _Flusher:
+    """Daemon thread that flushes every registered counter periodically"""
+
+    def __init__(self, counters, interval):
+        self.counters = counters
+        self.interval = interval
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='view-counter-flusher', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            flush_all()
+            # The thread owns its own connection; don't keep it open between flushes
+            connection.close()
+
+
+def flush_all():
+    """Flush every counter. Failures are retried on the next call."""
+    updated = 0
+    for counter in COUNTERS:
+        try:
+            updated += counter.flush()
+        except Exception:
+            logger.exception('Error flushing %s', counter)
+    return updated
+
+
+service_views = BufferedCounter('services.Service', 'views_count')
+
+COUNTERS = [service_views]
+
+_flusher = _Flusher(COUNTERS, FLUSH_INTERVAL)
+atexit.register(flush_all)
@@ -0,0 +1,351 @@
+"""
+Streaming CSV and NDJSON exports of bookings, service requests and
+request attachments
+
+A dataset is read with values_list(...).iterator(chunk_size) in primary
+key order, so related names (service, category, provider) come from the
+same SELECT and no model instances are built. Rows are formatted as they
+arrive and handed on in blocks of FLUSH_ROWS: to a StreamingHttpResponse
+from the admin (ExportActionMixin), or to a file or stdout from
+``python manage.py export_data``. Memory stays the same however many rows
+are exported.
+
+Each export picks its columns (DATASETS[name].columns, defaults marked)
+and an optional date range on one of the dataset's date fields. In CSV,
+text values that a spreadsheet would run as a formula (=, +, -, @) are
+prefixed with a quote, except phone numbers in international form
+('+' and digits only, as Booking.customer_phone is stored), which can't
+run anything; NDJSON has them as they are.
+
+Settings:
+    EXPORT_CHUNK_SIZE  rows fetched per database round trip (default 2000)
+"""
+import csv
+import io
+import json
+import re
+from datetime import date, datetime, time, timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+
+CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+FLUSH_ROWS = 500
+
+# Cells starting with these are formulas to Excel and other spreadsheets
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# ...but a '+' and nothing but digits is a phone number, not a formula
+PHONE_NUMBER = re.compile(r'\+\d+')
+# Free text (names, email, phone, notes, addresses), as opposed to dates and numbers
+TEXT_TYPES = ('CharField', 'TextField')
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+}
+
+
+def text(value):
+    """Rich text fields as plain text on one line"""
+    if not value:
+        return value
+    return ' '.join((strip_tags(value) if '<' in value else value).split())
+
+
+class Column:
+    """An exported column: its name and the ORM lookup it reads"""
+
+    def __init__(self, name, lookup=None, format=None, default=True):
+        self.name = name
+        self.lookup = lookup or name
+        self.format = format
+        self.default = default
+
+
+class Dataset:
+    """A model, the columns it can be exported with and the date fields it can be filtered on"""
+
+    def __init__(self, name, model_label, columns, date_fields):
+        self.name = name
+        self.model_label = model_label
+        self.columns = {column.name: column for column in columns}
+        self.date_fields = date_fields  # the first is the default
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def default_columns(self):
+        return [name for name, column in self.columns.items() if column.default]
+
+    def select(self, names=None):
+        """The Columns named, in order (the defaults if none are); ValueError on unknown names"""
+        names = names or self.default_columns()
+        unknown = [name for name in names if name not in self.columns]
+        if unknown:
+            raise ValueError(
+                f"Unknown {self.name} column(s): {', '.join(unknown)}. "
+                f"Available: {', '.join(self.columns)}"
+            )
+        return [self.columns[name] for name in names]
+
+    def filter(self, queryset=None, date_field=None, date_from=None, date_to=None):
+        """``queryset`` (default: every row) within the date range, in primary key order"""
+        queryset = self.model.objects.all() if queryset is None else queryset
+        date_field = date_field or self.date_fields[0]
+        if date_field not in self.date_fields:
+            raise ValueError(f"{self.name} can be filtered on {', '.join(self.date_fields)}, not {date_field}")
+        if self.model._meta.get_field(date_field).get_internal_type() == 'DateTimeField':
+            # Local midnights, so a range still reads the index on the column
+            if date_from:
+                queryset = queryset.filter(**{f'{date_field}__gte': start_of(date_from)})
+            if date_to:
+                queryset = queryset.filter(**{f'{date_field}__lt': start_of(date_to + timedelta(days=1))})
+        else:
+            if date_from:
+                queryset = queryset.filter(**{f'{date_field}__gte': date_from})
+            if date_to:
+                queryset = queryset.filter(**{f'{date_field}__lte': date_to})
+        return queryset.order_by('pk')
+
+
+def start_of(day):
+    return timezone.make_aware(datetime.combine(day, time())) if settings.USE_TZ else datetime.combine(day, time())
+
+
+DATASETS = {
+    dataset.name: dataset
+    for dataset in (
+        Dataset('bookings', 'bookings.Booking', [
+            Column('reference', 'booking_reference'),
+            Column('status'),
+            Column('customer_first_name'),
+            Column('customer_last_name'),
+            Column('customer_email'),
+            Column('customer_phone'),
+            Column('service', 'service__name'),
+            Column('category', 'service__category__name'),
+            Column('provider', 'provider__business_name'),
+            Column('appointment_date'),
+            Column('appointment_time'),
+            Column('location_address', format=text),
+            Column('location_latitude'),
+            Column('location_longitude'),
+            Column('notes', default=False),
+            Column('admin_notes', format=text, default=False),
+            Column('whatsapp_sent'),
+            Column('whatsapp_sent_at', default=False),
+            Column('created_at'),
+            Column('updated_at', default=False),
+        ], date_fields=['created_at', 'appointment_date']),
+        Dataset('service_requests', 'quotations.ServiceRequest', [
+            Column('reference', 'request_reference'),
+            Column('status'),
+            Column('first_name'),
+            Column('last_name'),
+            Column('email'),
+            Column('phone'),
+            Column('service', 'service__name'),
+            Column('category', 'service__category__name'),
+            Column('pricing_tier'),
+            Column('booking_estimate'),
+            Column('booking_date'),
+            Column('booking_time'),
+            Column('number_of_people'),
+            Column('hourly_rate', default=False),
+            Column('booking_charges'),
+            Column('cc_zone'),
+            Column('cc_zone_charge', default=False),
+            Column('vat'),
+            Column('total_amount'),
+            Column('location_address', format=text),
+            Column('location_latitude', default=False),
+            Column('location_longitude', default=False),
+            Column('additional_notes', format=text, default=False),
+            Column('admin_notes', format=text, default=False),
+            Column('whatsapp_sent'),
+            Column('created_at'),
+        ], date_fields=['created_at', 'booking_date']),
+        Dataset('attachments', 'quotations.RequestAttachment', [
+            Column('request_reference', 'request__request_reference'),
+            Column('file_name'),
+            Column('file_type'),
+            Column('file_size'),
+            Column('file'),
+            Column('uploaded_at'),
+        ], date_fields=['uploaded_at']),
+    )
+}
+
+
+def field_of(model, lookup):
+    """The model field a lookup such as 'service__category__name' ends on"""
+    *path, name = lookup.split('__')
+    for step in path:
+        model = model._meta.get_field(step).related_model
+    return model._meta.get_field(name)
+
+
+def converter(field, format=None):
+    """
+    How a column's values are written out, chosen once from its field type:
+    ISO dates (datetimes in local time), exact decimals. None when values
+    pass through as they are.
+    """
+    kind = field.get_internal_type()
+    if kind == 'DateTimeField':
+        zone = timezone.get_current_timezone() if settings.USE_TZ else None
+
+        def convert(value):
+            if value is None:
+                return None
+            return (value.astimezone(zone) if zone else value).isoformat()
+    elif kind in ('DateField', 'TimeField'):
+        def convert(value):
+            return None if value is None else value.isoformat()
+    elif kind == 'DecimalField':
+        def convert(value):
+            return None if value is None else str(value)
+    else:
+        convert = None
+
+    if format is None:
+        return convert
+    if convert is None:
+        return format
+    return lambda value: convert(format(value))
+
+
+def rows(columns, queryset, chunk_size=CHUNK_SIZE):
+    """Each row's values, formatted, streamed ``chunk_size`` rows per fetch"""
+    converters = [converter(field_of(queryset.model, column.lookup), column.format) for column in columns]
+    values = queryset.values_list(*(column.lookup for column in columns))
+    if not any(converters):
+        yield from values.iterator(chunk_size=chunk_size)
+        return
+    for row in values.iterator(chunk_size=chunk_size):
+        yield [value if convert is None else convert(value) for convert, value in zip(converters, row)]
+
+
+def render(rows, columns, fmt, text_columns=()):
+    """
+    CSV (with a header row) or NDJSON text for ``rows``, in blocks of
+    FLUSH_ROWS rows. In CSV, values of the ``text_columns`` (positions)
+    that a spreadsheet would read as a formula are prefixed with a quote.
+    """
+    names = [column.name for column in columns]
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+
+        def write(values):
+            values = list(values)
+            for i in text_columns:
+                value = values[i]
+                if value and value[0] in FORMULA_PREFIXES and not PHONE_NUMBER.fullmatch(value):
+                    values[i] = "'" + value
+            writer.writerow(values)
+    else:
+        def write(values):
+            buffer.write(json.dumps(dict(zip(names, values)), ensure_ascii=False))
+            buffer.write('\n')
+
+    count = 0
+    for values in rows:
+        write(values)
+        count += 1
+        if count % FLUSH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export(name, columns=None, fmt='csv', queryset=None, date_field=None, date_from=None,
+           date_to=None, chunk_size=CHUNK_SIZE):
+    """
+    Stream a dataset as CSV or NDJSON text blocks. Arguments are checked
+    before the first block, so errors (ValueError) surface before anything
+    is sent.
+    """
+    dataset = DATASETS[name]
+    selected = dataset.select(columns)
+    queryset = dataset.filter(queryset, date_field=date_field, date_from=date_from, date_to=date_to)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}. Use {' or '.join(FORMATS)}")
+    text_columns = [
+        i for i, column in enumerate(selected)
+        if field_of(dataset.model, column.lookup).get_internal_type() in TEXT_TYPES
+    ]
+    return render(rows(selected, queryset, chunk_size), selected, fmt, text_columns)
+
+
+def filename(name, fmt):
+    return f'{name}-{timezone.localtime():%Y%m%d-%H%M%S}.{FORMATS[fmt][1]}'
+
+
+def streaming_response(name, fmt, blocks):
+    response = StreamingHttpResponse(blocks, content_type=FORMATS[fmt][0])
+    response['Content-Disposition'] = f'attachment; filename="{filename(name, fmt)}"'
+    return response
+
+
+class ExportActionMixin:
+    """
+    ModelAdmin mixin adding an "Export selected" action. It first shows a
+    form for the format, columns and date range, then streams the selected
+    rows (or every filtered row, with "select all") as a download.
+    """
+
+    export_dataset = None  # a DATASETS key
+
+    def export_selected(self, request, queryset):
+        dataset = DATASETS[self.export_dataset]
+        if 'export' in request.POST:
+            try:
+                blocks = export(
+                    dataset.name,
+                    columns=request.POST.getlist('columns'),
+                    fmt=request.POST.get('format', 'csv'),
+                    queryset=queryset,
+                    date_field=request.POST.get('date_field') or None,
+                    date_from=parse_date(request.POST.get('date_from')),
+                    date_to=parse_date(request.POST.get('date_to')),
+                )
+            except ValueError as error:
+                self.message_user(request, str(error), messages.ERROR)
+            else:
+                return streaming_response(dataset.name, request.POST.get('format', 'csv'), blocks)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f'Export {self.model._meta.verbose_name_plural}',
+            'opts': self.model._meta,
+            'dataset': dataset,
+            'columns': [(name, name in dataset.default_columns()) for name in dataset.columns],
+            'formats': list(FORMATS),
+            'select_across': request.POST.get('select_across') == '1',
+            'selected': request.POST.getlist(admin.helpers.ACTION_CHECKBOX_NAME),
+            'count': queryset.count() if request.POST.get('select_across') != '1' else None,
+            'action_checkbox_name': admin.helpers.ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, 'admin/export_form.html', context)
+    export_selected.short_description = 'Export selected (CSV / NDJSON)'
+
+
+def parse_date(value):
+    """Date from YYYY-MM-DD, None when empty; ValueError otherwise"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid date: {value}. Expected format: YYYY-MM-DD')
@@ -0,0 +1,69 @@
+"""
+Facet counts for the services sidebar
+
+For the current keyword, one grouped query counts the matching active
+services per (category, subcategory) pair. Category and subcategory counts
+are then derived in Python, each applying the *other* facet's selection
+(the usual disjunctive faceting: ticking a category doesn't zero out the
+remaining categories). The grouped rows are cached per keyword under the
+catalog version, so they refresh as soon as a service changes, and kept
+in each process (core.caching.VersionedCache).
+
+Usage:
+    facets = service_facets(keyword, selected_categories, selected_subcategories)
+    facets['categories'].get(category.slug, 0)
+"""
+from django.conf import settings
+from django.db.models import Count
+
+from services.models import Service
+from .caching import catalog_version, versioned_cache
+from .pagination import filter_cache_key
+from . import search
+
+
+FACET_CACHE_TIMEOUT = getattr(settings, 'SERVICES_FACET_CACHE_TIMEOUT', 60 * 15)
+
+
+def facet_rows(keyword=''):
+    """[(category_slug, subcategory_slug, count), ...] for active services matching ``keyword``"""
+    cache_key = filter_cache_key(f'service_facets:{catalog_version.get()}', keyword=keyword)
+    rows = versioned_cache.get(cache_key, FACET_CACHE_TIMEOUT)
+    if rows is None:
+        services_qs = Service.objects.filter(is_active=True)
+        if keyword:
+            services_qs = search.get_backend().search(services_qs, keyword, ranked=False)
+        rows = list(
+            services_qs.order_by().values_list(
+                'category__slug', 'subcategory__slug'
+            ).annotate(count=Count('pk'))
+        )
+        versioned_cache.set(cache_key, rows, FACET_CACHE_TIMEOUT)
+    return rows
+
+
+def service_facets(keyword='', categories=(), subcategories=()):
+    """
+    Matching service counts keyed by slug:
+    {'categories': {slug: count}, 'subcategories': {slug: count}}
+    """
+    selected_categories = set(categories) - {'all'}
+    selected_subcategories = set(subcategories) - {'all'}
+
+    category_counts = {}
+    subcategory_counts = {}
+    for category_slug, subcategory_slug, count in facet_rows(keyword):
+        if not selected_subcategories or subcategory_slug in selected_subcategories:
+            category_counts[category_slug] = category_counts.get(category_slug, 0) + count
+        if subcategory_slug and (not selected_categories or category_slug in selected_categories):
+            subcategory_counts[subcategory_slug] = subcategory_counts.get(subcategory_slug, 0) + count
+
+    return {'categories': category_counts, 'subcategories': subcategory_counts}
+
+
+def attach_counts(objects, counts):
+    """Set ``facet_count`` on each category/subcategory so templates need no lookups"""
+    objects = list(objects)
+    for obj in objects:
+        obj.facet_count = counts.get(obj.slug, 0)
+    return objects
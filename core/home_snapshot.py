@@ -0,0 +1,443 @@
+"""
+Materialized home page snapshot
+
+The home page and its HTMX content partial are assembled from a dozen
+independent sections (service lists, featured categories, providers,
+testimonials, blog posts, hero stats). Each section is built once, stored
+in the cache under a versioned key and served from there until a
+post_save/post_delete signal on one of the models it depends on bumps the
+section version (see core.signals).
+
+Section versions are read with the other cache versions, once per request,
+and built sections are kept in each process (core.caching), so a warm home
+page reads a single cache entry.
+
+Hit and miss counts are added up in each process and written to the cache
+at most every HOME_SNAPSHOT_STATS_FLUSH_INTERVAL seconds (and on exit), so
+serving a page writes nothing.
+
+Usage:
+    context = home_snapshot.get_context(home_snapshot.HOME_SECTIONS)
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Count
+
+from . import ratings
+from .caching import CacheVersion, bump_versions, get_versions as get_cache_versions, versioned_cache
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'home_snapshot'
+
+# Built sections expire after a day even if nothing invalidates them, so
+# rows changed through queryset.update() (which sends no signals) heal.
+SNAPSHOT_TIMEOUT = getattr(settings, 'HOME_SNAPSHOT_TIMEOUT', 60 * 60 * 24)
+
+# Seconds between writes of this process's hit/miss counts to the cache
+STATS_FLUSH_INTERVAL = getattr(settings, 'HOME_SNAPSHOT_STATS_FLUSH_INTERVAL', 60)
+
+# Saves that only touch these fields never change what the home page shows
+IGNORED_UPDATE_FIELDS = {
+    'views_count',
+    'whatsapp_sent',
+    'whatsapp_sent_at',
+    'whatsapp_number_used',
+}
+
+SECTIONS = {}
+
+
+class Section:
+    """A named home page section and the models it is built from"""
+
+    def __init__(self, name, builder, depends_on):
+        self.name = name
+        self.builder = builder
+        self.depends_on = tuple(depends_on)
+        self.version = CacheVersion(f'{CACHE_PREFIX}:{name}:version')
+
+    def build(self):
+        return self.builder()
+
+
+def section(name, depends_on):
+    """Register a section builder. The builder returns a dict of context values."""
+    def decorator(func):
+        SECTIONS[name] = Section(name, func, depends_on)
+        return func
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Section builders
+# ---------------------------------------------------------------------------
+
+def _service_list():
+    Service = apps.get_model('services', 'Service')
+    return Service.objects.filter(
+        is_active=True
+    ).select_related('category', 'subcategory', 'provider').prefetch_related('sub_services', 'additional_images')
+
+
+def _categories_with_count():
+    Category = apps.get_model('categories', 'Category')
+    return Category.objects.annotate(service_count=models.F('active_services_count'))
+
+
+SERVICE_LIST_DEPENDENCIES = (
+    'services.Service',
+    'services.SubService',
+    'services.AdditionalImage',
+    'categories.Category',
+    'categories.SubCategory',
+    'providers.Provider',
+    'providers.ProviderReview',  # Service ratings (core.ratings)
+)
+
+
+@section('hero_stats', depends_on=('services.Service', 'providers.Provider', 'bookings.Booking', 'providers.ProviderReview'))
+def build_hero_stats():
+    Service = apps.get_model('services', 'Service')
+    Provider = apps.get_model('providers', 'Provider')
+    Booking = apps.get_model('bookings', 'Booking')
+    return {
+        'total_services': Service.objects.filter(is_active=True).count(),
+        'total_providers': Provider.objects.filter(is_active=True).count(),
+        'total_bookings': Booking.objects.count(),
+        'total_reviews': ratings.site_totals().rating_count,
+    }
+
+
+@section('featured_categories', depends_on=('categories.Category', 'services.Service'))
+def build_featured_categories():
+    return {
+        'featured_categories': list(
+            _categories_with_count().filter(is_featured=True, is_active=True)[:6]
+        ),
+    }
+
+
+@section('latest_categories', depends_on=('categories.Category', 'services.Service'))
+def build_latest_categories():
+    return {
+        'latest_categories': list(
+            _categories_with_count().filter(
+                active_services_count__gt=0,
+                is_active=True
+            ).order_by('-service_count')[:6]
+        ),
+    }
+
+
+@section('all_categories_with_services', depends_on=('categories.Category', 'services.Service'))
+def build_all_categories_with_services():
+    return {
+        'all_categories_with_services': list(
+            _categories_with_count().filter(is_active=True).order_by('-updated_at', '-created_at')[:12]
+        ),
+    }
+
+
+@section('top_rated_services', depends_on=SERVICE_LIST_DEPENDENCIES)
+def build_top_rated_services():
+    return {
+        'top_rated_services': list(
+            _service_list().filter(rating__gte=4.0).order_by('-rating', '-total_reviews')[:8]
+        ),
+    }
+
+
+@section('latest_services', depends_on=SERVICE_LIST_DEPENDENCIES)
+def build_latest_services():
+    return {
+        'latest_services': list(_service_list().order_by('-created_at')[:8]),
+    }
+
+
+@section('popular_services', depends_on=SERVICE_LIST_DEPENDENCIES)
+def build_popular_services():
+    return {
+        'popular_services': list(
+            _service_list().filter(is_popular=True).order_by('-services_provided', '-rating')[:8]
+        ),
+    }
+
+
+@section('featured_services', depends_on=SERVICE_LIST_DEPENDENCIES)
+def build_featured_services():
+    return {
+        'featured_services': list(
+            _service_list().filter(is_featured=True).order_by('order', '-rating')[:8]
+        ),
+    }
+
+
+@section('popular_providers', depends_on=('providers.Provider', 'services.Service', 'providers.ProviderReview'))
+def build_popular_providers():
+    Provider = apps.get_model('providers', 'Provider')
+    return {
+        'popular_providers': list(
+            Provider.objects.filter(
+                is_featured=True,
+                is_active=True
+            ).annotate(
+                service_count=Count('services_provided', filter=models.Q(services_provided__is_active=True))
+            ).order_by('-rating', '-total_reviews')[:4]
+        ),
+    }
+
+
+@section('testimonials', depends_on=('content.Testimonial', 'services.Service'))
+def build_testimonials():
+    Testimonial = apps.get_model('content', 'Testimonial')
+    return {
+        'testimonials': list(
+            Testimonial.objects.filter(
+                is_featured=True,
+                is_active=True
+            ).select_related('service').order_by('order', '-created_at')[:6]
+        ),
+    }
+
+
+@section('blog_posts', depends_on=('content.BlogPost', 'categories.Category'))
+def build_blog_posts():
+    BlogPost = apps.get_model('content', 'BlogPost')
+    return {
+        'blog_posts': list(
+            BlogPost.objects.filter(
+                is_published=True
+            ).select_related('author', 'category').order_by('-published_at', '-created_at')[:3]
+        ),
+    }
+
+
+@section('category_services', depends_on=('categories.Category', 'services.Service', 'providers.Provider', 'providers.ProviderReview'))
+def build_category_services():
+    Service = apps.get_model('services', 'Service')
+    # First category (by created_at) that has at least one active service
+    category_for_services = _categories_with_count().filter(
+        is_active=True
+    ).filter(service_count__gte=1).order_by('-created_at').first()
+
+    category_services = []
+    if category_for_services:
+        category_services = list(
+            Service.objects.filter(
+                category=category_for_services,
+                is_active=True
+            ).select_related('category', 'provider').order_by('-rating', '-created_at')[:6]
+        )
+
+    return {
+        'category_for_services': category_for_services,
+        'category_left_services': category_services[:4],
+        'category_right_services': category_services[4:6],
+    }
+
+
+HOME_SECTIONS = (
+    'hero_stats',
+    'featured_categories',
+    'top_rated_services',
+    'latest_services',
+    'popular_services',
+    'featured_services',
+    'popular_providers',
+    'testimonials',
+    'blog_posts',
+)
+
+HOME_CONTENT_SECTIONS = (
+    'featured_categories',
+    'top_rated_services',
+    'latest_services',
+    'latest_categories',
+    'popular_services',
+    'featured_services',
+    'popular_providers',
+    'testimonials',
+    'blog_posts',
+    'all_categories_with_services',
+    'category_services',
+)
+
+
+# ---------------------------------------------------------------------------
+# Cache access
+# ---------------------------------------------------------------------------
+
+def _version_key(name):
+    return SECTIONS[name].version.key
+
+
+def _data_key(name, version):
+    return f'{CACHE_PREFIX}:{name}:{version}'
+
+
+def _stats_key(stat):
+    return f'{CACHE_PREFIX}:stats:{stat}'
+
+
+def _get_versions(names):
+    """Return the current version token of each section, creating missing ones"""
+    keys = {name: _version_key(name) for name in names}
+    found = get_cache_versions(keys.values())
+    return {name: found[key] for name, key in keys.items()}
+
+
+_pending_stats = Counter()
+_stats_lock = threading.Lock()
+_stats_flushed_at = time.monotonic()
+
+
+def _incr(stat, amount=1):
+    """Count in this process; the counts are written out every STATS_FLUSH_INTERVAL seconds"""
+    global _stats_flushed_at
+    with _stats_lock:
+        _pending_stats[stat] += amount
+        due = time.monotonic() - _stats_flushed_at >= STATS_FLUSH_INTERVAL
+        if due:
+            _stats_flushed_at = time.monotonic()
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    """Add this process's pending hit/miss counts to the totals in the cache"""
+    with _stats_lock:
+        pending = dict(_pending_stats)
+        _pending_stats.clear()
+    for stat, amount in pending.items():
+        key = _stats_key(stat)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, amount, None)
+        # Some backends' incr() (e.g. the database cache) re-sets the default timeout
+        cache.touch(key, None)
+
+
+def _record_rebuild(name, elapsed_ms):
+    key = _stats_key(f'rebuild:{name}')
+    timing = cache.get(key) or {'count': 0, 'total_ms': 0.0, 'last_ms': 0.0}
+    timing['count'] += 1
+    timing['total_ms'] += elapsed_ms
+    timing['last_ms'] = elapsed_ms
+    cache.set(key, timing, None)
+
+
+def rebuild(name, version=None):
+    """Build a single section and store it under its current version"""
+    if version is None:
+        version = _get_versions([name])[name]
+
+    started = time.perf_counter()
+    data = SECTIONS[name].build()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    versioned_cache.set(_data_key(name, version), data, SNAPSHOT_TIMEOUT)
+    _record_rebuild(name, elapsed_ms)
+    return data, elapsed_ms
+
+
+def get_context(names):
+    """
+    Return the merged template context for the given sections.
+    Cached sections are served as-is; missing ones are rebuilt and stored.
+    """
+    versions = _get_versions(names)
+    data_keys = {name: _data_key(name, versions[name]) for name in names}
+    cached = versioned_cache.get_many(data_keys.values(), SNAPSHOT_TIMEOUT)
+
+    context = {}
+    misses = 0
+    for name in names:
+        data = cached.get(data_keys[name])
+        if data is None:
+            misses += 1
+            data, _ = rebuild(name, versions[name])
+        context.update(data)
+
+    if misses:
+        _incr('misses', misses)
+    if len(names) - misses:
+        _incr('hits', len(names) - misses)
+    return context
+
+
+def get_versions(names):
+    """Current version token of each section, e.g. to validate a page built from them"""
+    return _get_versions(names)
+
+
+def invalidate(names=None):
+    """Bump the version of the given sections (all sections by default)"""
+    names = SECTIONS.keys() if names is None else names
+    bump_versions([_version_key(name) for name in names])
+
+
+def sections_for_model(model):
+    """Names of the sections built from the given model class"""
+    label = model._meta.label
+    return [name for name, sect in SECTIONS.items() if label in sect.depends_on]
+
+
+def tracked_models():
+    """Model labels that any section depends on"""
+    return sorted({label for sect in SECTIONS.values() for label in sect.depends_on})
+
+
+def invalidate_for_instance(sender, update_fields=None):
+    """Invalidate every section built from ``sender`` once the transaction commits"""
+    if update_fields and set(update_fields) <= IGNORED_UPDATE_FIELDS:
+        return
+    names = sections_for_model(sender)
+    if names:
+        transaction.on_commit(lambda: invalidate(names))
+
+
+def get_stats():
+    """Return hit/miss counters (this process's counts included) and per-section rebuild timings"""
+    flush_stats()
+    keys = [_stats_key('hits'), _stats_key('misses')]
+    keys += [_stats_key(f'rebuild:{name}') for name in SECTIONS]
+    found = cache.get_many(keys)
+    return {
+        'hits': found.get(_stats_key('hits'), 0),
+        'misses': found.get(_stats_key('misses'), 0),
+        'rebuilds': {
+            name: found[_stats_key(f'rebuild:{name}')]
+            for name in SECTIONS
+            if _stats_key(f'rebuild:{name}') in found
+        },
+    }
+
+
+def reset_stats():
+    with _stats_lock:
+        _pending_stats.clear()
+    cache.delete_many(
+        [_stats_key('hits'), _stats_key('misses')]
+        + [_stats_key(f'rebuild:{name}') for name in SECTIONS]
+    )
+
+
+@atexit.register
+def _flush_stats_at_exit():
+    try:
+        flush_stats()
+    except Exception:
+        logger.exception('Error flushing home snapshot stats')
@@ -0,0 +1,148 @@
+"""
+Background ImageKit spec generation
+
+ImageSpecFields (image_card, image_detail, logo_thumbnail, ...) are
+generated by PoolBackend outside the request that first needs them:
+
+- when a source image is saved, ImageKit's source_saved signal asks the
+  backend for every spec of that source, and each one is submitted to a
+  pool;
+- when a template asks for a spec that doesn't exist yet, it is scheduled
+  the same way and ``{% if obj.image_card %}`` is false until it is ready,
+  so the template's placeholder is shown instead of blocking on Pillow.
+
+By default the pool is a single background thread per process: Pillow
+releases the GIL while it decodes, resizes and encodes, so this keeps the
+work off the request without extra processes. IMAGEKIT_POOL_WORKERS
+switches to a process pool instead; each process that uses it starts its
+own workers, and each worker imports all of Django, so in every web worker
+it costs that many extra processes.
+``python manage.py pregenerate_images`` generates every spec of the whole
+media library in its own pool (run it after deploys and bulk imports), so
+requests rarely have to queue any.
+
+A spec is recorded as generating while it is queued. That state expires
+after IMAGEKIT_GENERATING_TIMEOUT (IMAGEKIT_CACHE_TIMEOUT, used for the
+other states, is None), so a spec whose worker died is queued again.
+
+Settings:
+    IMAGEKIT_POOL_WORKERS        worker processes per process that generates specs
+                                 (default 0: one background thread instead)
+    IMAGEKIT_GENERATING_TIMEOUT  seconds a queued spec stays 'generating' (default 300)
+"""
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from imagekit.cachefiles.backends import BaseAsync, CacheFileState
+from imagekit.exceptions import MissingSource
+
+
+logger = logging.getLogger(__name__)
+
+POOL_WORKERS = getattr(settings, 'IMAGEKIT_POOL_WORKERS', 0)
+GENERATING_TIMEOUT = getattr(settings, 'IMAGEKIT_GENERATING_TIMEOUT', 60 * 5)
+
+
+def init_worker():
+    """Process pool initializer: the pool uses spawn, so Django has to be set up in each worker"""
+    import django
+    django.setup()
+
+
+def create_pool(workers):
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+    )
+
+
+def generate_file(file, force=False):
+    """
+    Generate one spec file (runs in a pool worker). Returns (name, status)
+    with status 'generated', 'exists' or 'missing source'.
+    """
+    try:
+        if not force and file.storage.exists(file.name):
+            file.cachefile_backend.set_state(file, CacheFileState.EXISTS)
+            return file.name, 'exists'
+        file.cachefile_backend.generate_now(file, force=True)
+    except MissingSource:
+        return file.name, 'missing source'
+    return file.name, 'generated'
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """This process's pool: IMAGEKIT_POOL_WORKERS processes, or one background thread"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if POOL_WORKERS:
+                _pool = create_pool(POOL_WORKERS)
+            else:
+                _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='imagekit')
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+class PoolBackend(BaseAsync):
+    """
+    ImageKit cache file backend that generates files in the pool (see
+    get_pool). The state cache records files as 'generating' while queued,
+    for up to GENERATING_TIMEOUT, so each file is only submitted once.
+    """
+
+    def generate(self, file, force=False):
+        if force or self.get_state(file) == CacheFileState.DOES_NOT_EXIST:
+            self.schedule_generation(file, force=force)
+
+    def set_state(self, file, state):
+        if state == CacheFileState.GENERATING:
+            self.cache.set(self.get_key(file), state, GENERATING_TIMEOUT)
+        else:
+            super().set_state(file, state)
+
+    def schedule_generation(self, file, force=False):
+        self.set_state(file, CacheFileState.GENERATING)
+        future = get_pool().submit(generate_file, file, force)
+        future.add_done_callback(lambda future: self.generation_done(file, future))
+
+    def generation_done(self, file, future):
+        try:
+            name, status = future.result()
+        except Exception:
+            logger.exception('Image spec generation failed', extra={'file': file.name})
+            status = 'failed'
+        self.set_state(
+            file,
+            CacheFileState.DOES_NOT_EXIST if status in ('failed', 'missing source') else CacheFileState.EXISTS,
+        )
+
+
+class BackgroundStrategy:
+    """
+    ImageKit cache file strategy: generate specs when the source is saved
+    and, as a fallback, when a missing spec is first asked for. Both go
+    through the backend's pool, so neither blocks the caller.
+    """
+
+    def on_source_saved(self, file):
+        file.generate()
+
+    def on_existence_required(self, file):
+        file.generate()
+
+    def on_content_required(self, file):
+        # The caller is about to read the image, so it can't wait for the pool
+        file.cachefile_backend.generate_now(file)
+
+    def should_verify_existence(self, file):
+        return True
@@ -0,0 +1,173 @@
+"""
+Structured logging: JSON records, a non-blocking queue handler, per-logger
+sampling and PII redaction
+
+Wired up in settings.LOGGING. Application code just logs with the standard
+library and passes structured fields through ``extra``:
+
+    logger = logging.getLogger(__name__)
+    logger.info('Booking created', extra={'booking_reference': booking.booking_reference})
+
+Request threads only put records on an in-memory queue (QueueHandler); a
+QueueListener thread formats and writes them. Listeners are started from
+CoreConfig.ready and drained at exit.
+
+Emails and phone numbers are redacted from messages and ``extra`` values
+when records are formatted, and fields that always hold personal data
+(REDACTED_FIELDS) are masked whatever they contain.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import threading
+import weakref
+from datetime import datetime, timezone
+
+
+EMAIL_RE = re.compile(r'([A-Za-z0-9._%+-])[A-Za-z0-9._%+-]*@([A-Za-z0-9.-]+\.[A-Za-z]{2,})')
+# +international (any separators), 0-led local (spaces/dots only) or 9-15 bare
+# digits. Dash-joined digit groups (dates, BK-/SR- references) are left alone.
+PHONE_RE = re.compile(
+    r'\+\d(?:[\s().-]{0,2}\d){6,14}'
+    r'|(?<![\w-])0\d(?:[\s.]?\d){7,11}(?![\w-])'
+    r'|(?<![\w-])\d{9,15}(?![\w-])'
+)
+
+REDACTED_FIELDS = {
+    'email', 'customer_email', 'phone', 'customer_phone',
+    'first_name', 'last_name', 'customer_first_name', 'customer_last_name', 'customer_name',
+    'location_address', 'collection_address', 'delivery_address', 'address',
+}
+REDACTED = '[redacted]'
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+def _mask_phone(match):
+    digits = re.sub(r'\D', '', match.group())
+    return f'***{digits[-3:]}'
+
+
+def redact(value):
+    """Mask emails (keeping the first letter and domain) and phone numbers (keeping the last 3 digits)"""
+    if isinstance(value, str):
+        return PHONE_RE.sub(_mask_phone, EMAIL_RE.sub(r'\1***@\2', value))
+    if isinstance(value, dict):
+        return {key: redact_field(key, item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [redact(item) for item in value]
+    return value
+
+
+def redact_field(name, value):
+    if name in REDACTED_FIELDS and value not in (None, ''):
+        return REDACTED
+    return redact(value)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, the ``extra`` fields and any exception"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': redact(record.getMessage()),
+        }
+        for name, value in vars(record).items():
+            if name not in RECORD_ATTRS and not name.startswith('_'):
+                entry[name] = redact_field(name, value)
+        if record.exc_info:
+            entry['exc'] = redact(self.formatException(record.exc_info))
+        elif record.exc_text:
+            entry['exc'] = redact(record.exc_text)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the records below WARNING for the given loggers:
+    {'core.views': 0.1} keeps one in ten INFO/DEBUG records from core.views
+    (and its children). Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        # Longest prefix first so 'core.views' wins over 'core'
+        self.rates = sorted((rates or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def rate_for(self, name):
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + '.'):
+                return rate
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller: when the (bounded) queue is
+    full the record is dropped and counted in ``dropped``.
+    """
+
+    instances = weakref.WeakSet()
+
+    def __init__(self, record_queue, *args, **kwargs):
+        super().__init__(record_queue, *args, **kwargs)
+        self.dropped = 0
+        QueueHandler.instances.add(self)
+
+    def prepare(self, record):
+        # Merge the args into the message but, unlike the stock handler, keep
+        # the traceback out of it so JSONFormatter can put it in its own field
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listeners_lock = threading.Lock()
+_started_listeners = []
+
+
+def start_queue_listeners():
+    """Start the listener of every configured QueueHandler (logging.config leaves them stopped)"""
+    with _listeners_lock:
+        for handler in list(QueueHandler.instances):
+            listener = getattr(handler, 'listener', None)
+            if listener is None or listener in _started_listeners:
+                continue
+            listener.start()
+            _started_listeners.append(listener)
+
+
+def stop_queue_listeners():
+    """Drain the queues and stop the listener threads"""
+    with _listeners_lock:
+        while _started_listeners:
+            _started_listeners.pop().stop()
+
+
+# Runs before logging's own shutdown (atexit is LIFO), so queued records are written out
+atexit.register(stop_queue_listeners)
@@ -0,0 +1,68 @@
+"""
+Management command to EXPLAIN the registered hot queries and flag full table scans
+
+Run it in CI (or after changing models/views); it exits with an error when a
+hot query scans a whole table. Plans depend on the database backend and, on
+PostgreSQL, on table statistics, so audit against realistic data there.
+
+Examples:
+    python manage.py audit_query_plans
+    python manage.py audit_query_plans --verbose --query "home featured"
+"""
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.query_plans import HOT_QUERIES
+
+
+# SQLite: "SCAN services" (but not "SCAN services USING INDEX ..."); PostgreSQL: "Seq Scan on services"
+FULL_SCAN_PATTERNS = [
+    re.compile(r'\bSCAN (?P<table>\w+)(?! USING| VIRTUAL)\s*$'),
+    re.compile(r'\bSeq Scan on (?P<table>\w+)'),
+]
+SORT_PATTERNS = [
+    re.compile(r'USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY'),
+    re.compile(r'\bSort Key:'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the registered hot queries and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', help='Only audit queries whose name contains this text')
+        parser.add_argument('--verbose', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        flagged = []
+        for name, hot_query in HOT_QUERIES.items():
+            if options['query'] and options['query'].lower() not in name.lower():
+                continue
+
+            plan = hot_query.build().explain()
+            lines = plan.splitlines()
+            scans = {
+                match.group('table')
+                for line in lines
+                for pattern in FULL_SCAN_PATTERNS
+                for match in [pattern.search(line)]
+                if match
+            } - hot_query.allow_scans
+            sorts = any(pattern.search(line) for line in lines for pattern in SORT_PATTERNS)
+
+            if scans:
+                flagged.append(name)
+                self.stdout.write(self.style.ERROR(f'✗ {name}: full scan of {", ".join(sorted(scans))}'))
+            elif sorts:
+                self.stdout.write(self.style.WARNING(f'✓ {name} (sorts in a temp b-tree)'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}'))
+
+            if scans or options['verbose']:
+                for line in lines:
+                    self.stdout.write(f'    {line}')
+
+        if flagged:
+            raise CommandError(f'{len(flagged)} hot query(s) scan a whole table')
+        self.stdout.write(self.style.SUCCESS('✓ No full table scans'))
@@ -0,0 +1,181 @@
+"""
+Management command to measure the slot index (bookings.availability) at scale
+
+Creates --providers providers with one service each, business hours six
+days a week and --bookings confirmed bookings per provider over the
+horizon, inside a rolled-back transaction. Then measures:
+
+    - building every provider's index (cold cache)
+    - "is slot free" and "next N free slots" against the cached index,
+      next to the same answers from a bookings query per check
+    - the availability endpoint
+
+Each calendar keeps two keys in the shared cache (a version and an index).
+If the cache holds fewer entries than that (CACHES MAX_ENTRIES; a
+LocMemCache keeps 300 by default), culling evicts them and "cached"
+lookups start rebuilding; the command warns when that happens.
+
+Examples:
+    python manage.py benchmark_availability
+    python manage.py benchmark_availability --providers 5000 --bookings 100
+"""
+import random
+import statistics
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from bookings import availability
+from bookings.models import Booking
+from core.benchmark_data import rolled_back, seed_bookings, seed_categories, seed_providers
+from services.models import BusinessHours, Service
+
+
+class Command(BaseCommand):
+    help = 'Benchmark building and querying the booking slot indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--providers', type=int, default=2000)
+        parser.add_argument('--bookings', type=int, default=40, help='Confirmed bookings per provider (default: 40)')
+        parser.add_argument('--checks', type=int, default=2000, help='Random lookups to time (default: 2000)')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            started = time.perf_counter()
+            services = self.seed(options['providers'], options['bookings'])
+            self.stdout.write(self.style.WARNING(
+                f'{len(services)} providers, {Booking.objects.count()} bookings seeded '
+                f'in {time.perf_counter() - started:.1f}s'
+            ))
+            self.run(services, options['checks'])
+        cache.clear()
+
+    def seed(self, provider_count, bookings_per_provider):
+        categories, _ = seed_categories(count=4, subcategories_per_category=0)
+        providers = seed_providers(provider_count)
+        services = Service.objects.bulk_create([
+            Service(
+                category=categories[i % len(categories)],
+                provider=provider,
+                name=f'Bench availability {i}',
+                slug=f'bench-availability-{i}',
+                short_description='Benchmark service',
+                is_active=True,
+            )
+            for i, provider in enumerate(providers)
+        ], batch_size=5000)
+        BusinessHours.objects.bulk_create([
+            BusinessHours(
+                service=service,
+                weekday=weekday,
+                opening_time=dt_time(9),
+                closing_time=dt_time(18),
+                is_closed=weekday == 4,
+            )
+            for service in services
+            for weekday in range(7)
+        ], batch_size=5000)
+
+        seed_bookings(len(services) * bookings_per_provider, services)
+        # Confirmed, on the slot grid, within the horizon
+        rng = random.Random(0)
+        today = availability.now().date()
+        bookings = list(Booking.objects.filter(booking_reference__startswith='BENCH-').only('pk'))
+        for booking in bookings:
+            booking.status = 'confirmed'
+            booking.appointment_date = today + timedelta(days=rng.randrange(availability.HORIZON_DAYS))
+            booking.appointment_time = dt_time(rng.randrange(9, 18), rng.choice([0, 30])).strftime('%I:%M %p')
+        Booking.objects.bulk_update(bookings, ['status', 'appointment_date', 'appointment_time'], batch_size=5000)
+        return list(Service.objects.filter(pk__in=[service.pk for service in services]))
+
+    def run(self, services, checks):
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            indexes = [availability.get_index(service) for service in services]
+            build_s = time.perf_counter() - started
+        slots = sum(len(index.slots) for index in indexes)
+        free = sum(len(index.free) for index in indexes)
+        self.stdout.write(
+            f'build: {len(indexes)} indexes in {build_s:.2f}s ({build_s / len(indexes) * 1000:.2f} ms each, '
+            f'{len(captured) / len(indexes):.0f} queries each), {slots} slots, {free} free'
+        )
+
+        rng = random.Random(1)
+        now = availability.now()
+        samples = []
+        for _ in range(checks):
+            service = rng.choice(services)
+            when = datetime.combine(
+                now.date() + timedelta(days=rng.randrange(availability.HORIZON_DAYS)),
+                dt_time(rng.randrange(9, 18), rng.choice([0, 30])),
+            )
+            samples.append((service, when))
+
+        self.report('is_free, cached index', samples, lambda service, when: availability.get_index(service).is_free(when))
+        self.report('is_free, bookings query', samples, self.is_free_query)
+        self.report('next 5 free, cached index', samples, lambda service, when: availability.get_index(service).next_free(when, 5))
+        self.report('next 5 free, bookings query', samples, lambda service, when: self.next_free_query(service, when, 5))
+        with CaptureQueriesContext(connection) as captured:
+            for service, when in samples:
+                availability.get_index(service)
+        # Reads of a DatabaseCache are queries too; only count the rebuilds
+        rebuilds = [query for query in captured if 'django_cache' not in query['sql']]
+        if rebuilds:
+            self.stdout.write(self.style.WARNING(
+                f'{len(rebuilds)} queries rebuilding evicted indexes: the cache holds fewer than '
+                f'{len(services) * 2} keys (see CACHES)'
+            ))
+
+        client = Client()
+        timings = []
+        for service, when in samples[:200]:
+            started = time.perf_counter()
+            client.get(f'/bookings/availability/{service.pk}/', {'date': when.date().isoformat()})
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(f'{"endpoint (JSON, one day)":<30} {statistics.median(timings):>8.3f} ms median')
+
+    def report(self, label, samples, check):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            for service, when in samples:
+                check(service, when)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(
+            f'{label:<30} {elapsed_ms / len(samples):>8.3f} ms per call, {len(captured) / len(samples):.1f} queries'
+        )
+
+    def is_free_query(self, service, when):
+        """The check without an index: the provider's bookings that day, compared one by one"""
+        times = Booking.objects.filter(
+            Q(provider_id=service.provider_id) | Q(service__provider_id=service.provider_id),
+            status__in=availability.BLOCKING_STATUSES,
+            appointment_date=when.date(),
+        ).values_list('appointment_time', flat=True)
+        at = availability.minutes(when)
+        taken = sum(
+            1 for appointment_time in times
+            if abs(availability.minutes(availability.parse_time(appointment_time)) - at) < availability.SLOT_MINUTES
+        )
+        return taken < availability.CAPACITY
+
+    def next_free_query(self, service, when, count):
+        """Slot by slot from ``when`` with one bookings query per day, until ``count`` are found"""
+        found = []
+        day = when.date()
+        while len(found) < count and (day - when.date()).days < availability.HORIZON_DAYS:
+            hours = BusinessHours.objects.filter(service=service, weekday=day.weekday(), is_closed=False).first()
+            if hours:
+                slot = datetime.combine(day, hours.opening_time)
+                while slot.time() < hours.closing_time and len(found) < count:
+                    if slot >= when and self.is_free_query(service, slot):
+                        found.append(slot)
+                    slot += timedelta(minutes=availability.SLOT_MINUTES)
+            day += timedelta(days=1)
+        return found
@@ -0,0 +1,105 @@
+"""
+Management command to measure bulk booking ingestion throughput
+
+Posts batches to the bulk endpoint (JSON array and NDJSON) and, for
+comparison, the same rows one by one to create_booking. Everything runs in
+a rolled-back transaction.
+
+Example:
+    python manage.py benchmark_bulk_bookings --sizes 1000 10000
+"""
+import contextlib
+import io
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+
+from core.benchmark_data import booking_rows, rolled_back, seed_services, seed_sub_services
+from services.models import Service
+
+
+BENCH_TOKEN = 'benchmark-token'
+
+
+class QueryCounter:
+    """Counts queries without keeping them (CaptureQueriesContext stops at 9000)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the bulk booking endpoint against one create_booking call per row'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument(
+            '--single-limit',
+            type=int,
+            default=1000,
+            help='Rows sent one by one to create_booking for the baseline (default: 1000, 0 to skip)',
+        )
+
+    def handle(self, *args, **options):
+        client = Client()
+        with override_settings(BOOKINGS_BULK_API_TOKENS=[BENCH_TOKEN], BOOKINGS_BULK_MAX_ROWS=max(options['sizes'])):
+            for size in options['sizes']:
+                self.stdout.write(self.style.WARNING(f'\nBatch of {size} bookings'))
+                self.stdout.write(f'{"mode":<22} {"rows":>7} {"queries":>8} {"seconds":>8} {"rows/s":>9}')
+
+                for mode in ('json', 'ndjson'):
+                    with rolled_back():
+                        rows = self.make_rows(size)
+                        self.report(mode, size, *self.post_bulk(client, rows, mode))
+
+                single = min(size, options['single_limit'])
+                if single:
+                    with rolled_back():
+                        rows = self.make_rows(single)
+                        self.report('create_booking x N', single, *self.post_single(client, rows))
+
+    def make_rows(self, count):
+        seed_services(50)
+        services = Service.objects.filter(slug__startswith='bench-service-')
+        return booking_rows(count, seed_sub_services(services))
+
+    def post_bulk(self, client, rows, mode):
+        if mode == 'ndjson':
+            body = '\n'.join(json.dumps(row) for row in rows)
+            content_type = 'application/x-ndjson'
+        else:
+            body = json.dumps(rows)
+            content_type = 'application/json'
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            started = time.perf_counter()
+            response = client.post(
+                '/bookings/bulk/?notify=true',
+                body,
+                content_type=content_type,
+                HTTP_AUTHORIZATION=f'Bearer {BENCH_TOKEN}',
+            )
+            elapsed = time.perf_counter() - started
+        data = response.json()
+        if data.get('created') != len(rows):
+            self.stdout.write(self.style.ERROR(f'  {mode}: {data.get("failed")} rows failed: {data.get("results", [])[:3]}'))
+        return queries.count, elapsed
+
+    def post_single(self, client, rows):
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries), contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            for row in rows:
+                client.post('/bookings/create/', json.dumps(row), content_type='application/json')
+            elapsed = time.perf_counter() - started
+        return queries.count, elapsed
+
+    def report(self, mode, rows, queries, elapsed):
+        self.stdout.write(f'{mode:<22} {rows:>7} {queries:>8} {elapsed:>8.2f} {rows / elapsed:>9.0f}')
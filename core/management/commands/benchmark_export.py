@@ -0,0 +1,122 @@
+"""
+Management command to show that bookings exports stream in constant memory
+
+Bookings are seeded in steps up to the largest size (inside a rolled-back
+transaction). At each size every booking is exported as CSV and as NDJSON
+into a sink that only counts the text (rows per second), then the CSV
+export is downloaded again through the admin "Export selected" action
+with "select all", with tracemalloc on, for its peak memory. Building the
+same CSV from a list of every row, as a one-shot export would, is
+measured up to --legacy-limit rows for comparison.
+
+Examples:
+    python manage.py benchmark_export
+    python manage.py benchmark_export --sizes 100000 1000000 --legacy-limit 0
+"""
+import csv
+import io
+import time
+import tracemalloc
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from bookings.models import Booking
+from core import exports
+from core.benchmark_data import rolled_back, seed_bookings, seed_services
+from services.models import Service
+
+
+class Command(BaseCommand):
+    help = 'Benchmark streaming CSV/NDJSON exports of growing numbers of bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+        parser.add_argument(
+            '--legacy-limit',
+            type=int,
+            default=100000,
+            help='Largest table size to build the whole CSV in memory at (default: 100000, 0 to skip)',
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+        with rolled_back():
+            services = list(Service.objects.filter(is_active=True)[:50])
+            if not services:
+                seed_services(50)
+                services = list(Service.objects.all()[:50])
+            staff = get_user_model().objects.create(
+                username='bench-export', is_staff=True, is_superuser=True
+            )
+            client = Client()
+            client.force_login(staff)
+
+            self.stdout.write(f'{"bookings":>9} {"export":<30} {"seconds":>8} {"rows/s":>9} {"MB out":>7} {"peak MB":>8}')
+            seeded = 0
+            for size in sizes:
+                started = time.perf_counter()
+                seed_bookings(size - seeded, services, start=seeded)
+                seeded = size
+                self.stdout.write(self.style.WARNING(
+                    f'{size:>9} bookings seeded in {time.perf_counter() - started:.1f}s'
+                ))
+                self.run(size, client, options)
+
+    def run(self, size, client, options):
+        rows = Booking.objects.count()
+        for fmt in exports.FORMATS:
+            started = time.perf_counter()
+            written = self.drain(exports.export('bookings', fmt=fmt))
+            self.report(size, f'{fmt}, streamed', time.perf_counter() - started, rows, written)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = client.post('/admin/bookings/booking/', {
+            'action': 'export_selected',
+            'select_across': '1',
+            ACTION_CHECKBOX_NAME: [Booking.objects.values_list('pk', flat=True).first()],
+            'format': 'csv',
+            'export': 'Export',
+        })
+        written = self.drain(response.streaming_content) if response.streaming else 0
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if not response.streaming:
+            self.stderr.write(f'The export action returned {response.status_code} without a download')
+        self.report(size, 'csv, admin action (traced)', elapsed, rows, written, peak)
+
+        if size <= options['legacy_limit']:
+            tracemalloc.start()
+            started = time.perf_counter()
+            written = len(self.whole_csv())
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.report(size, 'csv, built in memory (traced)', elapsed, rows, written, peak)
+
+    def drain(self, blocks):
+        written = 0
+        for block in blocks:
+            written += len(block)
+        return written
+
+    def whole_csv(self):
+        dataset = exports.DATASETS['bookings']
+        columns = dataset.select()
+        values = list(exports.rows(columns, dataset.filter()))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column.name for column in columns])
+        writer.writerows(values)
+        return buffer.getvalue()
+
+    def report(self, size, label, elapsed, rows, written, peak=None):
+        peak_mb = f'{peak / 1024 / 1024:.1f}' if peak is not None else ''
+        self.stdout.write(
+            f'{size:>9} {label:<30} {elapsed:>8.1f} {rows / max(elapsed, 1e-9):>9,.0f} '
+            f'{written / 1e6:>7.1f} {peak_mb:>8}'
+        )
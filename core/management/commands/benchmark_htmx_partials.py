@@ -0,0 +1,83 @@
+"""
+Management command to compare HTMX partial endpoints with and without the partials engine
+
+Each endpoint is requested with HX-Request: true, first through the full
+template engine (every context processor, as before core.partials) and
+then through the 'partials' engine. Both are measured with empty caches
+(cold: the context processor caches are filled on the first request) and
+with warm caches, reporting the median time and the queries per request.
+
+Examples:
+    python manage.py benchmark_htmx_partials
+    python manage.py benchmark_htmx_partials /filter-latest-services/ --iterations 50
+"""
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from core import partials
+
+
+# (method, path, POST data)
+DEFAULT_ENDPOINTS = [
+    ('get', '/home-content/', None),
+    ('get', '/services/?page=2', None),
+    ('post', '/search-categories/', {'category-search': ''}),
+    ('post', '/search-subcategories/', {'subcategory-search': ''}),
+    ('get', '/filter-preferred-services/', None),
+    ('get', '/filter-latest-services/', None),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare HTMX partial endpoints rendered with the full and the partials template engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', help='GET URL paths to request (default: the HTMX partial endpoints)')
+        parser.add_argument('--iterations', type=int, default=20, help='Warm requests per measurement (default: 20)')
+
+    def handle(self, *args, **options):
+        endpoints = [('get', url, None) for url in options['urls']] or DEFAULT_ENDPOINTS
+        iterations = max(options['iterations'], 1)
+        client = Client(HTTP_HX_REQUEST='true')
+        original = partials.PARTIAL_ENGINE
+        engine = original or 'partials'
+
+        self.stdout.write(
+            f'{"endpoint":<30} {"full cold":>14} {"fast cold":>14} {"full warm":>14} {"fast warm":>14} {"speedup":>8}'
+        )
+        try:
+            for method, url, data in endpoints:
+                results = {}
+                for label, using in (('full', ''), ('fast', engine)):
+                    partials.PARTIAL_ENGINE = using
+                    cache.clear()
+                    cold = self.measure(client, method, url, data)
+                    warm = [self.measure(client, method, url, data) for _ in range(iterations)]
+                    results[label] = cold, {
+                        'ms': statistics.median(run['ms'] for run in warm),
+                        'queries': warm[-1]['queries'],
+                    }
+
+                columns = [results[label][i] for i in (0, 1) for label in ('full', 'fast')]
+                self.stdout.write(
+                    f'{url:<30} ' + ' '.join(f'{run["ms"]:>7.1f}ms {run["queries"]:>3}q' for run in columns)
+                    + f' {results["full"][1]["ms"] / results["fast"][1]["ms"]:>7.2f}x'
+                )
+        finally:
+            partials.PARTIAL_ENGINE = original
+            cache.clear()
+
+    def measure(self, client, method, url, data):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data) if data is not None else getattr(client, method)(url)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            self.stderr.write(f'{url} returned {response.status_code}')
+        return {'ms': elapsed_ms, 'queries': len(captured)}
@@ -0,0 +1,116 @@
+"""
+Management command to show that my_bookings costs the same at any table size
+
+Bookings are seeded in steps up to the largest size (inside a rolled-back
+transaction). At each size the listing is requested as staff (first page
+and a page deep in the table), as an anonymous customer looking up their
+email and phone, and for the customer with the longest history with
+status and date filters. The old implementation, which loaded every
+booking, is timed up to --legacy-limit rows.
+
+Examples:
+    python manage.py benchmark_my_bookings
+    python manage.py benchmark_my_bookings --sizes 10000 100000 1000000 --iterations 10
+"""
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from bookings.models import Booking
+from core.benchmark_data import customer_identity, rolled_back, seed_bookings, seed_services
+from core.pagination import CursorPaginator
+from services.models import Service
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the my_bookings listing with growing numbers of bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+        parser.add_argument('--iterations', type=int, default=10, help='Requests per measurement (default: 10)')
+        parser.add_argument(
+            '--legacy-limit',
+            type=int,
+            default=100000,
+            help='Largest table size to time the old load-everything listing at (default: 100000, 0 to skip)',
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+        with rolled_back():
+            services = list(Service.objects.filter(is_active=True)[:50])
+            if not services:
+                seed_services(50)
+                services = list(Service.objects.all()[:50])
+            staff = get_user_model().objects.create(username='bench-my-bookings', is_staff=True)
+            staff_client, client = Client(), Client()
+            staff_client.force_login(staff)
+
+            self.stdout.write(f'{"bookings":>9} {"listing":<30} {"ms":>8} {"queries":>8} {"rows":>5}')
+            seeded = 0
+            for size in sizes:
+                started = time.perf_counter()
+                seed_bookings(size - seeded, services, customers=max(sizes) // 10, start=seeded)
+                seeded = size
+                self.stdout.write(self.style.WARNING(
+                    f'{size:>9} bookings seeded in {time.perf_counter() - started:.1f}s'
+                ))
+                self.run(size, staff_client, client, options)
+
+    def run(self, size, staff_client, client, options):
+        email, phone = customer_identity(1)
+        heavy_email, heavy_phone = customer_identity(0)
+        middle = Booking.objects.filter(booking_reference=f'BENCH-0-{size // 2}').first()
+        deep_cursor = CursorPaginator(Booking.objects.all(), 20, sort='newest').encode_cursor(middle)
+
+        listings = [
+            ('staff, first page', staff_client, {}),
+            ('staff, page at the middle', staff_client, {'cursor': deep_cursor}),
+            ('customer lookup', client, {'email': email, 'phone': phone}),
+            ('long history, filtered', client, {
+                'email': heavy_email, 'phone': heavy_phone,
+                'status': ['confirmed', 'completed'], 'date_from': '2026-03-01', 'date_to': '2026-09-30',
+            }),
+        ]
+        for label, http, params in listings:
+            runs = [self.measure(http, params) for _ in range(max(options['iterations'], 1))]
+            self.stdout.write(
+                f'{size:>9} {label:<30} {statistics.median(run["ms"] for run in runs):>8.1f} '
+                f'{runs[-1]["queries"]:>8} {runs[-1]["rows"]:>5}'
+            )
+
+        if size <= options['legacy_limit']:
+            started = time.perf_counter()
+            rows = len(self.legacy_listing())
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            tracemalloc.start()
+            self.legacy_listing()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.stdout.write(
+                f'{size:>9} {"old: all bookings (no render)":<30} {elapsed_ms:>8.1f} {"":>8} {rows:>5}'
+                f'  peak {peak / 1024 / 1024:,.0f} MB'
+            )
+
+    def legacy_listing(self):
+        return list(
+            Booking.objects.all().select_related('service', 'provider', 'service__category')
+            .prefetch_related('sub_services')
+        )
+
+    def measure(self, http, params):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = http.get('/bookings/my-bookings/', params)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            self.stderr.write(f'my_bookings returned {response.status_code}')
+        # Table rows, less the header
+        rows = max(response.content.count(b'<tr>') - 1, 0)
+        return {'ms': elapsed_ms, 'queries': len(captured), 'rows': rows}
@@ -0,0 +1,159 @@
+"""
+Management command to measure nearest-provider search (providers.geo) and
+the pending booking matcher (bookings.matching)
+
+Creates --providers providers spread over Dubai, each offering
+--services-per-provider of --services services, inside a rolled-back
+transaction. Then times, for random points and services:
+
+    - the 10 nearest providers, and the 10 nearest offering a service
+    - every provider offering a service within 5 km
+
+through the geo_cell index, next to a scan of every candidate provider
+sorted by distance (checking both give the same answer), and finally
+match_pending() over --bookings pending bookings.
+
+Examples:
+    python manage.py benchmark_nearby_providers
+    python manage.py benchmark_nearby_providers --providers 200000 --checks 500
+"""
+import random
+import statistics
+import time
+from datetime import time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bookings import matching
+from bookings.models import Booking
+from core.benchmark_data import rolled_back, seed_bookings, seed_categories, seed_providers, seed_services
+from providers import geo
+from providers.models import Provider
+from services.models import BusinessHours, Service
+
+
+class Command(BaseCommand):
+    help = 'Benchmark nearest-provider search and the pending booking matcher'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--providers', type=int, default=50000)
+        parser.add_argument('--services', type=int, default=200)
+        parser.add_argument('--services-per-provider', type=int, default=3)
+        parser.add_argument('--checks', type=int, default=200, help='Random searches to time (default: 200)')
+        parser.add_argument('--bookings', type=int, default=2000, help='Pending bookings to match (default: 2000)')
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            started = time.perf_counter()
+            services = self.seed(options['providers'], options['services'], options['services_per_provider'])
+            self.stdout.write(self.style.WARNING(
+                f'{options["providers"]} providers, {len(services)} services seeded '
+                f'in {time.perf_counter() - started:.1f}s'
+            ))
+            self.searches(services, options['checks'])
+            self.matcher(services, options['bookings'])
+
+    def seed(self, provider_count, service_count, per_provider):
+        categories, subcategories = seed_categories(count=4, subcategories_per_category=0)
+        seed_services(service_count, categories, subcategories)
+        services = list(Service.objects.filter(slug__startswith='bench-service-', is_active=True))
+        providers = seed_providers(provider_count)
+
+        rng = random.Random(0)
+        Offering = Provider.services.through
+        rows = [
+            Offering(provider_id=provider.pk, service_id=service.pk)
+            for provider in providers
+            for service in rng.sample(services, min(per_provider, len(services)))
+        ]
+        Offering.objects.bulk_create(rows, batch_size=5000)
+        BusinessHours.objects.bulk_create([
+            BusinessHours(service=service, weekday=weekday, opening_time=dt_time(8), closing_time=dt_time(20))
+            for service in services
+            for weekday in range(7)
+        ], batch_size=5000)
+        return list(Service.objects.filter(pk__in=[service.pk for service in services]))
+
+    def searches(self, services, checks):
+        rng = random.Random(1)
+        samples = [
+            (rng.uniform(24.9, 25.4), rng.uniform(55.0, 55.6), rng.choice(services))
+            for _ in range(checks)
+        ]
+        cases = [
+            ('10 nearest, any service', lambda lat, lng, service: geo.nearest(lat, lng, 10),
+             lambda lat, lng, service: self.scan(lat, lng, geo.RADIUS_KM, None)[:10]),
+            ('10 nearest offering service', lambda lat, lng, service: geo.nearest(lat, lng, 10, service=service),
+             lambda lat, lng, service: self.scan(lat, lng, geo.RADIUS_KM, service)[:10]),
+            ('all offering service, 5 km', lambda lat, lng, service: geo.search(lat, lng, 5, service=service),
+             lambda lat, lng, service: self.scan(lat, lng, 5, service)),
+        ]
+        self.stdout.write(f'{"search":<30} {"index ms":>9} {"scan ms":>9} {"queries":>8} {"found":>6}')
+        for label, indexed, scanned in cases:
+            index_ms, queries, index_results = self.measure(samples, indexed)
+            scan_ms, _, scan_results = self.measure(samples, scanned)
+            mismatches = sum(
+                [pk for _, pk in a] != [pk for _, pk in b] for a, b in zip(index_results, scan_results)
+            )
+            found = statistics.mean(len(result) for result in index_results)
+            self.stdout.write(
+                f'{label:<30} {index_ms:>9.2f} {scan_ms:>9.2f} {queries:>8.1f} {found:>6.1f}'
+                + (self.style.ERROR(f'  {mismatches} results differ') if mismatches else '')
+            )
+
+    def measure(self, samples, search):
+        timings, results = [], []
+        with CaptureQueriesContext(connection) as captured:
+            for lat, lng, service in samples:
+                started = time.perf_counter()
+                results.append(search(lat, lng, service))
+                timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), len(captured) / len(samples), results
+
+    def scan(self, lat, lng, radius_km, service):
+        """Without the index: every candidate's distance, sorted"""
+        found = []
+        rows = geo.candidates(service).order_by().values_list(
+            'pk', Cast('latitude', FloatField()), Cast('longitude', FloatField())
+        )
+        for pk, provider_lat, provider_lng in rows:
+            distance = geo.distance_km(lat, lng, provider_lat, provider_lng)
+            if distance <= radius_km:
+                found.append((distance, pk))
+        found.sort()
+        return found
+
+    def matcher(self, services, count):
+        seed_bookings(count, services)
+        rng = random.Random(2)
+        today = timezone.localdate()
+        bookings = list(Booking.objects.filter(booking_reference__startswith='BENCH-').only('pk'))
+        for booking in bookings:
+            booking.status = 'pending'
+            booking.provider_id = None
+            booking.appointment_date = today + timedelta(days=rng.randrange(1, 30))
+            booking.appointment_time = dt_time(rng.randrange(8, 20), rng.choice([0, 30])).strftime('%I:%M %p')
+        Booking.objects.bulk_update(bookings, ['status', 'provider', 'appointment_date', 'appointment_time'], batch_size=5000)
+
+        queries = 0
+
+        def count_queries(execute, *args):
+            nonlocal queries
+            queries += 1
+            return execute(*args)
+
+        # Counted without CaptureQueriesContext, which keeps only the last 9000
+        with connection.execute_wrapper(count_queries):
+            started = time.perf_counter()
+            matched, unmatched, total_km = matching.match_pending()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'matcher: {matched} matched, {unmatched} unmatched in {elapsed:.2f}s '
+            f'({elapsed / max(count, 1) * 1000:.2f} ms, {queries / max(count, 1):.1f} queries per booking), '
+            f'{total_km / max(matched, 1):.2f} km on average'
+        )
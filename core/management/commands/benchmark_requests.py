@@ -0,0 +1,75 @@
+"""
+Management command to measure SQL queries and render time per request
+
+Each URL is requested through the Django test client, first with every
+cache cleared (cold) and then with the caches populated (warm), so the
+effect of the caching layers shows up as a per-request query count drop.
+
+Examples:
+    python manage.py benchmark_requests
+    python manage.py benchmark_requests /services/ /home-content/ --htmx --iterations 20
+"""
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+DEFAULT_URLS = [
+    '/',
+    '/home-content/',
+    '/services/',
+    '/categories/',
+    '/filter-preferred-services/',
+    '/filter-latest-services/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Report SQL query count and response time per URL with cold and warm caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', help='URL paths to request (default: main catalog pages)')
+        parser.add_argument('--iterations', type=int, default=10, help='Warm requests per URL (default: 10)')
+        parser.add_argument('--htmx', action='store_true', help='Send the HX-Request header (partial responses)')
+        parser.add_argument('--show-sql', action='store_true', help='Print the SQL of the warm requests')
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or DEFAULT_URLS
+        headers = {'HX-Request': 'true'} if options['htmx'] else {}
+        client = Client()
+
+        self.stdout.write(
+            f'{"url":<40} {"status":>6} {"cold q":>7} {"warm q":>7} {"cold ms":>9} {"warm ms":>9} {"p95 ms":>9}'
+        )
+        for url in urls:
+            cache.clear()
+            cold = self.measure(client, url, headers)
+
+            warm_runs = [self.measure(client, url, headers) for _ in range(max(options['iterations'], 1))]
+            warm_queries = warm_runs[-1]['queries']
+            warm_ms = [run['ms'] for run in warm_runs]
+            p95_ms = sorted(warm_ms)[int(len(warm_ms) * 0.95) - 1] if len(warm_ms) > 1 else warm_ms[0]
+
+            self.stdout.write(
+                f'{url:<40} {cold["status"]:>6} {len(cold["queries"]):>7} {len(warm_queries):>7} '
+                f'{cold["ms"]:>9.1f} {statistics.mean(warm_ms):>9.1f} {p95_ms:>9.1f}'
+            )
+            if options['show_sql']:
+                for query in warm_queries:
+                    self.stdout.write(f'    {query["sql"][:160]}')
+
+    def measure(self, client, url, headers):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url, headers=headers)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        return {
+            'status': response.status_code,
+            'queries': captured.captured_queries,
+            'ms': elapsed_ms,
+        }
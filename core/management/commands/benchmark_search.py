@@ -0,0 +1,76 @@
+"""
+Management command to compare the FTS5 search index with the icontains scan
+
+For each catalog size, synthetic services are created inside a
+rolled-back transaction, the index is rebuilt and the services listing
+query (count + first page) is timed with both backends.
+
+Example:
+    python manage.py benchmark_search --sizes 10000 100000
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import search
+from core.benchmark_data import rolled_back, seed_services
+from services.models import Service
+
+
+DEFAULT_QUERIES = ['clean', 'deep cleaning', 'plumb', 'air cond', 'kalomi', 'renzen', 'zzz']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the service search index against icontains filtering'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+        parser.add_argument('--queries', nargs='+', default=DEFAULT_QUERIES)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query (default: 5)')
+
+    def handle(self, *args, **options):
+        search.reset_backend()
+        fts = search.get_backend()
+        if isinstance(fts, search.IContainsSearchBackend):
+            raise CommandError('No search index available. Run "python manage.py migrate core" first.')
+        icontains = search.IContainsSearchBackend()
+
+        for size in options['sizes']:
+            with rolled_back():
+                self.stdout.write(self.style.WARNING(f'\nSeeding {size} services...'))
+                seed_services(size)
+
+                started = time.perf_counter()
+                indexed = fts.rebuild()
+                self.stdout.write(f'Indexed {indexed} services in {time.perf_counter() - started:.2f} s')
+
+                self.stdout.write(
+                    f'{"query":<22} {"matches":>8} {"icontains ms":>13} {"fts5 ms":>9} {"speedup":>8}'
+                )
+                for query in options['queries']:
+                    slow_count, slow_ms = self.time_listing(icontains, query, options['repeat'])
+                    fast_count, fast_ms = self.time_listing(fts, query, options['repeat'])
+                    speedup = slow_ms / fast_ms if fast_ms else 0
+                    self.stdout.write(
+                        f'{query:<22} {fast_count:>8} {slow_ms:>13.1f} {fast_ms:>9.1f} {speedup:>7.1f}x'
+                        + ('' if slow_count == fast_count else f'  (icontains: {slow_count} matches)')
+                    )
+
+        # Put the index back in line with the real (rolled back) catalog
+        fts.rebuild()
+
+    def time_listing(self, backend, query, repeat):
+        """Time what the services view does: count the matches and load the first page"""
+        runs = []
+        count = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            services_qs = backend.search(
+                Service.objects.filter(is_active=True).select_related('category', 'subcategory'),
+                query,
+            )
+            count = services_qs.count()
+            list(services_qs[:10])
+            runs.append((time.perf_counter() - started) * 1000)
+        return count, statistics.median(runs)
@@ -0,0 +1,92 @@
+"""
+Management command to measure page render time with the service card fragment cache
+
+Each page is requested with the card cache off, then once with empty card
+caches (cold: every card is rendered and stored) and then repeatedly with
+the cards cached (warm). The other caches (home snapshot, facets, counts)
+are warmed before each page so only the card rendering differs.
+
+With --services N, synthetic services are created inside a transaction
+that is rolled back at the end.
+
+Examples:
+    python manage.py benchmark_service_cards
+    python manage.py benchmark_service_cards --services 2000 --iterations 30
+"""
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from core.benchmark_data import rolled_back, seed_services
+from core.templatetags import service_cards
+
+
+DEFAULT_URLS = [
+    '/',
+    '/home-content/',
+    '/services/',
+    '/services/?page=3',
+    '/filter-preferred-services/',
+    '/filter-latest-services/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare page render time with the service card cache off, cold and warm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', help='URL paths to request (default: pages with service cards)')
+        parser.add_argument('--services', type=int, default=0, help='Create this many synthetic services first (rolled back)')
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per measurement (default: 20)')
+
+    def handle(self, *args, **options):
+        if options['services']:
+            with rolled_back():
+                seed_services(options['services'])
+                self.run(options)
+        else:
+            self.run(options)
+
+    def run(self, options):
+        urls = options['urls'] or DEFAULT_URLS
+        iterations = max(options['iterations'], 1)
+        client = Client()
+        timeout = service_cards.CACHE_TIMEOUT or 60 * 10
+
+        self.stdout.write(
+            f'{"url":<32} {"off ms":>8} {"cold ms":>8} {"warm ms":>8} {"speedup":>8} {"off q":>6} {"warm q":>7}'
+        )
+        try:
+            for url in urls:
+                cache.clear()
+                service_cards.CACHE_TIMEOUT = 0
+                self.measure(client, url)  # warm the other caches
+                off = [self.measure(client, url) for _ in range(iterations)]
+
+                service_cards.CACHE_TIMEOUT = timeout
+                cold = self.measure(client, url)
+                warm = [self.measure(client, url) for _ in range(iterations)]
+
+                off_ms = statistics.median(run['ms'] for run in off)
+                warm_ms = statistics.median(run['ms'] for run in warm)
+                self.stdout.write(
+                    f'{url:<32} {off_ms:>8.1f} {cold["ms"]:>8.1f} {warm_ms:>8.1f} '
+                    f'{off_ms / warm_ms:>7.1f}x {off[-1]["queries"]:>6} {warm[-1]["queries"]:>7}'
+                )
+        finally:
+            service_cards.CACHE_TIMEOUT = timeout
+            cache.clear()
+
+    def measure(self, client, url):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            self.stderr.write(f'{url} returned {response.status_code}')
+        return {'ms': elapsed_ms, 'queries': len(captured)}
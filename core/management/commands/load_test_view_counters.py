@@ -0,0 +1,113 @@
+"""
+Management command to load test the buffered view counters
+
+Many threads hit the service detail page (or the counter directly) at the
+same time; afterwards the buffer is flushed and the stored views_count is
+compared with the number of views made. The original views_count is
+restored at the end.
+
+Examples:
+    python manage.py load_test_view_counters --threads 32 --views 50
+    python manage.py load_test_view_counters --mode legacy
+"""
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from core.counters import flush_all
+from services.models import Service
+
+
+class Command(BaseCommand):
+    help = 'Concurrently increment Service.views_count and check that no increments are lost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--service', type=int, help='Service ID (default: first active service)')
+        parser.add_argument('--threads', type=int, default=32, help='Concurrent readers (default: 32)')
+        parser.add_argument('--views', type=int, default=50, help='Views per reader (default: 50)')
+        parser.add_argument(
+            '--mode',
+            choices=['page', 'counter', 'legacy'],
+            default='page',
+            help=(
+                'page: GET the service detail page; counter: call increment_views() directly; '
+                'legacy: the old read-modify-write save() for comparison'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['service']:
+            service = Service.objects.filter(pk=options['service']).first()
+        else:
+            service = Service.objects.filter(is_active=True).first()
+        if not service:
+            raise CommandError('No service found. Create a service first.')
+
+        threads = options['threads']
+        views = options['views']
+        mode = options['mode']
+        flush_all()
+        before = Service.objects.values_list('views_count', flat=True).get(pk=service.pk)
+
+        self.stdout.write(self.style.WARNING(
+            f'Running {threads} readers x {views} views on "{service.name}" (mode: {mode})...'
+        ))
+
+        errors = []
+        start_barrier = threading.Barrier(threads)
+
+        def reader():
+            client = Client()
+            try:
+                start_barrier.wait()
+                for _ in range(views):
+                    if mode == 'page':
+                        response = client.get(f'/service/{service.pk}/')
+                        if response.status_code != 200:
+                            errors.append(response.status_code)
+                    elif mode == 'counter':
+                        Service(pk=service.pk, views_count=0).increment_views()
+                    else:
+                        instance = Service.objects.get(pk=service.pk)
+                        instance.views_count += 1
+                        instance.save(update_fields=['views_count'])
+            except Exception as e:
+                errors.append(str(e))
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=reader) for _ in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        flush_started = time.perf_counter()
+        flush_all()
+        flush_ms = (time.perf_counter() - flush_started) * 1000
+
+        after = Service.objects.values_list('views_count', flat=True).get(pk=service.pk)
+        Service.objects.filter(pk=service.pk).update(views_count=before)
+
+        expected = threads * views - len(errors)
+        recorded = after - before
+        lost = expected - recorded
+
+        self.stdout.write(f'  Views made:       {expected}')
+        self.stdout.write(f'  Views recorded:   {recorded}')
+        self.stdout.write(f'  Errors:           {len(errors)}')
+        self.stdout.write(f'  Elapsed:          {elapsed:.2f} s')
+        self.stdout.write(f'  Throughput:       {threads * views / elapsed:.0f} views/s')
+        self.stdout.write(f'  Final flush:      {flush_ms:.1f} ms')
+        if errors:
+            self.stdout.write(f'  First error:      {errors[0]}')
+
+        if lost:
+            self.stdout.write(self.style.ERROR(f'✗ {lost} increment(s) lost'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ No increments lost'))
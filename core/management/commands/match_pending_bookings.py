@@ -0,0 +1,49 @@
+"""
+Management command to assign the nearest free provider to pending bookings
+
+Upcoming pending bookings without a provider are matched, soonest first,
+to the nearest active, available provider offering the service within
+BOOKING_MATCH_RADIUS_KM whose calendar has the slot free (see
+bookings.matching). Run it on a schedule, e.g. every few minutes.
+
+Example:
+    python manage.py match_pending_bookings --dry-run
+    python manage.py match_pending_bookings --limit 1000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings import matching
+
+
+class Command(BaseCommand):
+    help = 'Assign the nearest free provider to pending bookings without one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Bookings to match at most (default: all)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=matching.BATCH_SIZE,
+            help=f'Bookings read and saved at a time (default: {matching.BATCH_SIZE})',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Match without saving')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        matched, unmatched, total_km = matching.match_pending(
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+            dry_run=options['dry_run'],
+        )
+        elapsed = time.perf_counter() - started
+        verb = 'would be assigned' if options['dry_run'] else 'assigned'
+        average = f', {total_km / matched:.1f} km away on average' if matched else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {matched} booking(s) {verb} a provider{average} ({elapsed:.1f}s)'
+        ))
+        if unmatched:
+            self.stdout.write(self.style.WARNING(
+                f'  {unmatched} booking(s) have no free provider within {matching.RADIUS_KM:g} km'
+            ))
@@ -0,0 +1,106 @@
+"""
+Management command to generate every ImageKit spec of the media library in parallel
+
+Walks every registered spec (Service.image_card, Provider.logo_thumbnail,
+...) for every object with a source image and generates the missing files
+in a process pool, so no request has to, along with the responsive width
+ladders of core.responsive (ids like responsive:services:service:featured_image).
+Run it after deploys, bulk imports or a cleared CACHE directory.
+
+Examples:
+    python manage.py pregenerate_images
+    python manage.py pregenerate_images services:service:* --workers 8
+    python manage.py pregenerate_images --force
+"""
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+from imagekit.registry import cachefile_registry, generator_registry
+
+from core import responsive
+from core.images import create_pool, generate_file
+
+
+class Command(BaseCommand):
+    help = 'Generate all ImageKit spec files and responsive image ladders in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'generator_ids', nargs='*',
+            help='Spec ids to generate, e.g. services:service:image_card (* wildcards allowed; default: all)',
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='Regenerate files that already exist')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the spec ids and file counts')
+
+    def handle(self, *args, **options):
+        patterns = [self.compile_pattern(pattern) for pattern in options['generator_ids']]
+
+        def selected(generator_id):
+            return not patterns or any(p.match(generator_id) for p in patterns)
+
+        files = []
+        for generator_id in sorted(generator_registry.get_ids()):
+            if not selected(generator_id):
+                continue
+            spec_files = [f for f in cachefile_registry.get(generator_id) if f.name]
+            self.stdout.write(f'{generator_id}: {len(spec_files)} file(s)')
+            files.extend(spec_files)
+
+        ladders = []
+        for label, field_name in responsive.LADDER_FIELDS:
+            ladder_id = responsive.field_label(label, field_name)
+            if not selected(ladder_id):
+                continue
+            sources = responsive.ladder_sources(label, field_name)
+            if not options['force']:
+                sources = [source for source in sources if not responsive.ladder_complete(responsive.get_manifest(source))]
+            self.stdout.write(f'{ladder_id}: {len(sources)} ladder(s)')
+            ladders.extend((source, label, field_name) for source in sources)
+
+        total = len(files) + len(ladders)
+        if options['dry_run'] or not total:
+            self.stdout.write(f'{len(files)} spec file(s) and {len(ladders)} ladder(s) in total')
+            return
+
+        statuses = Counter()
+        started = time.perf_counter()
+        with create_pool(max(options['workers'], 1)) as pool:
+            futures = {pool.submit(generate_file, f, options['force']): f.name for f in files}
+            for ladder in ladders:
+                futures[pool.submit(responsive.build_ladder, *ladder, force=options['force'])] = ladder[0]
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result = future.result()
+                except FileNotFoundError:
+                    statuses['missing source'] += 1
+                    continue
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'✗ {name}: {e}'))
+                    statuses['failed'] += 1
+                    continue
+                status = result[1] if isinstance(result, tuple) else 'ladders built'
+                statuses[status] += 1
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'  {status}: {name}')
+        elapsed = time.perf_counter() - started
+
+        summary = ', '.join(f'{count} {status}' for status, count in sorted(statuses.items()))
+        style = self.style.ERROR if statuses['failed'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f'✓ {total} item(s) in {elapsed:.1f}s with {options["workers"]} worker(s): {summary}'
+        ))
+
+    def compile_pattern(self, generator_id):
+        # Same wildcard rules as ImageKit's generateimages command
+        parts = re.split(r'(\*{1,2})', generator_id)
+        pattern = ''.join(
+            '[^:]*' if part == '*' else '.*' if part == '**' else re.escape(part)
+            for part in parts
+        )
+        return re.compile(f'^{pattern}(:.*)?$')
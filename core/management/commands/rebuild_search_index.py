@@ -0,0 +1,27 @@
+"""
+Management command to rebuild the service search index
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = 'Reindex every service in the configured search backend'
+
+    def handle(self, *args, **options):
+        search.reset_backend()
+        backend = search.get_backend()
+        if isinstance(backend, search.IContainsSearchBackend):
+            raise CommandError(
+                'No search index available (the FTS5 table is missing or the database is not SQLite). '
+                'Run "python manage.py migrate core" first.'
+            )
+
+        self.stdout.write(self.style.WARNING(f'Rebuilding search index ({backend.__class__.__name__})...'))
+        started = time.perf_counter()
+        indexed = backend.rebuild()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'✓ {indexed} service(s) indexed in {elapsed:.2f} s'))
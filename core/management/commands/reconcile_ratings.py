@@ -0,0 +1,112 @@
+"""
+Management command to recount review totals from approved provider reviews
+
+The RatingAggregate rows and the rating/total_reviews of providers and
+services are kept up to date by signals on every ProviderReview save and
+delete (see core.ratings). Run this once after deploying it (to replace
+hand-entered ratings), after bulk imports or queryset.update() calls,
+which bypass signals, or periodically to repair any drift.
+
+Reviews, aggregates, providers and services are all read in streamed
+chunks, so memory grows with the number of providers and services, not
+reviews.
+
+Example:
+    python manage.py reconcile_ratings --dry-run
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core import home_snapshot, ratings
+from core.caching import catalog_version
+from core.models import RatingAggregate
+from providers.models import Provider
+from services.models import Service
+
+
+class Command(BaseCommand):
+    help = 'Recount review totals and provider/service ratings from approved reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows read and written at a time (default: 2000)')
+
+    def handle(self, *args, **options):
+        dry_run, chunk_size = options['dry_run'], options['chunk_size']
+        totals = ratings.recount(chunk_size)
+        verb = 'would be fixed' if dry_run else 'fixed'
+
+        with transaction.atomic():
+            drifted = self.reconcile_aggregates(totals, chunk_size, dry_run)
+            self.report('review aggregates', drifted, verb)
+            for model, scope in ((Provider, 'provider'), (Service, 'service')):
+                drifted = self.reconcile_ratings(model, scope, totals, chunk_size, dry_run)
+                self.report(f'{model._meta.verbose_name.lower()} ratings', drifted, verb)
+                if drifted and not dry_run:
+                    # bulk_update() sends no signals
+                    home_snapshot.invalidate_for_instance(model)
+                    transaction.on_commit(catalog_version.bump)
+
+    def report(self, label, drifted, verb):
+        if drifted:
+            self.stdout.write(self.style.SUCCESS(f'✓ {drifted} {label} {verb}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ All {label} are correct'))
+
+    def reconcile_aggregates(self, totals, chunk_size, dry_run):
+        """Make the RatingAggregate rows match ``totals``. Returns the number of rows changed."""
+        fields = list(ratings.Totals().values())
+        missing = dict(totals)
+        to_update, to_delete = [], []
+        for row in RatingAggregate.objects.order_by().iterator(chunk_size=chunk_size):
+            actual = missing.pop((row.scope, row.object_id), None)
+            if actual is None:
+                if row.rating_count or row.rating_sum:
+                    to_delete.append(row.pk)
+                continue
+            values = actual.values()
+            if any(getattr(row, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(row, field, value)
+                row.updated_at = timezone.now()
+                to_update.append(row)
+        # Providers and services with reviews but no row yet
+        to_create = [
+            RatingAggregate(scope=scope, object_id=object_id, **actual.values())
+            for (scope, object_id), actual in missing.items()
+        ]
+
+        if not dry_run:
+            RatingAggregate.objects.bulk_update(to_update, fields + ['updated_at'], batch_size=chunk_size)
+            RatingAggregate.objects.filter(pk__in=to_delete).delete()
+            RatingAggregate.objects.bulk_create(to_create, batch_size=chunk_size)
+        return len(to_update) + len(to_delete) + len(to_create)
+
+    def reconcile_ratings(self, model, scope, totals, chunk_size, dry_run):
+        """Make rating/total_reviews of every ``model`` row match. Returns the number of rows changed."""
+        places = model._meta.get_field('rating').decimal_places
+        fields = ['rating', 'total_reviews']
+        if model is Service:
+            fields.append('updated_at')  # Cached service cards are keyed by it
+
+        changed, batch = 0, []
+        rows = model.objects.order_by().values_list('pk', 'rating', 'total_reviews')
+        for pk, rating, total_reviews in rows.iterator(chunk_size=chunk_size):
+            actual = totals.get((scope, pk))
+            rating_sum, rating_count = (actual.rating_sum, actual.rating_count) if actual else (0, 0)
+            expected = ratings.average(rating_sum, rating_count, places)
+            if rating == expected and total_reviews == rating_count:
+                continue
+            changed += 1
+            if dry_run:
+                continue
+            obj = model(pk=pk, rating=expected, total_reviews=rating_count)
+            obj.updated_at = timezone.now()
+            batch.append(obj)
+            if len(batch) >= chunk_size:
+                model.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, fields)
+        return changed
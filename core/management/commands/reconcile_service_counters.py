@@ -0,0 +1,51 @@
+"""
+Management command to recount active services per category and subcategory
+
+The stored counters are kept up to date by signals on every Service save and
+delete; run this after bulk imports or queryset.update() calls, which bypass
+signals, or periodically to repair any drift.
+
+Example:
+    python manage.py reconcile_service_counters --dry-run
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from categories.models import Category, SubCategory
+from services.models import Service
+
+
+class Command(BaseCommand):
+    help = 'Recount the stored active service counters on categories and subcategories'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        for model, field in ((Category, 'category'), (SubCategory, 'subcategory')):
+            with transaction.atomic():
+                drifted = self.reconcile(model, field, dry_run=options['dry_run'])
+            label = model._meta.verbose_name_plural.lower()
+            if not drifted:
+                self.stdout.write(self.style.SUCCESS(f'✓ All {label} counters are correct'))
+                continue
+            for obj, stored, actual in drifted:
+                self.stdout.write(self.style.WARNING(f'  {obj.name}: stored {stored}, actual {actual}'))
+            verb = 'would be fixed' if options['dry_run'] else 'fixed'
+            self.stdout.write(self.style.SUCCESS(f'✓ {len(drifted)} {label} counters {verb}'))
+
+    def reconcile(self, model, field, dry_run=False):
+        """Return [(obj, stored, actual), ...] for drifted rows, fixing them unless dry_run"""
+        actual_counts = dict(
+            Service.objects.filter(is_active=True, **{f'{field}__isnull': False})
+            .order_by().values_list(field).annotate(total=Count('pk'))
+        )
+        drifted = []
+        for obj in model.objects.select_for_update().only('pk', 'name', 'active_services_count'):
+            actual = actual_counts.get(obj.pk, 0)
+            if obj.active_services_count != actual:
+                drifted.append((obj, obj.active_services_count, actual))
+                if not dry_run:
+                    model.objects.filter(pk=obj.pk).update(active_services_count=actual)
+        return drifted
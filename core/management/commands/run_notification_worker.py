@@ -0,0 +1,47 @@
+"""
+Management command to deliver queued notifications (bookings, service requests)
+
+Polls the notification_jobs table, runs due jobs and retries failures with
+exponential backoff. Several workers can run side by side.
+
+Example:
+    python manage.py run_notification_worker
+    python manage.py run_notification_worker --once --stub
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications import worker
+from notifications.transports import StubTransport
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued WhatsApp notifications for bookings and service requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the due jobs once and exit')
+        parser.add_argument('--batch', type=int, default=20, help='Jobs claimed per poll (default: 20)')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds between polls when idle (default: 2)')
+        parser.add_argument('--stub', action='store_true', help='Record messages in memory instead of sending them')
+
+    def handle(self, *args, **options):
+        transport = StubTransport() if options['stub'] else None
+        self.stdout.write(self.style.SUCCESS('✓ Notification worker started'))
+
+        while True:
+            outcomes = worker.run_pending(limit=options['batch'], transport=transport)
+            if outcomes:
+                summary = ', '.join(f'{count} {status}' for status, count in sorted(outcomes.items()))
+                style = self.style.WARNING if outcomes.keys() - {'sent'} else self.style.SUCCESS
+                self.stdout.write(style(f'✓ Processed jobs: {summary}'))
+            if options['once']:
+                break
+            if not outcomes:
+                # Don't hold a connection while idle
+                close_old_connections()
+                try:
+                    time.sleep(options['sleep'])
+                except KeyboardInterrupt:
+                    break
@@ -0,0 +1,236 @@
+"""
+Management command to report the static bytes shipped by each page template
+
+Follows {% extends %} / {% include %} from each page template, collects
+its {% static %} references and the files their CSS pulls in through
+url() and @import, and adds up raw, gzip and brotli sizes (what
+WhiteNoise serves after collectstatic, see core.staticfiles). CSS
+background images are counted whether or not a rule uses them, so the
+img totals are an upper bound.
+
+--unused lists files in STATICFILES_DIRS that no template, CSS, Python
+or JS file refers to, i.e. candidates for STATICFILES_PRUNE_PATTERNS.
+--missing lists references to files that don't exist.
+
+Examples:
+    python manage.py static_report
+    python manage.py static_report home.html --files
+    python manage.py static_report --unused
+"""
+import gzip
+import os
+import posixpath
+import re
+from collections import defaultdict
+from functools import cache
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.utils import matches_patterns
+from django.core.management.base import BaseCommand
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+STATIC_RE = re.compile(r"""\{%\s*static\s+['"]([^'"]+)['"]""")
+TEMPLATE_RE = re.compile(r"""\{%\s*(?:extends|include)\s+['"]([^'"]+)['"]""")
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)|@import\s+['"]([^'"]+)['"]""")
+
+KINDS = {
+    '.css': 'css', '.js': 'js',
+    '.woff2': 'font', '.woff': 'font', '.ttf': 'font', '.eot': 'font', '.otf': 'font',
+}
+
+
+def kind(path):
+    return KINDS.get(os.path.splitext(path)[1].lower(), 'img')
+
+
+def template_dirs():
+    """Project template directories: TEMPLATES DIRS and the templates/ of the project's own apps"""
+    dirs = list(settings.TEMPLATES[0].get('DIRS', []))
+    dirs += [
+        os.path.join(app.path, 'templates') for app in apps.get_app_configs()
+        if app.path.startswith(str(settings.BASE_DIR))
+    ]
+    return [directory for directory in dirs if os.path.isdir(directory)]
+
+
+@cache
+def template_refs(name):
+    """Static paths referenced by a template and everything it extends or includes"""
+    # Read the source instead of compiling it, so templates needing optional tag libraries still count
+    path = next((os.path.join(d, name) for d in template_dirs() if os.path.isfile(os.path.join(d, name))), None)
+    if path is None:
+        return frozenset()
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        source = f.read()
+    refs = set(STATIC_RE.findall(source))
+    for child in TEMPLATE_RE.findall(source):
+        refs |= template_refs(child)
+    return frozenset(refs)
+
+
+@cache
+def css_refs(path):
+    """Static paths a CSS file pulls in (url() and @import, relative to the file), recursively"""
+    found = finders.find(path)
+    if not found:
+        return frozenset()
+    with open(found, encoding='utf-8', errors='ignore') as f:
+        css = f.read()
+    refs = set()
+    for _, url, imported in CSS_URL_RE.findall(css):
+        url = (url or imported).strip()
+        if not url or url.startswith(('data:', 'http:', 'https:', '//', '#', '/')):
+            continue
+        ref = posixpath.normpath(posixpath.join(posixpath.dirname(path), url.split('?')[0].split('#')[0]))
+        refs.add(ref)
+        if ref.endswith('.css'):
+            refs |= css_refs(ref)
+    return frozenset(refs)
+
+
+def with_css(refs):
+    refs = set(refs)
+    for ref in list(refs):
+        if ref.endswith('.css'):
+            refs |= css_refs(ref)
+    return refs
+
+
+@cache
+def sizes(path):
+    """(raw, gzip, brotli) bytes of a static file, or None if it doesn't exist"""
+    found = finders.find(path)
+    if not found:
+        return None
+    with open(found, 'rb') as f:
+        data = f.read()
+    if kind(path) in ('css', 'js') or path.endswith('.svg'):
+        compressed = len(gzip.compress(data, 9)), len(brotli.compress(data)) if brotli else 0
+    else:
+        # Fonts and raster images are already compressed; WhiteNoise serves them as is
+        compressed = len(data), len(data)
+    return len(data), *compressed
+
+
+def kb(n):
+    return f'{n / 1024:,.1f}'
+
+
+class Command(BaseCommand):
+    help = 'Report the static bytes shipped by each page template'
+
+    def add_arguments(self, parser):
+        parser.add_argument('templates', nargs='*', help='Page templates (default: the top-level templates)')
+        parser.add_argument('--files', action='store_true', help='List every file of each page')
+        parser.add_argument('--unused', action='store_true', help='List static files nothing refers to')
+        parser.add_argument('--missing', action='store_true', help='List references to files that don\'t exist')
+
+    def handle(self, *args, **options):
+        if options['unused']:
+            return self.report_unused()
+
+        pages = options['templates'] or self.page_templates()
+        if not brotli:
+            self.stdout.write(self.style.WARNING('brotli is not installed; br sizes are 0'))
+        self.stdout.write(f'{"template":<36} {"files":>5} {"raw KB":>10} {"gzip KB":>10} {"br KB":>10}')
+
+        missing = defaultdict(set)
+        for page in pages:
+            by_kind = defaultdict(lambda: [0, 0, 0, 0])
+            files = []
+            for ref in sorted(with_css(template_refs(page))):
+                size = sizes(ref)
+                if size is None:
+                    missing[ref].add(page)
+                    continue
+                files.append((ref, size))
+                totals = by_kind[kind(ref)]
+                totals[0] += 1
+                for i, n in enumerate(size, 1):
+                    totals[i] += n
+
+            total = [sum(values) for values in zip(*by_kind.values())] or [0, 0, 0, 0]
+            self.stdout.write(self.style.SUCCESS(
+                f'{page:<36} {total[0]:>5} {kb(total[1]):>10} {kb(total[2]):>10} {kb(total[3]):>10}'
+            ))
+            for name, (count, raw, gz, br) in sorted(by_kind.items()):
+                self.stdout.write(f'  {name:<34} {count:>5} {kb(raw):>10} {kb(gz):>10} {kb(br):>10}')
+            if options['files']:
+                for ref, (raw, gz, br) in sorted(files, key=lambda item: -item[1][0]):
+                    self.stdout.write(f'    {ref:<38} {kb(raw):>10} {kb(gz):>10} {kb(br):>10}')
+
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{len(missing)} referenced file(s) not found (--missing to list)'))
+            if options['missing']:
+                for ref, pages in sorted(missing.items()):
+                    self.stdout.write(f'  {ref}  ({len(pages)} page(s))')
+
+    def page_templates(self):
+        """Top-level templates of the project template directories"""
+        pages = []
+        for directory in settings.TEMPLATES[0].get('DIRS', []):
+            pages += sorted(name for name in os.listdir(directory) if name.endswith('.html'))
+        return pages
+
+    def report_unused(self):
+        static_files = {}
+        for finder in finders.get_finders():
+            if isinstance(finder, finders.FileSystemFinder):
+                for path, storage in finder.list([]):
+                    static_files.setdefault(path.replace(os.sep, '/'), storage.path(path))
+
+        referenced = set()
+        for template in self.all_templates():
+            referenced |= template_refs(template)
+        referenced = with_css(referenced)
+        code = self.source_text()
+
+        prune_patterns = getattr(settings, 'STATICFILES_PRUNE_PATTERNS', [])
+        unused = defaultdict(list)
+        for path, full_path in sorted(static_files.items()):
+            if path in referenced or path in code or os.path.basename(path) in code:
+                continue
+            top = path.split('/')[0] if '/' in path else '.'
+            unused[top].append((path, os.path.getsize(full_path), self.pruned(path, prune_patterns)))
+
+        total = 0
+        for top, files in sorted(unused.items()):
+            size = sum(size for _, size, _ in files)
+            total += size
+            self.stdout.write(self.style.SUCCESS(f'{top}/: {len(files)} unused file(s), {kb(size)} KB'))
+            for path, size, pruned in files:
+                self.stdout.write(f'  {path:<60} {kb(size):>9} KB{"  (pruned)" if pruned else ""}')
+        self.stdout.write(f'{kb(total)} KB unused in total')
+
+    def pruned(self, path, patterns):
+        parts = path.split('/')
+        return any(matches_patterns(part, patterns) for part in parts) or matches_patterns(path, patterns)
+
+    def all_templates(self):
+        names = []
+        for directory in template_dirs():
+            for root, _, files in os.walk(directory):
+                names += [
+                    os.path.relpath(os.path.join(root, name), directory).replace(os.sep, '/')
+                    for name in files if name.endswith(('.html', '.txt'))
+                ]
+        return names
+
+    def source_text(self):
+        """Project Python and static JS, where static paths can be built in code"""
+        chunks = []
+        for directory in [settings.BASE_DIR, *settings.STATICFILES_DIRS]:
+            for root, dirs, files in os.walk(directory):
+                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('node_modules', 'staticfiles', 'media')]
+                for name in files:
+                    if name.endswith(('.py', '.js')):
+                        with open(os.path.join(root, name), encoding='utf-8', errors='ignore') as f:
+                            chunks.append(f.read())
+        return '\n'.join(chunks)
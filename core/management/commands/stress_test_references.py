@@ -0,0 +1,114 @@
+"""
+Management command to stress test the booking / service request reference allocator
+
+Many threads create bookings (or just draw references) at the same time;
+afterwards every reference is checked for duplicates and for increasing
+order within each thread. Bookings created by the test are deleted again.
+
+Examples:
+    python manage.py stress_test_references --threads 16 --per-thread 100
+    python manage.py stress_test_references --mode allocate --batch 50
+"""
+import threading
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from bookings.models import Booking
+from core.models import ReferenceSequence
+from core.references import allocate
+from services.models import Service
+
+
+STRESS_EMAIL_DOMAIN = 'stress-test.invalid'
+STRESS_PREFIX = 'ST'
+
+
+class Command(BaseCommand):
+    help = 'Create bookings concurrently and check that no two get the same reference'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent writers (default: 16)')
+        parser.add_argument('--per-thread', type=int, default=100, help='Inserts per writer (default: 100)')
+        parser.add_argument(
+            '--mode',
+            choices=['booking', 'allocate'],
+            default='booking',
+            help='booking: Booking.objects.create(); allocate: draw references only (prefix ST)',
+        )
+        parser.add_argument('--batch', type=int, default=1, help='References per allocate() call (allocate mode)')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        per_thread = options['per_thread']
+        mode = options['mode']
+        service = Service.objects.first()
+        if mode == 'booking' and not service:
+            raise CommandError('No service found. Create a service first.')
+
+        self.stdout.write(self.style.WARNING(
+            f'Running {threads} writers x {per_thread} inserts (mode: {mode})...'
+        ))
+
+        references = [[] for _ in range(threads)]
+        errors = []
+        start_barrier = threading.Barrier(threads)
+
+        def writer(drawn):
+            try:
+                start_barrier.wait()
+                if mode == 'allocate':
+                    while len(drawn) < per_thread:
+                        drawn.extend(allocate(STRESS_PREFIX, options['batch']))
+                    return
+                for i in range(per_thread):
+                    booking = Booking.objects.create(
+                        service=service,
+                        customer_first_name='Stress',
+                        customer_last_name='Test',
+                        customer_email=f'{threading.get_ident()}-{i}@{STRESS_EMAIL_DOMAIN}',
+                        customer_phone='+971500000000',
+                        location_latitude=25.2,
+                        location_longitude=55.3,
+                        location_address='Stress test',
+                        appointment_date=date.today(),
+                        appointment_time='10:00 AM',
+                    )
+                    drawn.append(booking.booking_reference)
+            except Exception as e:
+                errors.append(f'{type(e).__name__}: {e}')
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=writer, args=(drawn,)) for drawn in references]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        if mode == 'booking':
+            Booking.objects.filter(customer_email__endswith=f'@{STRESS_EMAIL_DOMAIN}').delete()
+        else:
+            ReferenceSequence.objects.filter(prefix=STRESS_PREFIX).delete()
+
+        drawn = [reference for thread_references in references for reference in thread_references]
+        duplicates = len(drawn) - len(set(drawn))
+        out_of_order = sum(1 for thread_references in references if thread_references != sorted(thread_references))
+
+        self.stdout.write(f'  References drawn: {len(drawn)}')
+        self.stdout.write(f'  Duplicates:       {duplicates}')
+        self.stdout.write(f'  Out of order:     {out_of_order} thread(s)')
+        self.stdout.write(f'  Errors:           {len(errors)}')
+        self.stdout.write(f'  Elapsed:          {elapsed:.2f} s')
+        self.stdout.write(f'  Throughput:       {len(drawn) / elapsed:.0f} inserts/s')
+        if errors:
+            self.stdout.write(f'  First error:      {errors[0]}')
+
+        if duplicates or out_of_order or errors:
+            self.stdout.write(self.style.ERROR('✗ Reference allocation is not collision-free'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ No collisions'))
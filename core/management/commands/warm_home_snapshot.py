@@ -0,0 +1,73 @@
+"""
+Management command to build (warm) the cached home page snapshot
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import home_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the cached home page snapshot and show hit/miss/rebuild statistics'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--section',
+            action='append',
+            dest='sections',
+            help='Only rebuild this section (can be repeated)',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Only print statistics, do not rebuild anything',
+        )
+        parser.add_argument(
+            '--reset-stats',
+            action='store_true',
+            help='Reset hit/miss counters and rebuild timings',
+        )
+
+    def handle(self, *args, **options):
+        if options['reset_stats']:
+            home_snapshot.reset_stats()
+            self.stdout.write(self.style.SUCCESS('✓ Snapshot statistics reset'))
+
+        if not options['stats']:
+            names = options['sections'] or list(home_snapshot.SECTIONS)
+            unknown = [name for name in names if name not in home_snapshot.SECTIONS]
+            if unknown:
+                raise CommandError(
+                    f'Unknown section(s): {", ".join(unknown)}. '
+                    f'Available: {", ".join(home_snapshot.SECTIONS)}'
+                )
+
+            self.stdout.write(self.style.WARNING('Building home snapshot...'))
+            # New versions first, so requests never see the data being replaced
+            home_snapshot.invalidate(names)
+            total_ms = 0.0
+            for name in names:
+                _, elapsed_ms = home_snapshot.rebuild(name)
+                total_ms += elapsed_ms
+                self.stdout.write(f'  {name:<30} {elapsed_ms:8.1f} ms')
+            self.stdout.write(self.style.SUCCESS(f'✓ {len(names)} section(s) built in {total_ms:.1f} ms'))
+
+        self.print_stats()
+
+    def print_stats(self):
+        stats = home_snapshot.get_stats()
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = (stats['hits'] / lookups * 100) if lookups else 0
+
+        self.stdout.write('\nSnapshot statistics:')
+        self.stdout.write(f'  Section hits:   {stats["hits"]}')
+        self.stdout.write(f'  Section misses: {stats["misses"]}')
+        self.stdout.write(f'  Hit rate:       {hit_rate:.1f}%')
+
+        if stats['rebuilds']:
+            self.stdout.write('\n  Rebuilds:')
+            self.stdout.write(f'  {"section":<30} {"count":>6} {"last ms":>10} {"avg ms":>10}')
+            for name, timing in stats['rebuilds'].items():
+                avg_ms = timing['total_ms'] / timing['count'] if timing['count'] else 0
+                self.stdout.write(
+                    f'  {name:<30} {timing["count"]:>6} {timing["last_ms"]:>10.1f} {avg_ms:>10.1f}'
+                )
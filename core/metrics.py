@@ -0,0 +1,166 @@
+"""
+Per-request query and timing metrics
+
+RequestMetricsMiddleware (core.middleware) records, for every request, the
+number of SQL queries, the time spent in SQL, in template rendering and in
+the view. Samples are kept per URL name in a rolling window in memory, and
+the staff-only ``core:request_metrics`` endpoint reports p50/p95/p99 for each
+route.
+
+Template time is measured by the TimedDjangoTemplates backend, so only
+the engines configured with it in TEMPLATES are timed; with the stock
+backend template_ms stays 0.
+
+The aggregate is per process: with several workers each one reports its
+own traffic. Recording a sample is an append to a bounded deque; the
+percentiles are only computed when the endpoint is read.
+
+Settings:
+    REQUEST_METRICS_ENABLED        record metrics (default True)
+    REQUEST_METRICS_SAMPLE_RATE    fraction of requests recorded (default 1.0)
+    REQUEST_METRICS_WINDOW         samples kept per route (default 500)
+    REQUEST_METRICS_SERVER_TIMING  add a Server-Timing header (default DEBUG)
+    REQUEST_METRICS_IGNORE_PATHS   path prefixes never recorded
+"""
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+
+ENABLED = getattr(settings, 'REQUEST_METRICS_ENABLED', True)
+SAMPLE_RATE = getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 1.0)
+WINDOW = getattr(settings, 'REQUEST_METRICS_WINDOW', 500)
+SERVER_TIMING = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', settings.DEBUG)
+IGNORE_PATHS = tuple(getattr(
+    settings, 'REQUEST_METRICS_IGNORE_PATHS',
+    (settings.STATIC_URL, settings.MEDIA_URL, '/__reload__/'),
+))
+
+METRICS = ('queries', 'sql_ms', 'template_ms', 'view_ms', 'total_ms')
+PERCENTILES = (50, 95, 99)
+
+
+class RequestTimings:
+    """Counters for the request being handled"""
+
+    __slots__ = ('queries', 'sql_ms', 'template_ms', 'view_ms', 'total_ms', 'template_depth', 'view_started')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.view_ms = 0.0
+        self.total_ms = 0.0
+        self.template_depth = 0
+        self.view_started = None
+
+    def sample(self):
+        return tuple(getattr(self, name) for name in METRICS)
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.sql_ms:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'view;dur={self.view_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+
+current = ContextVar('request_timings', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """connection.execute_wrapper() hook adding the query to the current request"""
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql_ms += (time.perf_counter() - start) * 1000
+        timings.queries += 1
+
+
+class TimedTemplate(Template):
+    """A template whose renders add to the current request's template_ms.
+    Nested renders (e.g. render_to_string inside a template tag) are counted
+    once, as part of the outer render."""
+
+    def render(self, context=None, request=None):
+        timings = current.get()
+        if timings is None:
+            return super().render(context, request)
+        timings.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template_ms += (time.perf_counter() - start) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with TimedTemplates (set as BACKEND in TEMPLATES)"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class RouteMetrics:
+    """Rolling window of request samples per route, safe to share between threads"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.routes = {}  # route -> {'count': int, 'samples': deque}
+
+    def record(self, route, sample):
+        with self.lock:
+            entry = self.routes.get(route)
+            if entry is None:
+                entry = self.routes[route] = {'count': 0, 'samples': deque(maxlen=self.window)}
+            entry['count'] += 1
+            entry['samples'].append(sample)
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+    def summary(self):
+        """{route: {'requests': n, 'window': n, metric: {'p50', 'p95', 'p99', 'max'}}}"""
+        with self.lock:
+            snapshot = {route: (entry['count'], list(entry['samples'])) for route, entry in self.routes.items()}
+
+        summary = {}
+        for route, (count, samples) in snapshot.items():
+            stats = {'requests': count, 'window': len(samples)}
+            for index, name in enumerate(METRICS):
+                values = sorted(sample[index] for sample in samples)
+                stats[name] = {f'p{pct}': round(percentile(values, pct), 2) for pct in PERCENTILES}
+                stats[name]['max'] = round(values[-1], 2)
+            summary[route] = stats
+        return summary
+
+
+route_metrics = RouteMetrics()
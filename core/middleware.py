@@ -0,0 +1,66 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import metrics
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, SQL time, template time and view time per request
+    into core.metrics.route_metrics, keyed by URL name. Optionally adds a
+    Server-Timing header so the numbers show up in the browser devtools.
+
+    ``view`` runs from URL resolution to the response (the view plus the
+    response phase of the middleware below this one); ``total`` covers
+    everything below this middleware, so place it near the top of MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            not metrics.ENABLED
+            or request.path.startswith(metrics.IGNORE_PATHS)
+            or (metrics.SAMPLE_RATE < 1 and random.random() >= metrics.SAMPLE_RATE)
+        ):
+            return self.get_response(request)
+
+        timings = metrics.RequestTimings()
+        token = metrics.current.set(timings)
+        start = time.perf_counter()
+        try:
+            with self.instrument_connections():
+                response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        end = time.perf_counter()
+        timings.total_ms = (end - start) * 1000
+        if timings.view_started is not None:
+            timings.view_ms = (end - timings.view_started) * 1000
+
+        match = request.resolver_match
+        route = (match.view_name if match else None) or '<unresolved>'
+        metrics.route_metrics.record(route, timings.sample())
+
+        if metrics.SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Only mark the start: calling the view here would skip the
+        # process_view of later middleware (e.g. CSRF)
+        timings = metrics.current.get()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+        return None
+
+    @staticmethod
+    def instrument_connections():
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics.count_queries))
+        return stack
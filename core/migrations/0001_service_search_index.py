@@ -0,0 +1,53 @@
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    Service = apps.get_model('services', 'Service')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS service_search USING fts5("
+            "name, short_description, overview, category, subcategory, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        rows = [
+            (
+                service.pk,
+                service.name,
+                service.short_description,
+                strip_tags(service.overview or ''),
+                service.category.name if service.category_id else '',
+                service.subcategory.name if service.subcategory_id else '',
+            )
+            for service in Service.objects.select_related('category', 'subcategory')
+        ]
+        cursor.executemany(
+            'INSERT INTO service_search '
+            '(rowid, name, short_description, overview, category, subcategory) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            rows,
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS service_search')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('categories', '0003_alter_category_description'),
+        ('services', '0007_alter_service_overview_alter_servicefaq_answer_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
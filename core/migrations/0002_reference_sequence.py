@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_service_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(help_text='Reference prefix, e.g. BK or SR', max_length=10)),
+                ('day', models.DateField()),
+                ('last_value', models.PositiveBigIntegerField(default=0, help_text='Last number handed out')),
+            ],
+            options={
+                'verbose_name': 'Reference Sequence',
+                'verbose_name_plural': 'Reference Sequences',
+                'db_table': 'reference_sequences',
+                'ordering': ['-day', 'prefix'],
+                'constraints': [models.UniqueConstraint(fields=('prefix', 'day'), name='unique_reference_sequence_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-17 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_reference_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponsiveImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Storage name of the source image', max_length=255, unique=True)),
+                ('signature', models.CharField(help_text='Hash of the ladder settings the variants were built with', max_length=16)),
+                ('width', models.PositiveIntegerField(help_text='Source width in pixels')),
+                ('height', models.PositiveIntegerField(help_text='Source height in pixels')),
+                ('variants', models.JSONField(default=dict, help_text='{format: [[width, storage name], ...]}, narrowest first')),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Responsive Image',
+                'verbose_name_plural': 'Responsive Images',
+                'db_table': 'responsive_images',
+            },
+        ),
+    ]
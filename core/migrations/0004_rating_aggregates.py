@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-18 00:07
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def count_reviews(apps, schema_editor):
+    """Aggregates of the reviews so far; reconcile_ratings copies them onto providers and services"""
+    ProviderReview = apps.get_model('providers', 'ProviderReview')
+    RatingAggregate = apps.get_model('core', 'RatingAggregate')
+
+    approved = ProviderReview.objects.filter(is_approved=True, rating__in=range(1, 6)).order_by()
+    rows = {}
+    for scope, group_by in (('site', None), ('provider', 'provider_id'), ('service', 'service_id')):
+        reviews = approved if group_by is None else approved.filter(**{f'{group_by}__isnull': False})
+        grouped = reviews.values(*([group_by] if group_by else []), 'rating').annotate(count=Count('pk'), total=Sum('rating'))
+        for group in grouped:
+            object_id = group[group_by] if group_by else 0
+            row = rows.setdefault((scope, object_id), RatingAggregate(scope=scope, object_id=object_id))
+            row.rating_sum += group['total']
+            row.rating_count += group['count']
+            setattr(row, f"stars_{group['rating']}", group['count'])
+    RatingAggregate.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_responsive_image_manifest'),
+        ('providers', '0004_provider_geo_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('site', 'Site'), ('provider', 'Provider'), ('service', 'Service')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField(default=0, help_text='Provider or service id; 0 for the site row')),
+                ('rating_sum', models.BigIntegerField(default=0, help_text='Sum of the star ratings')),
+                ('rating_count', models.IntegerField(default=0, help_text='Number of reviews')),
+                ('stars_1', models.IntegerField(default=0)),
+                ('stars_2', models.IntegerField(default=0)),
+                ('stars_3', models.IntegerField(default=0)),
+                ('stars_4', models.IntegerField(default=0)),
+                ('stars_5', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Rating Aggregate',
+                'verbose_name_plural': 'Rating Aggregates',
+                'db_table': 'rating_aggregates',
+                'ordering': ['scope', 'object_id'],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'object_id'), name='unique_rating_aggregate_scope')],
+            },
+        ),
+        migrations.RunPython(count_reviews, migrations.RunPython.noop),
+    ]
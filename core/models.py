@@ -1,3 +1,82 @@
 from django.db import models
 
-# Create your models here.
+
+class ReferenceSequence(models.Model):
+    """Per-day counter behind booking and service request references (see core.references)"""
+    
+    prefix = models.CharField(max_length=10, help_text='Reference prefix, e.g. BK or SR')
+    day = models.DateField()
+    last_value = models.PositiveBigIntegerField(default=0, help_text='Last number handed out')
+    
+    class Meta:
+        db_table = 'reference_sequences'
+        ordering = ['-day', 'prefix']
+        verbose_name = 'Reference Sequence'
+        verbose_name_plural = 'Reference Sequences'
+        constraints = [
+            models.UniqueConstraint(fields=['prefix', 'day'], name='unique_reference_sequence_day'),
+        ]
+    
+    def __str__(self):
+        return f"{self.prefix} {self.day:%Y-%m-%d}: {self.last_value}"
+
+
+class ResponsiveImage(models.Model):
+    """Manifest of the width ladder generated for one source image (see core.responsive)"""
+    
+    source = models.CharField(max_length=255, unique=True, help_text='Storage name of the source image')
+    signature = models.CharField(max_length=16, help_text='Hash of the ladder settings the variants were built with')
+    width = models.PositiveIntegerField(help_text='Source width in pixels')
+    height = models.PositiveIntegerField(help_text='Source height in pixels')
+    variants = models.JSONField(default=dict, help_text='{format: [[width, storage name], ...]}, narrowest first')
+    generated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'responsive_images'
+        verbose_name = 'Responsive Image'
+        verbose_name_plural = 'Responsive Images'
+    
+    def __str__(self):
+        return self.source
+
+
+class RatingAggregate(models.Model):
+    """Running totals of approved provider reviews for a provider, a service or the whole site (see core.ratings)"""
+    
+    SCOPE_CHOICES = [
+        ('site', 'Site'),
+        ('provider', 'Provider'),
+        ('service', 'Service'),
+    ]
+    
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    object_id = models.PositiveBigIntegerField(default=0, help_text='Provider or service id; 0 for the site row')
+    rating_sum = models.BigIntegerField(default=0, help_text='Sum of the star ratings')
+    rating_count = models.IntegerField(default=0, help_text='Number of reviews')
+    stars_1 = models.IntegerField(default=0)
+    stars_2 = models.IntegerField(default=0)
+    stars_3 = models.IntegerField(default=0)
+    stars_4 = models.IntegerField(default=0)
+    stars_5 = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'rating_aggregates'
+        ordering = ['scope', 'object_id']
+        verbose_name = 'Rating Aggregate'
+        verbose_name_plural = 'Rating Aggregates'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'object_id'], name='unique_rating_aggregate_scope'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} {self.object_id}: {self.average:.2f} ({self.rating_count})"
+    
+    @property
+    def average(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+    
+    @property
+    def histogram(self):
+        """{stars: count}, 5 stars first"""
+        return {stars: getattr(self, f'stars_{stars}') for stars in range(5, 0, -1)}
@@ -0,0 +1,155 @@
+"""
+Keyset (cursor) pagination and cached listing counts
+
+Django's Paginator runs COUNT(*) plus an OFFSET query for every page, so
+deep pages get slower as the catalog grows. CursorPaginator instead
+continues from the last row seen, ordered on (field, id) descending, and
+encodes that position in an opaque signed cursor token.
+
+Usage:
+    page = CursorPaginator(services_qs, per_page=10, sort='rating').page(request.GET.get('cursor'))
+"""
+import hashlib
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Q
+
+
+CURSOR_SALT = 'core.pagination.cursor'
+
+# sort name -> (model field, parser for the encoded value)
+SORTS = {
+    'rating': ('rating', Decimal),
+    'newest': ('created_at', datetime.fromisoformat),
+}
+
+DEFAULT_SORT = 'rating'
+
+# Seconds a listing total is cached for; 0 disables count caching
+COUNT_CACHE_TIMEOUT = getattr(settings, 'SERVICES_COUNT_CACHE_TIMEOUT', 60)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    """One page of a cursor-paginated listing. Iterates like a Paginator page."""
+
+    def __init__(self, object_list, sort, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.sort = sort
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+class CursorPaginator:
+    """Paginate a queryset by (sort field, pk), newest/highest first"""
+
+    def __init__(self, queryset, per_page, sort=DEFAULT_SORT):
+        if sort not in SORTS:
+            sort = DEFAULT_SORT
+        self.queryset = queryset
+        self.per_page = per_page
+        self.sort = sort
+        self.field, self.parse_value = SORTS[sort]
+
+    def encode_cursor(self, obj, backwards=False):
+        value = getattr(obj, self.field)
+        value = value.isoformat() if isinstance(value, datetime) else str(value)
+        return signing.dumps({'s': self.sort, 'v': value, 'pk': obj.pk, 'b': backwards}, salt=CURSOR_SALT)
+
+    def decode_cursor(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            if data['s'] != self.sort:
+                raise InvalidCursor('Cursor belongs to a different sort order')
+            return self.parse_value(data['v']), int(data['pk']), bool(data['b'])
+        except (signing.BadSignature, KeyError, TypeError, ValueError, ArithmeticError) as e:
+            raise InvalidCursor(str(e))
+
+    def page(self, cursor=None):
+        """Return the page after (or, for backwards cursors, before) ``cursor``.
+        Invalid or stale cursors return the first page."""
+        field = self.field
+        queryset = self.queryset.order_by(f'-{field}', '-pk')
+        backwards = False
+
+        if cursor:
+            try:
+                value, pk, backwards = self.decode_cursor(cursor)
+            except InvalidCursor:
+                cursor = None
+            else:
+                # The redundant __gte/__lte bound lets the database seek into a
+                # (field, id) index instead of scanning it from the first row
+                if backwards:
+                    queryset = queryset.filter(**{f'{field}__gte': value}).filter(
+                        Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})
+                    ).order_by(field, 'pk')
+                else:
+                    queryset = queryset.filter(**{f'{field}__lte': value}).filter(
+                        Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+                    )
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        return CursorPage(
+            rows,
+            sort=self.sort,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_cursor=self.encode_cursor(rows[-1]) if rows else None,
+            previous_cursor=self.encode_cursor(rows[0], backwards=True) if rows else None,
+        )
+
+
+def filter_cache_key(prefix, **filters):
+    """Stable cache key for a combination of listing filters (order-insensitive lists)"""
+    parts = []
+    for name in sorted(filters):
+        value = filters[name]
+        if isinstance(value, (list, tuple)):
+            value = ','.join(sorted(str(item) for item in value))
+        else:
+            value = str(value or '').strip().lower()
+        parts.append(f'{name}={value}')
+    digest = hashlib.md5('&'.join(parts).encode()).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+def cached_count(queryset, cache_key, timeout=COUNT_CACHE_TIMEOUT):
+    """queryset.count(), cached for ``timeout`` seconds (approximate within that window)"""
+    if not timeout:
+        return queryset.count()
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, timeout)
+    return count
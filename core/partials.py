@@ -0,0 +1,31 @@
+"""
+Fast path for HTMX partials
+
+Partial endpoints (home_content, filter_*_services, search_*, the services
+row) return HTML fragments that never show the navbar or site settings,
+yet rendering them through the main template engine runs every
+full-page context processor. For requests carrying the HX-Request header
+(request.htmx, from django_htmx) render_partial() renders with the
+'partials' engine in settings.TEMPLATES instead: same template dirs and
+tags, but only the request context processor, plus lazy site_config and
+nav_categories that are only loaded if a fragment reads them.
+
+Requests without the header (a browser opening the URL directly) use the
+full engine as before. HTMX requests that swap the whole body
+(hx-target="body") must keep using render().
+
+Settings:
+    HTMX_PARTIAL_ENGINE  name of the partials engine in TEMPLATES (default 'partials');
+                         empty to render partials with the full engine
+"""
+from django.conf import settings
+from django.shortcuts import render
+
+
+PARTIAL_ENGINE = getattr(settings, 'HTMX_PARTIAL_ENGINE', 'partials')
+
+
+def render_partial(request, template_name, context=None, status=None):
+    """render() for HTMX fragments: uses the partials engine for HX-Request requests"""
+    using = PARTIAL_ENGINE if PARTIAL_ENGINE and getattr(request, 'htmx', False) else None
+    return render(request, template_name, context, status=status, using=using)
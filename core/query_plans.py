@@ -0,0 +1,144 @@
+"""
+Hot queries checked by ``python manage.py audit_query_plans``
+
+Each entry rebuilds a query that a view (or the home snapshot) runs on a hot
+path, with representative parameters. The audit runs EXPLAIN on each one and
+flags full table scans, so a dropped index or a filter that stops matching
+one shows up before it reaches production.
+
+Register new hot paths with @hot_query next to the existing ones.
+"""
+from datetime import date
+
+from django.apps import apps
+from django.db.models import Count
+
+
+HOT_QUERIES = {}
+
+
+class HotQuery:
+    def __init__(self, name, build, allow_scans=()):
+        self.name = name
+        self.build = build
+        # Tables a full scan is expected on (e.g. a handful of categories)
+        self.allow_scans = set(allow_scans)
+
+
+def hot_query(name, allow_scans=()):
+    def decorator(func):
+        HOT_QUERIES[name] = HotQuery(name, func, allow_scans)
+        return func
+    return decorator
+
+
+def _services():
+    return apps.get_model('services', 'Service').objects
+
+
+# ---------------------------------------------------------------------------
+# core.views / core.home_snapshot
+# ---------------------------------------------------------------------------
+
+@hot_query('services listing (default order)')
+def services_listing():
+    return _services().filter(is_active=True).select_related('category', 'subcategory')[:10]
+
+
+@hot_query('services listing ?sort=rating')
+def services_by_rating():
+    return _services().filter(is_active=True).order_by('-rating', '-pk')[:11]
+
+
+@hot_query('services listing ?sort=newest')
+def services_by_newest():
+    return _services().filter(is_active=True).order_by('-created_at', '-pk')[:11]
+
+
+@hot_query('services listing count')
+def services_count():
+    return _services().filter(is_active=True).values('pk')
+
+
+@hot_query('services listing by category', allow_scans=['categories'])
+def services_by_category():
+    return _services().filter(is_active=True, category__slug__in=['cleaning']).select_related('category')[:10]
+
+
+@hot_query('home top rated services')
+def top_rated_services():
+    return _services().filter(is_active=True, rating__gte=4.0).order_by('-rating', '-total_reviews')[:8]
+
+
+@hot_query('home latest services')
+def latest_services():
+    return _services().filter(is_active=True).order_by('-created_at')[:8]
+
+
+@hot_query('home popular services')
+def popular_services():
+    return _services().filter(is_active=True, is_popular=True).order_by('-services_provided', '-rating')[:8]
+
+
+@hot_query('home featured services')
+def featured_services():
+    return _services().filter(is_featured=True, is_active=True).order_by('order', '-rating')[:8]
+
+
+@hot_query('home featured services by category')
+def featured_services_by_category():
+    return _services().filter(is_featured=True, is_active=True, category_id=1).order_by('order', '-rating')[:8]
+
+
+@hot_query('home latest services by category')
+def latest_services_by_category():
+    return _services().filter(is_active=True, category_id=1).order_by('-created_at')[:12]
+
+
+@hot_query('service details sub-services')
+def service_sub_services():
+    return apps.get_model('services', 'SubService').objects.filter(service_id=1)
+
+
+@hot_query('sidebar facet counts')
+def facet_counts():
+    return _services().filter(is_active=True).order_by().values_list(
+        'category__slug', 'subcategory__slug'
+    ).annotate(count=Count('pk'))
+
+
+# ---------------------------------------------------------------------------
+# bookings
+# ---------------------------------------------------------------------------
+
+@hot_query('booking success page')
+def booking_by_reference():
+    return apps.get_model('bookings', 'Booking').objects.filter(booking_reference='BK-20250101-000001')
+
+
+@hot_query('bookings by status, upcoming first')
+def bookings_by_status():
+    return apps.get_model('bookings', 'Booking').objects.filter(
+        status='confirmed', appointment_date__gte=date(2025, 1, 1)
+    ).order_by('appointment_date')[:50]
+
+
+# ---------------------------------------------------------------------------
+# quotations
+# ---------------------------------------------------------------------------
+
+@hot_query('service requests by status, newest first')
+def service_requests_by_status():
+    return apps.get_model('quotations', 'ServiceRequest').objects.filter(status='pending').order_by('-created_at')[:50]
+
+
+# ---------------------------------------------------------------------------
+# notifications
+# ---------------------------------------------------------------------------
+
+@hot_query('notification worker poll')
+def due_notification_jobs():
+    from django.utils import timezone
+    from notifications.worker import due
+    NotificationJob = apps.get_model('notifications', 'NotificationJob')
+    return NotificationJob.objects.filter(due(timezone.now())).order_by('run_after', 'pk').values_list('pk', flat=True)[:20]
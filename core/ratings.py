@@ -0,0 +1,167 @@
+"""
+Review totals per provider, per service and for the whole site
+
+Provider.rating/total_reviews and Service.rating/total_reviews are
+maintained from approved ProviderReviews (ratings 1-5). A RatingAggregate
+row per provider, per service and one for the site holds the running sum,
+count and star histogram.
+
+A review save or delete (signals in core.signals) applies the change in
+what it contributes to those rows with F() updates, then copies the new
+average and count onto the provider and service. That is a fixed handful
+of queries per review, however many reviews there are.
+
+queryset.update(), bulk_create() and raw SQL bypass the signals: run
+``python manage.py reconcile_ratings`` after them. It recounts every
+review in streamed chunks and repairs any drift.
+"""
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .caching import catalog_version
+
+
+SITE = ('site', 0)
+STARS = range(1, 6)
+
+
+def contribution(provider_id, service_id, rating, is_approved):
+    """What one review counts towards: (provider_id, service_id, rating), or None"""
+    if not is_approved or rating not in STARS:
+        return None
+    return provider_id, service_id, rating
+
+
+def contribution_of(review):
+    return contribution(review.provider_id, review.service_id, review.rating, review.is_approved)
+
+
+def scopes_of(provider_id, service_id):
+    scopes = [SITE, ('provider', provider_id)]
+    if service_id:
+        scopes.append(('service', service_id))
+    return scopes
+
+
+class Totals:
+    """Sum, count and histogram being added up (or applied as a change)"""
+
+    __slots__ = ('rating_sum', 'rating_count', 'stars')
+
+    def __init__(self):
+        self.rating_sum = 0
+        self.rating_count = 0
+        self.stars = [0] * 6  # by rating, [0] unused
+
+    def add(self, rating, sign=1):
+        self.rating_sum += sign * rating
+        self.rating_count += sign
+        self.stars[rating] += sign
+
+    def values(self):
+        return {
+            'rating_sum': self.rating_sum,
+            'rating_count': self.rating_count,
+            **{f'stars_{stars}': self.stars[stars] for stars in STARS},
+        }
+
+    def __bool__(self):
+        return any(self.values().values())
+
+
+def review_changed(before, after):
+    """
+    Apply a review going from contributing ``before`` to ``after`` (either
+    may be None, see contribution()) to the aggregates, the provider and
+    the service.
+    """
+    if before == after:
+        return
+    changes = defaultdict(Totals)
+    for counted, sign in ((before, -1), (after, 1)):
+        if counted is not None:
+            provider_id, service_id, rating = counted
+            for scope in scopes_of(provider_id, service_id):
+                changes[scope].add(rating, sign)
+
+    RatingAggregate = apps.get_model('core', 'RatingAggregate')
+    for (scope, object_id), change in changes.items():
+        if not change:
+            continue
+        updates = {field: F(field) + value for field, value in change.values().items() if value}
+        rows = RatingAggregate.objects.filter(scope=scope, object_id=object_id)
+        if not rows.update(**updates, updated_at=timezone.now()):
+            RatingAggregate.objects.bulk_create(
+                [RatingAggregate(scope=scope, object_id=object_id)], ignore_conflicts=True
+            )
+            rows.update(**updates, updated_at=timezone.now())
+
+    publish(
+        {object_id for scope, object_id in changes if scope == 'provider'},
+        {object_id for scope, object_id in changes if scope == 'service'},
+    )
+
+
+def average(rating_sum, rating_count, decimal_places):
+    """The average as a Decimal rounded like the rating field it is stored in"""
+    if not rating_count:
+        return Decimal(0)
+    return (Decimal(rating_sum) / Decimal(rating_count)).quantize(
+        Decimal(1).scaleb(-decimal_places), rounding=ROUND_HALF_UP
+    )
+
+
+def publish(provider_ids, service_ids):
+    """Copy the aggregates' average and count onto these providers and services"""
+    RatingAggregate = apps.get_model('core', 'RatingAggregate')
+    Provider = apps.get_model('providers', 'Provider')
+    Service = apps.get_model('services', 'Service')
+
+    rows = RatingAggregate.objects.filter(
+        Q(scope='provider', object_id__in=provider_ids) | Q(scope='service', object_id__in=service_ids)
+    ).values_list('scope', 'object_id', 'rating_sum', 'rating_count')
+    totals = {(scope, object_id): (rating_sum, rating_count) for scope, object_id, rating_sum, rating_count in rows}
+
+    for model, scope, ids, extra in (
+        (Provider, 'provider', provider_ids, {}),
+        # Service cards and detail pages are cached by updated_at
+        (Service, 'service', service_ids, {'updated_at': timezone.now()}),
+    ):
+        places = model._meta.get_field('rating').decimal_places
+        for pk in ids:
+            rating_sum, rating_count = totals.get((scope, pk), (0, 0))
+            model.objects.filter(pk=pk).update(
+                rating=average(rating_sum, rating_count, places),
+                total_reviews=rating_count,
+                **extra,
+            )
+    if provider_ids or service_ids:
+        # Listings sorted by rating; update() sends no signals
+        transaction.on_commit(catalog_version.bump)
+
+
+def site_totals():
+    """The site-wide RatingAggregate (unsaved and empty before the first review)"""
+    RatingAggregate = apps.get_model('core', 'RatingAggregate')
+    scope, object_id = SITE
+    return RatingAggregate.objects.filter(scope=scope, object_id=object_id).first() or RatingAggregate(
+        scope=scope, object_id=object_id
+    )
+
+
+def recount(chunk_size=2000):
+    """{(scope, object_id): Totals} from every approved review, read ``chunk_size`` rows at a time"""
+    ProviderReview = apps.get_model('providers', 'ProviderReview')
+    totals = defaultdict(Totals)
+    reviews = ProviderReview.objects.filter(
+        is_approved=True, rating__in=STARS
+    ).order_by().values_list('provider_id', 'service_id', 'rating')
+    for provider_id, service_id, rating in reviews.iterator(chunk_size=chunk_size):
+        for scope in scopes_of(provider_id, service_id):
+            totals[scope].add(rating)
+    return totals
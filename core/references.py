@@ -0,0 +1,50 @@
+"""
+Human-readable references for bookings and service requests
+
+References look like BK-20251211-000042: a prefix, the local date and a
+number that counts up from 1 each day. Numbers come from a ReferenceSequence
+row per (prefix, day), advanced with a single UPDATE ... SET last_value =
+last_value + n, so concurrent requests serialize on that row and can never
+draw the same number. A batch of n references reserves its whole block in
+one statement.
+
+Numbers are monotonic but not gapless: a rolled-back insert skips its number.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ReferenceSequence
+
+
+DIGITS = 6
+
+
+def format_reference(prefix, day, number):
+    return f"{prefix}-{day:%Y%m%d}-{number:0{DIGITS}d}"
+
+
+def reserve(prefix, count=1, day=None):
+    """Reserve ``count`` consecutive numbers for ``day`` (default: today). Returns the first one."""
+    day = day or timezone.localdate()
+    sequences = ReferenceSequence.objects.filter(prefix=prefix, day=day)
+    while True:
+        with transaction.atomic():
+            # Write first, so the row (on SQLite, the database) is locked
+            # before we read the new value back
+            if sequences.update(last_value=F('last_value') + count):
+                return sequences.values_list('last_value', flat=True).get() - count + 1
+        try:
+            with transaction.atomic():
+                ReferenceSequence.objects.create(prefix=prefix, day=day, last_value=count)
+                return 1
+        except IntegrityError:
+            # Another process created today's row first; go round and update it
+            continue
+
+
+def allocate(prefix, count=1, day=None):
+    """``count`` new references, in increasing order"""
+    day = day or timezone.localdate()
+    first = reserve(prefix, count, day)
+    return [format_reference(prefix, day, number) for number in range(first, first + count)]
@@ -0,0 +1,212 @@
+"""
+Responsive image width ladders
+
+Listing images are rendered from the uploaded source (up to 1200px wide)
+even where they are shown 210px wide. For the fields in LADDER_FIELDS,
+each source gets a ladder of narrower copies (RESPONSIVE_IMAGE_WIDTHS,
+never upscaled) in WebP and, when Pillow can encode it, AVIF:
+
+    CACHE/responsive/services/plumbing/<signature>-320w.webp
+    CACHE/responsive/services/plumbing/<signature>-320w.avif
+    ...
+
+The generated names and the source size are recorded in a manifest
+(core.models.ResponsiveImage, cached per source), so the
+``{% responsive_img %}`` tag (core.templatetags.responsive_images) builds
+``srcset``/``sizes`` without touching storage. The browser picks the
+format through ``<picture><source type="image/avif">``.
+
+Ladders are built by ``manage.py pregenerate_images``, and in the ImageKit
+pool (core.images: a background thread, or IMAGEKIT_POOL_WORKERS
+processes) when a source is saved or the tag meets a source without a
+manifest entry. Until the ladder exists the tag renders the plain
+``<img src>`` it replaces. Changing the widths, formats
+or quality changes the signature, so every ladder is rebuilt on demand.
+
+Settings:
+    RESPONSIVE_IMAGE_WIDTHS   ladder widths in pixels (default 320/640/960/1280)
+    RESPONSIVE_IMAGE_AVIF     also build AVIF variants (default True, if Pillow supports it)
+    RESPONSIVE_IMAGE_QUALITY  encoder quality per format
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from . import images
+from .models import ResponsiveImage
+
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = tuple(sorted(getattr(settings, 'RESPONSIVE_IMAGE_WIDTHS', (320, 640, 960, 1280))))
+AVIF_ENABLED = getattr(settings, 'RESPONSIVE_IMAGE_AVIF', True) and features.check('avif')
+QUALITY = {'avif': 55, 'webp': 80, **getattr(settings, 'RESPONSIVE_IMAGE_QUALITY', {})}
+
+# Best first: the order of the <source> elements
+FORMATS = ('avif', 'webp') if AVIF_ENABLED else ('webp',)
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+PILLOW_FORMATS = {'avif': 'AVIF', 'webp': 'WEBP'}
+
+SIGNATURE = hashlib.md5(
+    json.dumps([WIDTHS, FORMATS, [QUALITY[fmt] for fmt in FORMATS]]).encode()
+).hexdigest()[:8]
+
+CACHE_DIR = 'CACHE/responsive'
+
+# (model label, image field) pairs that get ladders
+LADDER_FIELDS = [
+    ('services.Service', 'featured_image'),
+    ('categories.Category', 'image'),
+]
+
+MANIFEST_TIMEOUT = 60 * 60 * 24
+# Sources without a ladder yet are re-checked after this many seconds
+MISSING_TIMEOUT = 60
+MISSING = {}
+
+
+def manifest_key(source):
+    return f'responsive_image:{SIGNATURE}:{hashlib.md5(source.encode()).hexdigest()}'
+
+
+def variant_name(source, width, fmt):
+    root, _ = os.path.splitext(source)
+    return f'{CACHE_DIR}/{root}/{SIGNATURE}-{width}w.{fmt}'
+
+
+def ladder_widths(source_width):
+    """Ladder widths for a source: every configured width below it, plus the source width if it is narrower than the top one"""
+    widths = [width for width in WIDTHS if width < source_width]
+    if source_width <= WIDTHS[-1]:
+        widths.append(source_width)
+    return widths or [source_width]
+
+
+def get_manifest(source):
+    """
+    The manifest entry of a source ({'width', 'height', 'variants'}), or
+    an empty dict when its ladder hasn't been built with the current settings
+    """
+    key = manifest_key(source)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    row = ResponsiveImage.objects.filter(source=source, signature=SIGNATURE).values(
+        'width', 'height', 'variants'
+    ).first()
+    entry = row or MISSING
+    cache.set(key, entry, MANIFEST_TIMEOUT if row else MISSING_TIMEOUT)
+    return entry
+
+
+def build_ladder(source, model_label=None, field_name=None, force=False):
+    """
+    Write every variant of one source image and record it in the manifest
+    (runs in a pool worker). Returns the manifest entry.
+
+    Variant names are derived from the source name and SIGNATURE, so
+    existing files are reused unless ``force`` is set; two workers building
+    the same ladder never delete each other's files.
+    """
+    with default_storage.open(source) as f:
+        image = Image.open(f)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    variants = {fmt: [] for fmt in FORMATS}
+    for width in ladder_widths(image.width):
+        height = max(round(image.height * width / image.width), 1)
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in FORMATS:
+            name = variant_name(source, width, fmt)
+            if default_storage.exists(name):
+                if not force:
+                    variants[fmt].append([width, name])
+                    continue
+                default_storage.delete(name)
+            buffer = io.BytesIO()
+            resized.save(buffer, PILLOW_FORMATS[fmt], quality=QUALITY[fmt])
+            variants[fmt].append([width, default_storage.save(name, ContentFile(buffer.getvalue()))])
+
+    entry = {'width': image.width, 'height': image.height, 'variants': variants}
+    ResponsiveImage.objects.update_or_create(source=source, defaults={'signature': SIGNATURE, **entry})
+    cache.set(manifest_key(source), entry, MANIFEST_TIMEOUT)
+
+    # Cached service cards are keyed by updated_at (core.templatetags.service_cards);
+    # bump it so they pick up the srcset
+    if model_label:
+        model = apps.get_model(model_label)
+        if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+            model.objects.filter(**{field_name: source}).update(updated_at=timezone.now())
+    return entry
+
+
+def ladder_complete(entry):
+    """Whether every variant of a manifest entry is in storage (for commands; rendering never checks)"""
+    return bool(entry) and all(
+        default_storage.exists(name)
+        for variants in entry['variants'].values() for width, name in variants
+    )
+
+
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def schedule_ladder(source, model_label=None, field_name=None):
+    """Build a ladder in the pool (core.images.get_pool) unless one is already queued for this source"""
+    with _pending_lock:
+        if source in _pending:
+            return
+        _pending.add(source)
+    future = images.get_pool().submit(build_ladder, source, model_label, field_name)
+    future.add_done_callback(lambda future: ladder_done(source, future))
+
+
+def request_ladder(image):
+    """
+    Queue the ladder of an image field file that has no manifest entry;
+    requests for the same source within MISSING_TIMEOUT are ignored.
+    """
+    if cache.add(f'{manifest_key(image.name)}:requested', True, MISSING_TIMEOUT):
+        schedule_ladder(image.name, image.instance._meta.label, image.field.name)
+
+
+def ladder_done(source, future):
+    with _pending_lock:
+        _pending.discard(source)
+    try:
+        entry = future.result()
+    except Exception:
+        logger.exception('Responsive image ladder failed', extra={'source': source})
+        return
+    # The worker's cache may not be this process's (e.g. LocMemCache)
+    cache.set(manifest_key(source), entry, MANIFEST_TIMEOUT)
+
+
+def field_label(model_label, field_name):
+    """The id pregenerate_images lists and matches ladders under"""
+    return f'responsive:{model_label.lower().replace(".", ":")}:{field_name}'
+
+
+def ladder_sources(model_label, field_name):
+    """Source names of every object with an image in the field"""
+    model = apps.get_model(model_label)
+    return list(
+        model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        .values_list(field_name, flat=True).distinct().iterator()
+    )
@@ -0,0 +1,190 @@
+"""
+Service search index
+
+The services listing searches Service name, short description, overview
+and category/subcategory names. The default backend keeps an SQLite FTS5
+virtual table (``service_search``, rowid = service id) in sync through the
+signals in core.signals and returns ranked, prefix-matched results. When
+FTS5 is unavailable (other databases, table not migrated yet) searches
+fall back to the icontains backend.
+
+The backend is pluggable through the SERVICE_SEARCH_BACKEND setting.
+
+Usage:
+    services_qs = search.get_backend().search(services_qs, keyword)
+"""
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models
+from django.db.models.expressions import RawSQL
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+
+SEARCH_TABLE = 'service_search'
+
+# Column weights for bm25(): name, short_description, overview, category, subcategory
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 3.0, 3.0)
+
+INDEX_BATCH_SIZE = 1000
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class BaseSearchBackend:
+    """Interface every service search backend implements"""
+
+    def is_available(self):
+        return True
+
+    def search(self, queryset, keyword, ranked=True):
+        """Narrow ``queryset`` to services matching ``keyword``.
+        With ``ranked`` the best matches come first; without it the
+        queryset ordering is left alone (cheaper, e.g. for counts)."""
+        raise NotImplementedError
+
+    def index(self, services):
+        """Add or refresh the given services in the index"""
+
+    def remove(self, pks):
+        """Remove the given service ids from the index"""
+
+    def rebuild(self):
+        """Reindex every service. Returns the number of services indexed."""
+        return 0
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    """Unindexed LIKE '%keyword%' search. Used when no index is available."""
+
+    def search(self, queryset, keyword, ranked=True):
+        return queryset.filter(
+            models.Q(name__icontains=keyword) |
+            models.Q(short_description__icontains=keyword) |
+            models.Q(overview__icontains=keyword) |
+            models.Q(category__name__icontains=keyword) |
+            models.Q(subcategory__name__icontains=keyword)
+        )
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    """Ranked prefix search over the service_search FTS5 table"""
+
+    _available = None
+
+    def is_available(self):
+        if self._available is None:
+            if connection.vendor != 'sqlite':
+                self._available = False
+            else:
+                self._available = SEARCH_TABLE in connection.introspection.table_names()
+        return self._available
+
+    @staticmethod
+    def build_match_query(keyword):
+        """Turn free text into an FTS5 query: every word must match as a prefix"""
+        tokens = TOKEN_RE.findall(keyword.lower())
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def search(self, queryset, keyword, ranked=True):
+        match = self.build_match_query(keyword)
+        if not match:
+            return queryset
+
+        if not ranked:
+            return queryset.filter(
+                pk__in=RawSQL(f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [match])
+            )
+
+        # Join the FTS table directly so SQLite drives the query from the
+        # index and computes bm25() once per match.
+        table = queryset.model._meta.db_table
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        return queryset.extra(
+            tables=[SEARCH_TABLE],
+            where=[f'{SEARCH_TABLE}.rowid = "{table}"."id"', f'{SEARCH_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'bm25({SEARCH_TABLE}, {weights})'},
+        ).order_by('search_rank', '-rating', 'pk')
+
+    @staticmethod
+    def document(service):
+        return (
+            service.pk,
+            service.name,
+            service.short_description,
+            strip_tags(service.overview or ''),
+            service.category.name if service.category_id else '',
+            service.subcategory.name if service.subcategory_id else '',
+        )
+
+    def _write(self, cursor, services):
+        rows = [self.document(service) for service in services]
+        if not rows:
+            return 0
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+            [(row[0],) for row in rows],
+        )
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} '
+            f'(rowid, name, short_description, overview, category, subcategory) '
+            f'VALUES (%s, %s, %s, %s, %s, %s)',
+            rows,
+        )
+        return len(rows)
+
+    def index(self, services):
+        if not self.is_available():
+            return
+        with connection.cursor() as cursor:
+            self._write(cursor, services)
+
+    def remove(self, pks):
+        if not self.is_available() or not pks:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(pk,) for pk in pks])
+
+    def rebuild(self):
+        if not self.is_available():
+            return 0
+        Service = apps.get_model('services', 'Service')
+        services = Service.objects.select_related('category', 'subcategory').order_by('pk')
+
+        indexed = 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+            batch = []
+            for service in services.iterator(chunk_size=INDEX_BATCH_SIZE):
+                batch.append(service)
+                if len(batch) >= INDEX_BATCH_SIZE:
+                    indexed += self._write(cursor, batch)
+                    batch = []
+            indexed += self._write(cursor, batch)
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        return indexed
+
+
+DEFAULT_BACKEND = 'core.search.SQLiteFTS5SearchBackend'
+
+_backend = None
+
+
+def get_backend():
+    """The configured backend, or the icontains backend if it is unavailable"""
+    global _backend
+    if _backend is None:
+        backend_class = import_string(getattr(settings, 'SERVICE_SEARCH_BACKEND', DEFAULT_BACKEND))
+        _backend = backend_class()
+    if not _backend.is_available():
+        return IContainsSearchBackend()
+    return _backend
+
+
+def reset_backend():
+    """Forget the cached backend (e.g. after the search table was created)"""
+    global _backend
+    _backend = None
@@ -0,0 +1,229 @@
+"""
+Signal handlers that keep cached, precomputed data in sync with the database
+"""
+import logging
+
+from django.apps import apps
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.utils import timezone
+
+from bookings import availability
+from . import caching, home_snapshot, ratings, responsive, search
+from .caching import catalog_version
+from .context_processors import nav_categories_cache
+from .whatsapp import whatsapp_numbers
+
+
+logger = logging.getLogger(__name__)
+
+
+def invalidate_home_snapshot_on_save(sender, instance, update_fields=None, **kwargs):
+    home_snapshot.invalidate_for_instance(sender, update_fields=update_fields)
+
+
+def invalidate_home_snapshot_on_delete(sender, instance, **kwargs):
+    home_snapshot.invalidate_for_instance(sender)
+
+
+def invalidate_nav_categories(sender, instance, **kwargs):
+    transaction.on_commit(nav_categories_cache.bump)
+
+
+def bump_catalog_version(sender, instance, **kwargs):
+    transaction.on_commit(catalog_version.bump)
+
+
+WHATSAPP_FIELDS = {'whatsapp_number', 'default_whatsapp', 'default_country_code'}
+
+
+def invalidate_whatsapp_numbers(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not WHATSAPP_FIELDS & set(update_fields):
+        return
+    transaction.on_commit(whatsapp_numbers.bump)
+
+
+SEARCH_INDEXED_FIELDS = {'name', 'short_description', 'overview', 'category', 'subcategory'}
+
+
+def index_service(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not SEARCH_INDEXED_FIELDS & set(update_fields):
+        return
+    search.get_backend().index([instance])
+
+
+def unindex_service(sender, instance, **kwargs):
+    search.get_backend().remove([instance.pk])
+
+
+def reindex_category_services(sender, instance, **kwargs):
+    """Category/subcategory names are part of every service document"""
+    services = instance.services.select_related('category', 'subcategory')
+    search.get_backend().index(services)
+
+
+def remember_subcategory_services(sender, instance, **kwargs):
+    # SET_NULL clears service.subcategory with a plain UPDATE, so collect
+    # the affected services before the subcategory is gone
+    instance._search_service_ids = list(instance.services.values_list('pk', flat=True))
+
+
+def reindex_subcategory_services(sender, instance, **kwargs):
+    Service = apps.get_model('services', 'Service')
+    services = Service.objects.filter(
+        pk__in=getattr(instance, '_search_service_ids', [])
+    ).select_related('category', 'subcategory')
+    search.get_backend().index(services)
+
+
+# Saves that only touch these fields don't change anything a service card shows
+CARD_IGNORED_FIELDS = {'active_services_count', 'updated_at'}
+
+
+def touch_related_services(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Service cards are cached by service.updated_at (core.templatetags.service_cards),
+    so bump it on the services of a changed category/subcategory/provider.
+    """
+    if created or (update_fields and not set(update_fields) - CARD_IGNORED_FIELDS):
+        return
+    related_name = 'services_provided' if sender._meta.label == 'providers.Provider' else 'services'
+    getattr(instance, related_name).update(updated_at=timezone.now())
+
+
+def touch_subcategory_services(sender, instance, **kwargs):
+    # The SET_NULL update leaves updated_at alone; services were collected in pre_delete
+    Service = apps.get_model('services', 'Service')
+    Service.objects.filter(
+        pk__in=getattr(instance, '_search_service_ids', [])
+    ).update(updated_at=timezone.now())
+
+
+def touch_parent_service(sender, instance, **kwargs):
+    # Cards show the starting sub-service price, and the service details page
+    # (validated by updated_at, see core.conditional) shows all of these rows
+    Service = apps.get_model('services', 'Service')
+    Service.objects.filter(pk=instance.service_id).update(updated_at=timezone.now())
+    if sender._meta.label == 'services.SubService':
+        transaction.on_commit(catalog_version.bump)
+
+
+def invalidate_availability(sender, instance, created=False, **kwargs):
+    """Slot indexes (bookings.availability) subtract the bookings that take a slot"""
+    if created and instance.status not in availability.BLOCKING_STATUSES:
+        return
+    calendars = availability.calendars_of([instance])
+    transaction.on_commit(lambda: availability.invalidate(calendars))
+
+
+def remember_review_contribution(sender, instance, raw=False, **kwargs):
+    """What the review counted towards before this save (see core.ratings)"""
+    before = None
+    if instance.pk and not raw:
+        row = sender.objects.filter(pk=instance.pk).values_list(
+            'provider_id', 'service_id', 'rating', 'is_approved'
+        ).first()
+        before = ratings.contribution(*row) if row else None
+    instance._rating_contribution = before
+
+
+def update_review_totals_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ratings.review_changed(getattr(instance, '_rating_contribution', None), ratings.contribution_of(instance))
+    instance._rating_contribution = ratings.contribution_of(instance)
+
+
+def update_review_totals_on_delete(sender, instance, **kwargs):
+    ratings.review_changed(ratings.contribution_of(instance), None)
+
+
+def queue_ladder(image):
+    """Never fail the save that uploaded the image: without a ladder the plain <img> is rendered"""
+    try:
+        responsive.request_ladder(image)
+    except Exception:
+        logger.exception('Responsive image ladder could not be queued', extra={'source': image.name})
+
+
+def queue_responsive_ladders(sender, instance, **kwargs):
+    """Queue width ladders for newly uploaded images (core.responsive) after the commit"""
+    for label, field_name in responsive.LADDER_FIELDS:
+        if label != sender._meta.label:
+            continue
+        image = getattr(instance, field_name)
+        if image and not responsive.get_manifest(image.name):
+            transaction.on_commit(lambda image=image: queue_ladder(image))
+
+
+def connect_signals():
+    """Connect cache invalidation receivers (called from CoreConfig.ready)"""
+    request_started.connect(caching.begin_request, dispatch_uid='cache_versions_begin_request')
+    request_finished.connect(caching.end_request, dispatch_uid='cache_versions_end_request')
+    for label in home_snapshot.tracked_models():
+        model = apps.get_model(label)
+        post_save.connect(
+            invalidate_home_snapshot_on_save,
+            sender=model,
+            dispatch_uid=f'home_snapshot_save_{label}',
+        )
+        post_delete.connect(
+            invalidate_home_snapshot_on_delete,
+            sender=model,
+            dispatch_uid=f'home_snapshot_delete_{label}',
+        )
+
+    for label in ('categories.Category', 'categories.SubCategory'):
+        model = apps.get_model(label)
+        post_save.connect(invalidate_nav_categories, sender=model, dispatch_uid=f'nav_categories_save_{label}')
+        post_delete.connect(invalidate_nav_categories, sender=model, dispatch_uid=f'nav_categories_delete_{label}')
+
+    Service = apps.get_model('services', 'Service')
+    Category = apps.get_model('categories', 'Category')
+    SubCategory = apps.get_model('categories', 'SubCategory')
+    post_save.connect(index_service, sender=Service, dispatch_uid='search_index_service')
+    post_delete.connect(unindex_service, sender=Service, dispatch_uid='search_unindex_service')
+    post_save.connect(reindex_category_services, sender=Category, dispatch_uid='search_reindex_category')
+    post_save.connect(reindex_category_services, sender=SubCategory, dispatch_uid='search_reindex_subcategory')
+    pre_delete.connect(remember_subcategory_services, sender=SubCategory, dispatch_uid='search_remember_subcategory')
+    post_delete.connect(reindex_subcategory_services, sender=SubCategory, dispatch_uid='search_subcategory_deleted')
+
+    for label in ('services.Service', 'categories.Category', 'categories.SubCategory', 'providers.Provider'):
+        model = apps.get_model(label)
+        post_save.connect(bump_catalog_version, sender=model, dispatch_uid=f'catalog_version_save_{label}')
+        post_delete.connect(bump_catalog_version, sender=model, dispatch_uid=f'catalog_version_delete_{label}')
+
+    for label in ('categories.Category', 'categories.SubCategory', 'providers.Provider'):
+        post_save.connect(
+            touch_related_services,
+            sender=apps.get_model(label),
+            dispatch_uid=f'service_cards_touch_{label}',
+        )
+    post_delete.connect(touch_subcategory_services, sender=SubCategory, dispatch_uid='service_cards_subcategory_deleted')
+    for label in ('services.SubService', 'services.AdditionalImage', 'services.ServiceInclude',
+                  'services.ServiceFAQ', 'services.BusinessHours'):
+        model = apps.get_model(label)
+        post_save.connect(touch_parent_service, sender=model, dispatch_uid=f'service_touch_save_{label}')
+        post_delete.connect(touch_parent_service, sender=model, dispatch_uid=f'service_touch_delete_{label}')
+
+    for label in ('services.Service', 'categories.Category', 'site_config.SiteConfiguration'):
+        model = apps.get_model(label)
+        post_save.connect(invalidate_whatsapp_numbers, sender=model, dispatch_uid=f'whatsapp_numbers_save_{label}')
+        post_delete.connect(invalidate_whatsapp_numbers, sender=model, dispatch_uid=f'whatsapp_numbers_delete_{label}')
+
+    ProviderReview = apps.get_model('providers', 'ProviderReview')
+    pre_save.connect(remember_review_contribution, sender=ProviderReview, dispatch_uid='ratings_review_before')
+    post_save.connect(update_review_totals_on_save, sender=ProviderReview, dispatch_uid='ratings_review_save')
+    post_delete.connect(update_review_totals_on_delete, sender=ProviderReview, dispatch_uid='ratings_review_delete')
+
+    Booking = apps.get_model('bookings', 'Booking')
+    post_save.connect(invalidate_availability, sender=Booking, dispatch_uid='availability_booking_save')
+    post_delete.connect(invalidate_availability, sender=Booking, dispatch_uid='availability_booking_delete')
+
+    for label, field_name in responsive.LADDER_FIELDS:
+        post_save.connect(
+            queue_responsive_ladders,
+            sender=apps.get_model(label),
+            dispatch_uid=f'responsive_ladders_{label}',
+        )
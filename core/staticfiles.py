@@ -0,0 +1,70 @@
+"""
+Production static files: content-hashed names, gzip/brotli precompression
+and pruning of files that are never served
+
+With STORAGES['staticfiles'] set to StaticFilesStorage, ``collectstatic``
+writes every file under a content-hashed name (css/style.4f1c2a9be0d3.css),
+rewrites the url() references inside CSS to the hashed names and writes
+.gz and .br copies next to each compressible file (brotli needs the
+``brotli`` package). WhiteNoiseMiddleware then serves the precompressed
+copy the client accepts, with a far-future ``immutable`` Cache-Control for
+hashed names.
+
+The vendored theme and icon CSS refers to font formats and images that
+were never shipped (e.g. fa-brands-400.ttf), which makes Django's
+manifest storage abort collectstatic. Those references are left as they
+are and listed as warnings instead.
+
+StaticFilesConfig replaces django.contrib.staticfiles in INSTALLED_APPS so
+collectstatic also skips STATICFILES_PRUNE_PATTERNS (SCSS sources,
+plugins no page uses). ``manage.py static_report`` shows the bytes each page
+template ships and the files nothing references.
+"""
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.apps import StaticFilesConfig as BaseStaticFilesConfig
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+logger = logging.getLogger(__name__)
+
+
+class StaticFilesConfig(BaseStaticFilesConfig):
+    ignore_patterns = BaseStaticFilesConfig.ignore_patterns + list(
+        getattr(settings, 'STATICFILES_PRUNE_PATTERNS', [])
+    )
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Hashed and precompressed static files (see WhiteNoise) that tolerate
+    url() references to missing files while post-processing and, with
+    WHITENOISE_MANIFEST_STRICT = False, {% static %} paths of missing files
+    """
+
+    missing_references = None
+
+    def post_process(self, *args, **kwargs):
+        self.missing_references = set()
+        try:
+            yield from super().post_process(*args, **kwargs)
+        finally:
+            for name in sorted(self.missing_references):
+                logger.warning('Static file referenced but not found', extra={'static_path': name})
+            self.missing_references = None
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            # The file doesn't exist: a url() target while post-processing, or a
+            # {% static %} path missing from the manifest. Keep the name unchanged.
+            if content is not None:
+                raise
+            if self.missing_references is not None:
+                self.missing_references.add(urlsplit(filename or name).path.strip())
+            elif self.manifest_strict:
+                raise
+            return name
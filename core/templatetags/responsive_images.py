@@ -0,0 +1,71 @@
+"""
+Responsive images from the width ladders in core.responsive
+
+    {% load responsive_images %}
+    {% responsive_img service.featured_image sizes="(max-width: 575.98px) 100vw, 210px" alt=service.name class="img-fluid" %}
+
+renders
+
+    <picture>
+      <source type="image/avif" srcset="...-320w.avif 320w, ..." sizes="...">
+      <img src="...-640w.webp" srcset="...-320w.webp 320w, ..." sizes="..." width="1200" height="800" alt="..." class="img-fluid" loading="lazy" decoding="async">
+    </picture>
+
+Other keyword arguments become attributes of the <img>. The srcsets come
+from the ladder manifest, so no file is opened or stat'ed. A source
+without a ladder yet renders as a plain ``<img src>`` of the original and
+its ladder is queued; ``fallback`` then sets an onerror replacement image.
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from core import responsive
+
+
+register = template.Library()
+
+# Width of the <img src> used by browsers without srcset support
+FALLBACK_WIDTH = 640
+
+
+def srcset(variants):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in variants)
+
+
+@register.simple_tag
+def responsive_img(image, sizes='100vw', fallback=None, **attrs):
+    if not image:
+        return ''
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+
+    entry = responsive.get_manifest(image.name)
+    if not entry:
+        responsive.request_ladder(image)
+        if fallback:
+            attrs['onerror'] = f"this.onerror=null; this.src='{fallback}'"
+        return format_html('<img src="{}"{}>', image.url, flatatt(attrs))
+
+    variants = entry['variants']
+    img_variants = variants['webp']
+    src = next((name for width, name in img_variants if width >= FALLBACK_WIDTH), img_variants[-1][1])
+    sources = format_html_join(
+        '',
+        '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (responsive.MIME_TYPES[fmt], srcset(variants[fmt]), sizes)
+            for fmt in responsive.FORMATS if fmt != 'webp' and fmt in variants
+        ),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}"{}></picture>',
+        sources,
+        default_storage.url(src),
+        srcset(img_variants),
+        sizes,
+        entry['width'],
+        entry['height'],
+        flatatt(attrs),
+    )
@@ -0,0 +1,95 @@
+"""
+Fragment cache for service cards
+
+    {% load service_cards %}
+    {% for service in services %}
+      {% cache_card service "listing" %}
+        ... card markup ...
+      {% endcache_card %}
+    {% endfor %}
+
+The rendered HTML is cached under (variant, service.pk, service.updated_at)
+plus a hash of the fragment's template source, so it is reused across
+pages and requests and replaced as soon as the service is saved or the
+card markup changes. The key also holds the static files manifest hash,
+since cards embed hashed {% static %} URLs that change on deploy. Saving
+a category, subcategory or provider bumps updated_at on its services
+(see core.signals), so their names never go stale on a card. Extra arguments after the variant (e.g. forloop.counter)
+are added to the key.
+
+Cards are kept in each process as well as in the shared cache (see
+core.caching.VersionedCache), so a warm card costs no cache round trip.
+Counters updated without a save (views_count, through core.counters) can
+lag by up to SERVICE_CARD_CACHE_TIMEOUT seconds; 0 disables the cache.
+"""
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+from core.caching import versioned_cache
+
+
+register = template.Library()
+
+CACHE_TIMEOUT = getattr(settings, 'SERVICE_CARD_CACHE_TIMEOUT', 60 * 10)
+
+
+def card_cache_key(variant, fragment_hash, service, vary_on=()):
+    updated_at = service.updated_at.timestamp() if service.updated_at else ''
+    static_version = getattr(staticfiles_storage, 'manifest_hash', '')
+    key = f'service_card:{variant}:{fragment_hash}:{static_version}:{service.pk}:{updated_at}'
+    if vary_on:
+        key += ':' + hashlib.md5(':'.join(str(value) for value in vary_on).encode()).hexdigest()
+    return key
+
+
+class CardCacheNode(template.Node):
+    def __init__(self, nodelist, service, variant, vary_on, fragment_hash):
+        self.nodelist = nodelist
+        self.service = service
+        self.variant = variant
+        self.vary_on = vary_on
+        self.fragment_hash = fragment_hash
+
+    def render(self, context):
+        service = self.service.resolve(context)
+        if not CACHE_TIMEOUT or service is None or not getattr(service, 'pk', None):
+            return self.nodelist.render(context)
+
+        key = card_cache_key(
+            self.variant.resolve(context),
+            self.fragment_hash,
+            service,
+            [value.resolve(context) for value in self.vary_on],
+        )
+        html = versioned_cache.get(key, CACHE_TIMEOUT)
+        if html is None:
+            html = self.nodelist.render(context)
+            versioned_cache.set(key, html, CACHE_TIMEOUT)
+        return html
+
+
+@register.tag('cache_card')
+def do_cache_card(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a service and a variant name")
+
+    # Hash the fragment's source tokens so edited markup gets new keys
+    tokens = parser.tokens[:]
+    nodelist = parser.parse(('endcache_card',))
+    body = tokens[len(parser.tokens):]
+    parser.delete_first_token()
+    fragment_hash = hashlib.md5(
+        '\x00'.join(f'{t.token_type}:{t.contents}' for t in body).encode()
+    ).hexdigest()[:12]
+
+    return CardCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+        fragment_hash,
+    )
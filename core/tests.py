@@ -1,3 +1,408 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from imagekit.cachefiles.backends import CacheFileState
+
+from bookings.models import Booking
+from core import caching, exports, home_snapshot, images, ratings, references, responsive
+from core.benchmark_data import seed_providers, seed_services
+from core.models import RatingAggregate, ReferenceSequence
+from core.pagination import CursorPaginator
+from providers.models import Provider, ProviderReview
+from services.models import Service
+
+
+class CursorPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_services(23)
+        # Plenty of ties, so pages have to break them on pk
+        for i, pk in enumerate(Service.objects.order_by('pk').values_list('pk', flat=True)):
+            Service.objects.filter(pk=pk).update(rating=i % 3)
+
+    def walk(self, sort, per_page=5):
+        """Every page from the first, following next_cursor"""
+        paginator = CursorPaginator(Service.objects.all(), per_page, sort=sort)
+        pages = [paginator.page()]
+        while pages[-1].has_next:
+            pages.append(paginator.page(pages[-1].next_cursor))
+        return paginator, pages
+
+    def test_forward_pages_list_every_row_once_in_order(self):
+        for sort, field in (('rating', 'rating'), ('newest', 'created_at')):
+            with self.subTest(sort=sort):
+                _, pages = self.walk(sort)
+                seen = [service.pk for page in pages for service in page]
+                expected = list(Service.objects.order_by(f'-{field}', '-pk').values_list('pk', flat=True))
+                self.assertEqual(seen, expected)
+                self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 3])
+                self.assertFalse(pages[0].has_previous)
+                self.assertTrue(all(page.has_previous for page in pages[1:]))
+
+    def test_previous_cursor_returns_the_page_before(self):
+        paginator, pages = self.walk('rating')
+        for before, page in zip(pages, pages[1:]):
+            previous = paginator.page(page.previous_cursor)
+            self.assertEqual([service.pk for service in previous], [service.pk for service in before])
+            self.assertTrue(previous.has_next)
+            self.assertEqual(previous.has_previous, before is not pages[0])
+
+    def test_next_and_previous_cursors_round_trip(self):
+        paginator, pages = self.walk('newest')
+        page = paginator.page(pages[1].next_cursor)
+        back = paginator.page(page.previous_cursor)
+        self.assertEqual([service.pk for service in back], [service.pk for service in pages[1]])
+
+    def test_bad_cursors_return_the_first_page(self):
+        paginator = CursorPaginator(Service.objects.all(), 5, sort='rating')
+        first = [service.pk for service in paginator.page()]
+        other_sort = CursorPaginator(Service.objects.all(), 5, sort='newest').page().next_cursor
+        for cursor in ('garbage', paginator.page().next_cursor + 'x', other_sort):
+            with self.subTest(cursor=cursor):
+                page = paginator.page(cursor)
+                self.assertEqual([service.pk for service in page], first)
+                self.assertFalse(page.has_previous)
+
+
+class ReferenceSequenceTests(TestCase):
+    day = date(2026, 3, 14)
+
+    def test_references_count_up_without_repeats(self):
+        singles = [references.allocate('BK', day=self.day)[0] for _ in range(3)]
+        batch = references.allocate('BK', 4, day=self.day)
+        self.assertEqual(singles, ['BK-20260314-000001', 'BK-20260314-000002', 'BK-20260314-000003'])
+        self.assertEqual(batch, [f'BK-20260314-{n:06d}' for n in range(4, 8)])
+        self.assertEqual(ReferenceSequence.objects.get(prefix='BK', day=self.day).last_value, 7)
+
+    def test_each_day_and_prefix_counts_from_one(self):
+        references.allocate('BK', 5, day=self.day)
+        self.assertEqual(references.reserve('BK', day=date(2026, 3, 15)), 1)
+        self.assertEqual(references.reserve('SR', day=self.day), 1)
+        self.assertEqual(references.reserve('BK', day=self.day), 6)
+
+    def test_bookings_get_unique_references(self):
+        seed_services(1)
+        service = Service.objects.get()
+        batch = Booking.generate_references(50)
+        booking = Booking(
+            service=service,
+            customer_first_name='Amina',
+            customer_last_name='Rahman',
+            customer_email='amina@example.com',
+            customer_phone='+971501234567',
+            location_latitude=25.2,
+            location_longitude=55.3,
+            location_address='12 Bench Street, Dubai',
+            appointment_date=self.day,
+            appointment_time='10:00 AM',
+        )
+        booking.save()
+        issued = batch + [booking.booking_reference]
+        self.assertEqual(len(set(issued)), 51)
+        self.assertEqual(issued, sorted(issued))
+
+
+class RatingTotalsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_services(2)
+        seed_providers(2)
+        cls.provider, cls.other_provider = Provider.objects.order_by('pk')
+        cls.service, cls.other_service = Service.objects.order_by('pk')
+        cls.users = get_user_model().objects.bulk_create(
+            [get_user_model()(username=f'reviewer-{i}', password='!') for i in range(4)]
+        )
+
+    def review(self, user, rating, provider=None, service=None, **fields):
+        return ProviderReview.objects.create(
+            provider=provider or self.provider, user=user, service=service, rating=rating, comment='Good work', **fields
+        )
+
+    def reconcile(self, *args):
+        out = io.StringIO()
+        call_command('reconcile_ratings', *args, stdout=out)
+        return out.getvalue()
+
+    def assertTotalsMatchReviews(self):
+        output = self.reconcile('--dry-run')
+        for label in ('review aggregates', 'provider ratings', 'service ratings'):
+            self.assertIn(f'All {label} are correct', output)
+
+    def test_review_changes_keep_totals_equal_to_a_recount(self):
+        first = self.review(self.users[0], 5, service=self.service)
+        second = self.review(self.users[1], 4, service=self.service)
+        hidden = self.review(self.users[2], 1, is_approved=False)
+        self.review(self.users[3], 3, provider=self.other_provider, service=self.other_service)
+        self.assertTotalsMatchReviews()
+
+        self.provider.refresh_from_db()
+        self.service.refresh_from_db()
+        self.assertEqual((self.provider.rating, self.provider.total_reviews), (Decimal('4.5'), 2))
+        self.assertEqual((self.service.rating, self.service.total_reviews), (Decimal('4.5'), 2))
+
+        hidden.is_approved = True
+        hidden.save()
+        self.assertTotalsMatchReviews()
+        self.provider.refresh_from_db()
+        self.assertEqual((self.provider.rating, self.provider.total_reviews), (Decimal('3.33'), 3))
+
+        second.rating = 2
+        second.service = self.other_service
+        second.save()
+        self.assertTotalsMatchReviews()
+
+        first.delete()
+        self.assertTotalsMatchReviews()
+        self.service.refresh_from_db()
+        self.assertEqual((self.service.rating, self.service.total_reviews), (Decimal(0), 0))
+        site = ratings.site_totals()
+        self.assertEqual((site.rating_sum, site.rating_count), (6, 3))
+
+    def test_reconcile_repairs_drift(self):
+        self.review(self.users[0], 5, service=self.service)
+        self.review(self.users[1], 2, service=self.service)
+        # queryset.update() and a lost aggregate row bypass the signals
+        ProviderReview.objects.filter(user=self.users[1]).update(rating=4)
+        RatingAggregate.objects.filter(scope='provider').delete()
+        Provider.objects.update(rating=1, total_reviews=9)
+
+        output = self.reconcile('--dry-run')
+        self.assertIn('would be fixed', output)
+        self.assertEqual(Provider.objects.get(pk=self.provider.pk).total_reviews, 9)
+
+        self.reconcile()
+        self.assertTotalsMatchReviews()
+        self.provider.refresh_from_db()
+        self.service.refresh_from_db()
+        self.assertEqual((self.provider.rating, self.provider.total_reviews), (Decimal('4.5'), 2))
+        self.assertEqual((self.service.rating, self.service.total_reviews), (Decimal('4.5'), 2))
+        self.other_provider.refresh_from_db()
+        self.assertEqual((self.other_provider.rating, self.other_provider.total_reviews), (Decimal(0), 0))
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_services(1)
+        service = Service.objects.get()
+        cls.bookings = []
+        for i, (created_at, appointment_date, first_name, phone, latitude) in enumerate((
+            (datetime(2026, 3, 1, 10, tzinfo=dt_timezone.utc), date(2026, 3, 10), 'Amina', '0501234567', '25.200000'),
+            (datetime(2026, 3, 1, 21, tzinfo=dt_timezone.utc), date(2026, 3, 11), '=HYPERLINK("http://x")', '+971501234567', '-25.200000'),
+            (datetime(2026, 3, 3, 8, tzinfo=dt_timezone.utc), date(2026, 3, 12), 'Omar', '@1234', '25.300000'),
+        )):
+            booking = Booking.objects.create(
+                service=service,
+                customer_first_name=first_name,
+                customer_last_name='Rahman',
+                customer_email=f'customer{i}@example.com',
+                customer_phone=phone,
+                location_latitude=Decimal(latitude),
+                location_longitude=Decimal('55.300000'),
+                location_address='<p>12 Bench Street,\n Dubai</p>',
+                appointment_date=appointment_date,
+                appointment_time='10:00 AM',
+            )
+            Booking.objects.filter(pk=booking.pk).update(created_at=created_at)
+            cls.bookings.append(booking)
+
+    def csv_rows(self, **options):
+        return list(csv.reader(io.StringIO(''.join(exports.export('bookings', **options)))))
+
+    def references(self, **options):
+        return [row[0] for row in self.csv_rows(columns=['reference'], **options)[1:]]
+
+    def test_columns(self):
+        default = self.csv_rows()
+        self.assertEqual(default[0], exports.DATASETS['bookings'].default_columns())
+        self.assertNotIn('admin_notes', default[0])
+
+        rows = self.csv_rows(columns=['appointment_date', 'reference', 'location_address'])
+        self.assertEqual(rows[0], ['appointment_date', 'reference', 'location_address'])
+        self.assertEqual(
+            rows[1:],
+            [[str(b.appointment_date), b.booking_reference, '12 Bench Street, Dubai'] for b in self.bookings],
+        )
+
+        for options in ({'columns': ['reference', 'password']}, {'date_field': 'updated_at'}, {'fmt': 'xlsx'}):
+            with self.subTest(**options), self.assertRaises(ValueError):
+                exports.export('bookings', **options)
+
+    def test_date_ranges_include_both_days(self):
+        first, second, third = [booking.booking_reference for booking in self.bookings]
+        self.assertEqual(self.references(date_from=date(2026, 3, 1), date_to=date(2026, 3, 1)), [first, second])
+        self.assertEqual(self.references(date_from=date(2026, 3, 2)), [third])
+        self.assertEqual(self.references(date_to=date(2026, 3, 2)), [first, second])
+        self.assertEqual(
+            self.references(date_field='appointment_date', date_from=date(2026, 3, 11), date_to=date(2026, 3, 12)),
+            [second, third],
+        )
+        self.assertEqual(self.references(date_field='appointment_date', date_to=date(2026, 3, 9)), [])
+
+    @override_settings(TIME_ZONE='Asia/Dubai')
+    def test_created_at_days_are_local_days(self):
+        # 21:00 UTC on March 1 is already March 2 in Dubai
+        _, second, third = [booking.booking_reference for booking in self.bookings]
+        self.assertEqual(self.references(date_from=date(2026, 3, 2), date_to=date(2026, 3, 3)), [second, third])
+        rows = self.csv_rows(columns=['created_at'], date_from=date(2026, 3, 2), date_to=date(2026, 3, 2))
+        self.assertEqual(rows[1:], [['2026-03-02T01:00:00+04:00']])
+
+    def test_csv_escapes_formulas_and_ndjson_does_not(self):
+        columns = ['customer_first_name', 'customer_phone', 'location_latitude']
+        self.assertEqual(self.csv_rows(columns=columns)[1:], [
+            ['Amina', '0501234567', '25.200000'],
+            ['\'=HYPERLINK("http://x")', '+971501234567', '-25.200000'],
+            ['Omar', "'@1234", '25.300000'],
+        ])
+        lines = ''.join(exports.export('bookings', columns=columns, fmt='ndjson')).splitlines()
+        self.assertEqual(json.loads(lines[1]), {
+            'customer_first_name': '=HYPERLINK("http://x")',
+            'customer_phone': '+971501234567',
+            'location_latitude': '-25.200000',
+        })
+
+    def test_export_data_command(self):
+        out = io.StringIO()
+        call_command(
+            'export_data', 'bookings', '--format', 'ndjson', '--columns', 'reference, status',
+            '--date-field', 'appointment_date', '--date-from', '2026-03-12', stdout=out,
+        )
+        self.assertEqual(
+            [json.loads(line) for line in out.getvalue().splitlines()],
+            [{'reference': self.bookings[2].booking_reference, 'status': 'pending'}],
+        )
+        for args in (['--columns', 'nope'], ['--date-from', '12/03/2026']):
+            with self.subTest(args=args), self.assertRaises(CommandError):
+                call_command('export_data', 'bookings', *args, stdout=io.StringIO())
+
+
+class CacheVersionTests(TestCase):
+
+    def setUp(self):
+        self.versions = [caching.CacheVersion(f'test:{name}:version') for name in ('a', 'b', 'c')]
+        self.addCleanup(caching.end_request)
+
+    def test_a_request_reads_every_version_in_one_query(self):
+        a, b, c = self.versions
+        first = {version.key: version.get() for version in [*self.versions, caching.catalog_version]}
+
+        caching.begin_request()
+        with self.assertNumQueries(1):
+            self.assertEqual(a.get(), first[a.key])
+            self.assertEqual(caching.catalog_version.get(), first[caching.catalog_version.key])
+            self.assertEqual(c.get(), first[c.key])
+
+        # Another process bumps b: seen by the next request, not halfway through this one
+        cache.set(b.key, 'bumped elsewhere', None)
+        with self.assertNumQueries(0):
+            self.assertEqual(b.get(), first[b.key])
+        caching.begin_request()
+        self.assertEqual(b.get(), 'bumped elsewhere')
+
+        c.bump()
+        with self.assertNumQueries(0):
+            self.assertNotEqual(c.get(), first[c.key])
+
+    def test_versioned_values_are_kept_in_the_process(self):
+        versioned = caching.VersionedCache(size=2)
+        versioned.set('test:1', 'one', 60)
+        versioned.set('test:2', 'two', None)
+        with self.assertNumQueries(0):
+            self.assertEqual(versioned.get_many(['test:1', 'test:2']), {'test:1': 'one', 'test:2': 'two'})
+
+        versioned.set('test:3', 'three', 60)  # Drops test:1, the least recently used
+        with self.assertNumQueries(1):
+            self.assertEqual(versioned.get('test:1', 60), 'one')
+        with self.assertNumQueries(0):
+            self.assertEqual(versioned.get('test:1'), 'one')
+
+
+class HomeSnapshotStatsTests(TestCase):
+
+    def setUp(self):
+        home_snapshot.reset_stats()
+
+    @mock.patch.object(home_snapshot, 'STATS_FLUSH_INTERVAL', 3600)
+    def test_serving_sections_writes_nothing_until_the_stats_are_flushed(self):
+        names = ['hero_stats', 'testimonials']
+        home_snapshot.get_context(names)
+        # The section versions, then both sections from this process
+        with self.assertNumQueries(1):
+            home_snapshot.get_context(names)
+
+        self.assertEqual(home_snapshot.get_stats()['hits'], 2)
+        self.assertEqual(home_snapshot.get_stats()['misses'], 2)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT expires FROM django_cache WHERE cache_key LIKE %s', ['%home_snapshot:stats:hits'])
+            (expires,), = cursor.fetchall()
+        self.assertEqual(str(expires)[:4], '9999')
+
+
+class ConditionalGetTests(TestCase):
+
+    def test_revalidating_reads_the_versions_once_and_writes_nothing(self):
+        response = self.client.get('/categories/')
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/categories/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        with self.assertNumQueries(1):
+            revalidated = self.client.get('/categories/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_last_modified_is_the_latest_version_bump(self):
+        with mock.patch('time.time', return_value=2_000_000_000.5):
+            caching.catalog_version.bump()
+        response = self.client.get('/categories/')
+        self.assertEqual(response['Last-Modified'], 'Wed, 18 May 2033 03:33:20 GMT')
+
+        with mock.patch('time.time', return_value=2_000_000_100):
+            caching.catalog_version.bump()
+        response = self.client.get('/categories/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Last-Modified'], 'Wed, 18 May 2033 03:35:00 GMT')
+
+
+class ImageBackendTests(TestCase):
+
+    def test_missing_specs_are_queued_instead_of_generated_by_the_caller(self):
+        backend = images.PoolBackend()
+        file = mock.Mock()
+        file.name = 'CACHE/images/services/plumbing/card.jpg'
+        pool = mock.Mock()
+        with mock.patch.object(images, 'get_pool', return_value=pool), \
+                mock.patch.object(backend, '_exists', return_value=False), \
+                mock.patch.object(backend.cache, 'set', wraps=backend.cache.set) as cache_set:
+            backend.generate(file)
+            backend.generate(file)
+
+        pool.submit.assert_called_once_with(images.generate_file, file, False)
+        file._generate.assert_not_called()
+        # Queued specs don't stay 'generating' forever if their worker dies
+        cache_set.assert_called_with(backend.get_key(file), CacheFileState.GENERATING, images.GENERATING_TIMEOUT)
+
+    def test_uploads_queue_their_ladder_after_the_commit_and_log_failures(self):
+        seed_services(1)
+        service = Service.objects.get()
+        service.featured_image = 'services/plumbing.jpg'
+        with mock.patch.object(images, 'get_pool'), \
+                mock.patch.object(responsive, 'build_ladder') as build_ladder, \
+                mock.patch.object(responsive, 'schedule_ladder', side_effect=RuntimeError('pool is down')) as schedule_ladder, \
+                self.assertLogs('core.signals', 'ERROR') as logs, \
+                self.captureOnCommitCallbacks(execute=True):
+            service.save()
+
+        schedule_ladder.assert_called_once_with('services/plumbing.jpg', 'services.Service', 'featured_image')
+        build_ladder.assert_not_called()
+        self.assertIn('could not be queued', logs.output[0])
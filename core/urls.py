@@ -17,4 +17,5 @@ urlpatterns = [
     path('service/request/data/', views.get_service_request_data, name='service_request_data'),
     path('filter-preferred-services/', views.filter_preferred_services, name='filter_preferred_services'),
     path('filter-latest-services/', views.filter_latest_services, name='filter_latest_services'),
+    path('metrics/requests/', views.request_metrics, name='request_metrics'),
 ]
\ No newline at end of file
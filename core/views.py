@@ -1,200 +1,42 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.contrib.admin.views.decorators import staff_member_required
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db import models
-from django.db.models import Count, Avg
+from django.db.models import F
 import json
+import logging
 
 from categories.models import Category, SubCategory
 from services.models import *
-from providers.models import Provider
-from content.models import Testimonial, BlogPost
-from bookings.models import Booking
 
+from . import facets, home_snapshot, metrics, pagination, search
+from .caching import catalog_version
+from .conditional import catalog_versions, conditional_page, home_sections
+from .counters import service_views
+from .partials import render_partial
 
+
+logger = logging.getLogger(__name__)
+
+
+@conditional_page(home_sections(home_snapshot.HOME_SECTIONS))
 def home(request):
-    """Home page with all dynamic data"""
-    
-    # Hero Section Stats
-    total_services = Service.objects.filter(is_active=True).count()
-    total_providers = Provider.objects.filter(is_active=True).count()
-    total_bookings = Booking.objects.count()
-    total_reviews = Service.objects.aggregate(total=models.Sum('total_reviews'))['total'] or 0
-    
-    # Categories
-    featured_categories = Category.objects.filter(
-        is_featured=True, 
-        is_active=True
-    ).annotate(
-        service_count=Count('services', filter=models.Q(services__is_active=True))
-    )[:6]
-    
-    # Services - Different types
-    top_rated_services = Service.objects.filter(
-        is_active=True,
-        rating__gte=4.0
-    ).select_related('category', 'subcategory', 'provider').order_by('-rating', '-total_reviews')[:8]
-    
-    latest_services = Service.objects.filter(
-        is_active=True
-    ).select_related('category', 'subcategory', 'provider').order_by('-created_at')[:8]
-    
-    popular_services = Service.objects.filter(
-        is_popular=True, 
-        is_active=True
-    ).select_related('category', 'subcategory', 'provider').order_by('-services_provided', '-rating')[:8]
-    
-    featured_services = Service.objects.filter(
-        is_featured=True,
-        is_active=True
-    ).select_related('category', 'subcategory', 'provider').order_by('order', '-rating')[:8]
-    
-    # Providers
-    popular_providers = Provider.objects.filter(
-        is_featured=True, 
-        is_active=True
-    ).annotate(
-        service_count=Count('services_provided', filter=models.Q(services_provided__is_active=True))
-    ).order_by('-rating', '-total_reviews')[:4]
-    
-    # Content
-    testimonials = Testimonial.objects.filter(
-        is_featured=True, 
-        is_active=True
-    ).select_related('service').order_by('order', '-created_at')[:6]
-    
-    blog_posts = BlogPost.objects.filter(
-        is_published=True
-    ).select_related('author', 'category').order_by('-published_at', '-created_at')[:3]
-    
-    context = {
-        # Hero Stats
-        'total_services': total_services,
-        'total_providers': total_providers,
-        'total_bookings': total_bookings,
-        'total_reviews': total_reviews,
-        
-        # Categories
-        'featured_categories': featured_categories,
-        
-        # Services
-        'top_rated_services': top_rated_services,
-        'latest_services': latest_services,
-        'popular_services': popular_services,
-        'featured_services': featured_services,
-        
-        # Providers
-        'popular_providers': popular_providers,
-        
-        # Content
-        'testimonials': testimonials,
-        'blog_posts': blog_posts,
-    }
+    """Home page with all dynamic data (served from the home snapshot)"""
+    context = home_snapshot.get_context(home_snapshot.HOME_SECTIONS)
     return render(request, 'home.html', context)
 
 
+@conditional_page(home_sections(home_snapshot.HOME_CONTENT_SECTIONS))
 def home_content(request):
-    """Return home page content for HTMX lazy loading"""
-    
-    # Categories
-    featured_categories = Category.objects.filter(
-        is_featured=True, 
-        is_active=True
-    ).annotate(
-        service_count=Count('services', filter=models.Q(services__is_active=True))
-    )[:6]
-    
-    # Services - Different types
-    top_rated_services = Service.objects.filter(
-        is_active=True,
-        rating__gte=4.0
-    ).select_related('category', 'subcategory', 'provider').prefetch_related('sub_services', 'additional_images').order_by('-rating', '-total_reviews')[:8]
-    
-    latest_services = Service.objects.filter(
-        is_active=True
-    ).select_related('category', 'subcategory', 'provider').prefetch_related('sub_services', 'additional_images').order_by('-created_at')[:8]
-    
-    # Get categories that have latest services for filtering
-    latest_categories = Category.objects.filter(
-        services__is_active=True,
-        is_active=True
-    ).annotate(
-        service_count=Count('services', filter=models.Q(services__is_active=True))
-    ).order_by('-service_count')[:6]
-    
-    popular_services = Service.objects.filter(
-        is_popular=True, 
-        is_active=True
-    ).select_related('category', 'subcategory', 'provider').prefetch_related('sub_services', 'additional_images').order_by('-services_provided', '-rating')[:8]
-    
-    featured_services = Service.objects.filter(
-        is_featured=True,
-        is_active=True
-    ).select_related('category', 'subcategory', 'provider').prefetch_related('sub_services', 'additional_images').order_by('order', '-rating')[:8]
-    
-    # Providers
-    popular_providers = Provider.objects.filter(
-        is_featured=True, 
-        is_active=True
-    ).annotate(
-        service_count=Count('services_provided', filter=models.Q(services_provided__is_active=True))
-    ).order_by('-rating', '-total_reviews')[:4]
-    
-    # Content
-    testimonials = Testimonial.objects.filter(
-        is_featured=True, 
-        is_active=True
-    ).select_related('service').order_by('order', '-created_at')[:6]
-    
-    blog_posts = BlogPost.objects.filter(
-        is_published=True
-    ).select_related('author', 'category').order_by('-published_at', '-created_at')[:3]
-    
-    # All Categories with Services Section
-    all_categories_with_services = Category.objects.annotate(
-        service_count=Count('services', filter=models.Q(services__is_active=True))
-    ).filter(
-        is_active=True
-    ).order_by('-updated_at', '-created_at')[:12]
-    
-    # Category Services Section - Get first category by created_at
-    category_for_services = Category.objects.filter(
-        is_active=True
-    ).annotate(
-        service_count=Count('services', filter=models.Q(services__is_active=True))
-    ).filter(service_count__gte=1).order_by('-created_at').first()
-    
-    category_left_services = []
-    category_right_services = []
-    if category_for_services:
-        all_category_services = Service.objects.filter(
-            category=category_for_services,
-            is_active=True
-        ).select_related('category', 'provider').order_by('-rating', '-created_at')
-        
-        category_left_services = all_category_services[:4]
-        category_right_services = all_category_services[4:6]
-
-    context = {
-        'featured_categories': featured_categories,
-        'top_rated_services': top_rated_services,
-        'latest_services': latest_services,
-        'latest_categories': latest_categories,
-        'popular_services': popular_services,
-        'featured_services': featured_services,
-        'popular_providers': popular_providers,
-        'testimonials': testimonials,
-        'blog_posts': blog_posts,
-        'all_categories_with_services': all_categories_with_services,
-        'category_for_services': category_for_services,
-        'category_left_services': category_left_services,
-        'category_right_services': category_right_services,
-    }
-    return render(request, 'components/home/home_content_partial.html', context)
+    """Return home page content for HTMX lazy loading (served from the home snapshot)"""
+    context = home_snapshot.get_context(home_snapshot.HOME_CONTENT_SECTIONS)
+    return render_partial(request, 'components/home/home_content_partial.html', context)
 
 
+@conditional_page(catalog_versions)
 def services(request):
     # Get filter parameters
     keyword = request.GET.get('keyword', '')
@@ -205,13 +47,9 @@ def services(request):
     # Start with all active services
     services_qs = Service.objects.filter(is_active=True).select_related('category', 'subcategory')
     
-    # Apply keyword search
+    # Apply keyword search (ranked full-text search, see core.search)
     if keyword:
-        services_qs = services_qs.filter(
-            models.Q(name__icontains=keyword) |
-            models.Q(short_description__icontains=keyword) |
-            models.Q(description__icontains=keyword)
-        )
+        services_qs = search.get_backend().search(services_qs, keyword)
     
     # Apply category filter
     if categories and 'all' not in categories:
@@ -221,22 +59,43 @@ def services(request):
     if subcategories and 'all' not in subcategories:
         services_qs = services_qs.filter(subcategory__slug__in=subcategories)
     
-    # Pagination
-    paginator = Paginator(services_qs, 10)  # 10 services per page
-    try:
-        services_page = paginator.page(page)
-    except PageNotAnInteger:
-        services_page = paginator.page(1)
-    except EmptyPage:
-        services_page = paginator.page(paginator.num_pages)
+    # Pagination: offset pages by default, keyset pages with ?paginate=cursor
+    # (or SERVICES_PAGINATION = 'cursor'), see core.pagination
+    pagination_mode = request.GET.get('paginate') or getattr(settings, 'SERVICES_PAGINATION', 'offset')
+    if pagination_mode == 'cursor':
+        sort = request.GET.get('sort', pagination.DEFAULT_SORT)
+        services_page = pagination.CursorPaginator(services_qs, 10, sort=sort).page(request.GET.get('cursor'))
+        services_count = pagination.cached_count(
+            services_qs,
+            pagination.filter_cache_key(
+                'services_count',
+                keyword=keyword,
+                category=[] if 'all' in categories else categories,
+                subcategory=[] if 'all' in subcategories else subcategories,
+            ),
+        )
+        paginator = None
+    else:
+        paginator = Paginator(services_qs, 10)  # 10 services per page
+        try:
+            services_page = paginator.page(page)
+        except PageNotAnInteger:
+            services_page = paginator.page(1)
+        except EmptyPage:
+            services_page = paginator.page(paginator.num_pages)
+        services_count = paginator.count
+    
+    # Sidebar counts for the current filters (one cached grouped query, see core.facets)
+    facet_counts = facets.service_facets(keyword, categories, subcategories)
     
     context = {
         'services': services_page,
-        'services_count': paginator.count,
-        'all_categories': Category.objects.filter(is_active=True),
-        'all_subcategories': SubCategory.objects.filter(is_active=True),
+        'services_count': services_count,
+        'all_categories': facets.attach_counts(Category.objects.filter(is_active=True), facet_counts['categories']),
+        'all_subcategories': facets.attach_counts(SubCategory.objects.filter(is_active=True), facet_counts['subcategories']),
         'paginator': paginator,
         'page_obj': services_page,
+        'cursor_page': services_page if paginator is None else None,
     }
     
     # Include currently selected filters in context so the sidebar can reflect checked state
@@ -248,7 +107,7 @@ def services(request):
     
     # If it's an HTMX request, return the entire row (sidebar + product section) so UI updates cleanly
     if request.headers.get('HX-Request'):
-        return render(request, 'components/services/services_row_partial.html', context)
+        return render_partial(request, 'components/services/services_row_partial.html', context)
     
     return render(request, 'services.html', context)
 
@@ -265,11 +124,11 @@ def search_categories(request):
         categories_qs = categories_qs.filter(name__icontains=search_query)
     
     context = {
-        'categories': categories_qs,
+        'categories': facets.attach_counts(categories_qs, facets.service_facets()['categories']),
         'show_all': True,
     }
     
-    return render(request, 'components/services/category_list_partial.html', context)
+    return render_partial(request, 'components/services/category_list_partial.html', context)
 
 
 def search_subcategories(request):
@@ -284,13 +143,26 @@ def search_subcategories(request):
         subcategories_qs = subcategories_qs.filter(name__icontains=search_query)
     
     context = {
-        'subcategories': subcategories_qs,
+        'subcategories': facets.attach_counts(subcategories_qs, facets.service_facets()['subcategories']),
         'show_all': True,
     }
     
-    return render(request, 'components/services/subcategory_list_partial.html', context)
+    return render_partial(request, 'components/services/subcategory_list_partial.html', context)
+
 
+def service_version(request, pk):
+    """Validator of the service details page; None lets the view 404"""
+    updated_at = Service.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    return None if updated_at is None else [catalog_version.get(), updated_at]
 
+
+def count_service_view(request, pk):
+    # The page wasn't rendered, but it was viewed
+    service_views.increment(pk)
+
+
+# Private: the page has the booking form's CSRF token
+@conditional_page(service_version, shared=False, not_modified=count_service_view)
 def service_details(request, pk):
     """
     Service details view with all related data:
@@ -366,25 +238,20 @@ def booking(request, service_id):
         location_longitude = request.POST.get('location_longitude')
         location_address = request.POST.get('location_address')
         
-        # Debug: Print received data
-        print("=" * 50)
-        print("Booking POST Data Received:")
-        print(f"Service ID: {service_id}")
-        print(f"Service Name: {service.name}")
-        print(f"Provider: {provider.business_name if provider else 'N/A'}")
-        print(f"Location: {location_address}")
-        print(f"Coordinates: {location_latitude}, {location_longitude}")
-        print(f"Sub-services JSON: {selected_sub_services_json}")
-        print("=" * 50)
-        
         # Parse selected sub-services
         try:
             selected_sub_services = json.loads(selected_sub_services_json) if selected_sub_services_json else []
-            print(f"Parsed sub-services: {selected_sub_services}")
         except Exception as e:
-            print(f"Error parsing sub-services: {e}")
+            logger.warning('Could not parse selected sub-services: %s', e, extra={'service_id': service_id})
             selected_sub_services = []
         
+        logger.debug('Booking form posted', extra={
+            'service_id': service_id,
+            'provider_id': provider.pk if provider else None,
+            'has_location': bool(location_latitude and location_longitude),
+            'sub_services': len(selected_sub_services),
+        })
+        
         # Update context with POST data
         context.update({
             'selected_sub_services': selected_sub_services,
@@ -528,6 +395,7 @@ def get_service_request_data(request):
     return JsonResponse({'data': data})
 
 
+@conditional_page(catalog_versions)
 def filter_preferred_services(request):
     """Filter preferred services by category using HTMX"""
     category_slug = request.GET.get('category', 'all')
@@ -536,9 +404,7 @@ def filter_preferred_services(request):
     featured_categories = Category.objects.filter(
         is_featured=True, 
         is_active=True
-    ).annotate(
-        service_count=Count('services', filter=models.Q(services__is_active=True))
-    )[:6]
+    ).annotate(service_count=F('active_services_count'))[:6]
     
     # Filter services based on category
     if category_slug == 'all':
@@ -559,20 +425,19 @@ def filter_preferred_services(request):
         'featured_categories': featured_categories,
     }
     
-    return render(request, 'components/home/preferred_services_partial.html', context)
+    return render_partial(request, 'components/home/preferred_services_partial.html', context)
 
 
+@conditional_page(catalog_versions)
 def filter_latest_services(request):
     """Filter latest services by category using HTMX"""
     category_id = request.GET.get('category', 'all')
     
     # Get categories that have services for filtering
     latest_categories = Category.objects.filter(
-        services__is_active=True,
+        active_services_count__gt=0,
         is_active=True
-    ).annotate(
-        service_count=Count('services', filter=models.Q(services__is_active=True))
-    ).order_by('-service_count')[:6]
+    ).annotate(service_count=F('active_services_count')).order_by('-service_count')[:6]
     
     # Filter services based on category
     if category_id == 'all':
@@ -590,9 +455,25 @@ def filter_latest_services(request):
         'latest_categories': latest_categories,
     }
     
-    return render(request, 'components/home/latest_services_partial.html', context)
+    return render_partial(request, 'components/home/latest_services_partial.html', context)
 
 
+@conditional_page(catalog_versions)
 def categories(request):
     categories = Category.objects.filter(is_active=True)
-    return render(request, 'categories.html', {'categories': categories})
\ No newline at end of file
+    return render(request, 'categories.html', {'categories': categories})
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def request_metrics(request):
+    """Per-route query count and timing percentiles for this process (staff only). POST resets them."""
+    if request.method == 'POST':
+        metrics.route_metrics.reset()
+    routes = metrics.route_metrics.summary()
+    ordered = sorted(routes.items(), key=lambda item: item[1]['total_ms']['p95'], reverse=True)
+    return JsonResponse({
+        'window': metrics.route_metrics.window,
+        'sample_rate': metrics.SAMPLE_RATE,
+        'routes': dict(ordered),
+    })
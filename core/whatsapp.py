@@ -0,0 +1,79 @@
+"""
+WhatsApp number resolution for booking and service request notifications
+
+The number for a service is the service's own number, else its category's,
+else the site default, normalized to international digits (E.164 without
+the leading +, as wa.me expects) using the site's default country code.
+
+All configured numbers are normalized once and kept in a CachedValue table
+(site default, per-category and per-service overrides), so resolving a
+number costs no queries. core.signals bumps the table when a Service,
+Category or the SiteConfiguration changes.
+"""
+from django.apps import apps
+
+from .caching import CachedValue
+
+
+DEFAULT_COUNTRY_CODE = '971'
+
+
+def normalize_number(number, country_code=DEFAULT_COUNTRY_CODE):
+    """
+    International digits for a phone number, or None if it has no digits.
+    Numbers written with + or 00 are kept as they are; local numbers get
+    ``country_code`` (replacing a leading trunk 0).
+    """
+    number = (number or '').strip()
+    digits = ''.join(filter(str.isdigit, number))
+    if not digits:
+        return None
+    if number.startswith('+'):
+        return digits
+    if digits.startswith('00'):
+        return digits[2:]
+    if digits.startswith('0'):
+        return country_code + digits[1:]
+    if not digits.startswith(country_code):
+        return country_code + digits
+    return digits
+
+
+def build_table():
+    SiteConfiguration = apps.get_model('site_config', 'SiteConfiguration')
+    Category = apps.get_model('categories', 'Category')
+    Service = apps.get_model('services', 'Service')
+
+    config = SiteConfiguration.load()
+    country_code = ''.join(filter(str.isdigit, config.default_country_code or '')) or DEFAULT_COUNTRY_CODE
+
+    def normalized(rows):
+        numbers = {}
+        for pk, number in rows:
+            number = normalize_number(number, country_code)
+            if number:
+                numbers[pk] = number
+        return numbers
+
+    return {
+        'default': normalize_number(config.default_whatsapp, country_code),
+        'categories': normalized(
+            Category.objects.exclude(whatsapp_number='').values_list('pk', 'whatsapp_number')
+        ),
+        'services': normalized(
+            Service.objects.exclude(whatsapp_number='').values_list('pk', 'whatsapp_number')
+        ),
+    }
+
+
+whatsapp_numbers = CachedValue('whatsapp_numbers', build_table)
+
+
+def number_for_service(service):
+    """Normalized WhatsApp number that notifications about ``service`` go to, or None"""
+    table = whatsapp_numbers.get()
+    return (
+        table['services'].get(service.pk)
+        or table['categories'].get(service.category_id)
+        or table['default']
+    )
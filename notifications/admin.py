@@ -0,0 +1,46 @@
+from django.contrib import admin
+from django.utils import timezone
+from django.utils.html import format_html
+from .models import NotificationJob
+
+
+@admin.register(NotificationJob)
+class NotificationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'object_id', 'status_badge', 'attempts', 'duration_display', 'run_after', 'created_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['object_id', 'last_error']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'kind', 'object_id', 'attempts', 'locked_at', 'last_error', 'result',
+        'created_at', 'started_at', 'finished_at', 'duration_ms',
+    ]
+
+    def status_badge(self, obj):
+        colors = {
+            'pending': '#FFA500',
+            'running': '#2196F3',
+            'sent': '#4CAF50',
+            'dead': '#F44336',
+        }
+        return format_html(
+            '<span style="background-color: {}; color: white; padding: 3px 10px; border-radius: 3px;">{}</span>',
+            colors.get(obj.status, '#999'),
+            obj.get_status_display()
+        )
+    status_badge.short_description = 'Status'
+
+    def duration_display(self, obj):
+        if obj.duration_ms is None:
+            return '-'
+        return f'{obj.duration_ms:.0f} ms'
+    duration_display.short_description = 'Last Attempt'
+
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        """Requeue selected jobs (including dead letters) with a fresh set of attempts"""
+        updated = queryset.exclude(status='running').update(
+            status='pending', attempts=0, run_after=timezone.now(), last_error=''
+        )
+        self.message_user(request, f'{updated} job(s) queued for retry.')
+    retry_now.short_description = 'Retry Now'
@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-17 22:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('booking_whatsapp', 'Booking WhatsApp'), ('quotation_whatsapp', 'Service Request WhatsApp')], max_length=50)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('sent', 'Sent'), ('dead', 'Dead Letter')], default='pending', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Not picked up before this time')),
+                ('locked_at', models.DateTimeField(blank=True, help_text='When a worker claimed the job', null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('result', models.TextField(blank=True, help_text='Delivery reference returned by the transport')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.FloatField(blank=True, help_text='Duration of the last attempt', null=True)),
+            ],
+            options={
+                'verbose_name': 'Notification Job',
+                'verbose_name_plural': 'Notification Jobs',
+                'db_table': 'notification_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='notification_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,106 @@
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class NotificationJob(models.Model):
+    """Outbound notification waiting to be delivered by the worker (run_notification_worker)"""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead Letter'),
+    ]
+
+    KIND_CHOICES = [
+        ('booking_whatsapp', 'Booking WhatsApp'),
+        ('quotation_whatsapp', 'Service Request WhatsApp'),
+    ]
+
+    # kind -> (model label, dotted path of handler(obj, transport))
+    HANDLERS = {
+        'booking_whatsapp': ('bookings.Booking', 'bookings.utils.send_whatsapp_notification'),
+        'quotation_whatsapp': ('quotations.ServiceRequest', 'quotations.utils.send_whatsapp_quotation'),
+    }
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # Retries
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now, help_text='Not picked up before this time')
+    locked_at = models.DateTimeField(null=True, blank=True, help_text='When a worker claimed the job')
+    last_error = models.TextField(blank=True)
+    result = models.TextField(blank=True, help_text='Delivery reference returned by the transport')
+
+    # Timing
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.FloatField(null=True, blank=True, help_text='Duration of the last attempt')
+
+    class Meta:
+        db_table = 'notification_jobs'
+        ordering = ['-created_at']
+        verbose_name = 'Notification Job'
+        verbose_name_plural = 'Notification Jobs'
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='notification_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} ({self.get_status_display()})"
+
+    @classmethod
+    def enqueue(cls, kind, obj, max_attempts=None):
+        """
+        Queue a notification about ``obj``. Call it inside the transaction that
+        creates ``obj`` so the job exists exactly when the object does.
+        """
+        if kind not in cls.HANDLERS:
+            raise ValueError(f'Unknown notification kind: {kind}')
+        job = cls.objects.create(
+            kind=kind,
+            object_id=obj.pk,
+            max_attempts=max_attempts or getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5),
+        )
+        if getattr(settings, 'NOTIFICATION_QUEUE_EAGER', False):
+            from .worker import run_job_by_id
+            transaction.on_commit(lambda: run_job_by_id(job.pk))
+        return job
+
+    @classmethod
+    def enqueue_many(cls, kind, objs, max_attempts=None):
+        """Queue one notification per object with a single bulk insert"""
+        if kind not in cls.HANDLERS:
+            raise ValueError(f'Unknown notification kind: {kind}')
+        max_attempts = max_attempts or getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+        jobs = cls.objects.bulk_create(
+            [cls(kind=kind, object_id=obj.pk, max_attempts=max_attempts) for obj in objs],
+            batch_size=500,
+        )
+        if getattr(settings, 'NOTIFICATION_QUEUE_EAGER', False):
+            from .worker import run_pending
+            transaction.on_commit(lambda: run_pending(limit=len(jobs)))
+        return jobs
+
+    def get_target(self):
+        """The booking / service request this job is about"""
+        model_label, _ = self.HANDLERS[self.kind]
+        return apps.get_model(model_label)._default_manager.get(pk=self.object_id)
+
+    def get_handler(self):
+        _, handler_path = self.HANDLERS[self.kind]
+        return import_string(handler_path)
+
+    @property
+    def wait_ms(self):
+        """Time from queueing to the start of the last attempt"""
+        if self.started_at is None:
+            return None
+        return (self.started_at - self.created_at).total_seconds() * 1000
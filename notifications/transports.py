@@ -0,0 +1,81 @@
+"""
+Outbound message transports for notification jobs
+
+A transport delivers one message to one phone number. The active transport
+is chosen with the NOTIFICATION_TRANSPORT setting (a dotted path); handlers
+receive it from the worker so tests can swap in StubTransport.
+"""
+import logging
+import urllib.parse
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationError(Exception):
+    """Delivery failed; the job is retried with backoff"""
+
+
+class PermanentNotificationError(NotificationError):
+    """Delivery can never succeed (e.g. no number configured); the job is dead-lettered at once"""
+
+
+class BaseTransport:
+    def send(self, to, message):
+        """Deliver ``message`` to the E.164 digits ``to``. Returns a delivery reference."""
+        raise NotImplementedError
+
+
+class WhatsAppLinkTransport(BaseTransport):
+    """
+    Prepares a wa.me link for the message. There is no WhatsApp Business API
+    integration yet, so the link is returned as the delivery reference (kept
+    on the job) for manual sending. The link itself holds customer details,
+    so only the fact that it was prepared is logged.
+    """
+
+    def send(self, to, message):
+        url = f"https://wa.me/{to}?text={urllib.parse.quote(message)}"
+        logger.info('WhatsApp link prepared', extra={'phone': to, 'message_length': len(message)})
+        return url
+
+
+class StubTransport(BaseTransport):
+    """
+    Records messages in memory instead of sending them (for tests and
+    benchmarks). Set ``StubTransport.fail_with`` to an exception to make
+    every send raise it.
+    """
+
+    outbox = []
+    fail_with = None
+
+    def send(self, to, message):
+        if self.fail_with is not None:
+            raise self.fail_with
+        StubTransport.outbox.append((to, message))
+        return f'stub:{len(StubTransport.outbox)}'
+
+    @classmethod
+    def reset(cls):
+        cls.outbox = []
+        cls.fail_with = None
+
+
+_transport = None
+
+
+def get_transport():
+    global _transport
+    if _transport is None:
+        path = getattr(settings, 'NOTIFICATION_TRANSPORT', 'notifications.transports.WhatsAppLinkTransport')
+        _transport = import_string(path)()
+    return _transport
+
+
+def reset_transport():
+    global _transport
+    _transport = None
@@ -0,0 +1,104 @@
+"""
+Notification job worker
+
+Jobs are claimed with a conditional UPDATE (status and lease checked in the
+WHERE clause), so several workers can poll the same table without
+double-sending. A job whose worker died is reclaimed once its lease expires.
+Failed attempts are retried with exponential backoff; after max_attempts,
+or on a PermanentNotificationError, the job moves to the dead letter state.
+"""
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import NotificationJob
+from .transports import PermanentNotificationError, get_transport
+
+
+LEASE_SECONDS = getattr(settings, 'NOTIFICATION_JOB_LEASE', 300)
+RETRY_BASE_DELAY = getattr(settings, 'NOTIFICATION_RETRY_BASE_DELAY', 30)
+RETRY_MAX_DELAY = getattr(settings, 'NOTIFICATION_RETRY_MAX_DELAY', 60 * 60)
+
+
+def retry_delay(attempts):
+    """Seconds to wait after the ``attempts``-th failed attempt (30s, 60s, 120s, ... capped)"""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def due(now):
+    """Pending jobs whose time has come, plus running jobs whose lease expired"""
+    return (
+        Q(status='pending', run_after__lte=now)
+        | Q(status='running', locked_at__lt=now - timedelta(seconds=LEASE_SECONDS))
+    )
+
+
+def claim(job_id):
+    """Atomically mark a due job as running. Returns the job, or None if another worker got it."""
+    now = timezone.now()
+    claimed = NotificationJob.objects.filter(due(now), pk=job_id).update(
+        status='running',
+        locked_at=now,
+        started_at=now,
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return None
+    return NotificationJob.objects.get(pk=job_id)
+
+
+def run_job(job, transport=None):
+    """Run one claimed job and record the outcome. Returns the new status."""
+    transport = transport or get_transport()
+    started = time.perf_counter()
+    try:
+        result = job.get_handler()(job.get_target(), transport)
+    except (PermanentNotificationError, ObjectDoesNotExist) as e:
+        job.status = 'dead'
+        job.last_error = f'{type(e).__name__}: {e}'
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = 'dead'
+        else:
+            job.status = 'pending'
+            job.run_after = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        job.status = 'sent'
+        job.result = str(result or '')
+        job.last_error = ''
+
+    job.duration_ms = (time.perf_counter() - started) * 1000
+    job.finished_at = timezone.now()
+    job.locked_at = None
+    job.save(update_fields=[
+        'status', 'result', 'last_error', 'run_after', 'locked_at', 'finished_at', 'duration_ms',
+    ])
+    return job.status
+
+
+def run_job_by_id(job_id, transport=None):
+    job = claim(job_id)
+    if job is None:
+        return None
+    return run_job(job, transport)
+
+
+def run_pending(limit=20, transport=None):
+    """Claim and run up to ``limit`` due jobs, oldest first. Returns {status: count}."""
+    job_ids = list(
+        NotificationJob.objects.filter(due(timezone.now()))
+        .order_by('run_after', 'pk')
+        .values_list('pk', flat=True)[:limit]
+    )
+    outcomes = {}
+    for job_id in job_ids:
+        status = run_job_by_id(job_id, transport)
+        if status is not None:
+            outcomes[status] = outcomes.get(status, 0) + 1
+    return outcomes
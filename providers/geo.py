@@ -0,0 +1,159 @@
+"""
+Nearest-provider search on a latitude/longitude grid
+
+Provider.geo_cell is the provider's cell on a grid of CELL_DEGREES cells
+(about 1.1 km north-south), numbered row by row:
+
+    geo_cell = row * COLUMNS + column
+
+so the cells of one grid row are consecutive numbers. A search within R km
+reads each grid row crossing the circle's bounding box as one range of an
+index on geo_cell, then keeps the providers whose exact (haversine)
+distance is within R. Only the providers in a few cells around the point
+are read, however many providers there are.
+
+nearest() widens the radius step by step, so "the 5 closest" reads a
+handful of cells in dense areas and only goes out to the full radius
+where providers are sparse.
+
+geo_cell is set from latitude/longitude in Provider.save().
+bulk_create() and queryset.update() bypass that: set it with cell_of()
+there.
+
+Settings:
+    GEO_SEARCH_RADIUS_KM  default search radius (default 15)
+"""
+import math
+
+from django.conf import settings
+from django.db.models import Exists, FloatField, OuterRef, Q
+from django.db.models.functions import Cast
+
+
+CELL_DEGREES = 0.01
+ROWS = math.ceil(180 / CELL_DEGREES)
+COLUMNS = math.ceil(360 / CELL_DEGREES)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+RADIUS_KM = getattr(settings, 'GEO_SEARCH_RADIUS_KM', 15)
+
+
+def row_of(lat):
+    return min(max(int(math.floor((lat + 90) / CELL_DEGREES)), 0), ROWS - 1)
+
+
+def column_of(lng):
+    return int(math.floor((lng + 180) / CELL_DEGREES)) % COLUMNS
+
+
+def cell_of(lat, lng):
+    """The grid cell of a point, or None without coordinates"""
+    if lat is None or lng is None:
+        return None
+    return row_of(float(lat)) * COLUMNS + column_of(float(lng))
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle (haversine) distance"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cell_ranges(lat, lng, radius_km):
+    """(first, last) geo_cell ranges covering a circle, one or two per grid row"""
+    lat_delta = radius_km / KM_PER_DEGREE
+    # Longitude degrees shrink towards the poles; at the widest latitude of the box
+    widest = min(abs(lat) + lat_delta, 90)
+    cos_widest = math.cos(math.radians(widest))
+    lng_delta = 180 if cos_widest < 1e-6 else radius_km / (KM_PER_DEGREE * cos_widest)
+
+    if lng_delta >= 180:
+        columns = [(0, COLUMNS - 1)]
+    else:
+        first, last = column_of(lng - lng_delta), column_of(lng + lng_delta)
+        # Split where the box crosses the antimeridian
+        columns = [(first, last)] if first <= last else [(first, COLUMNS - 1), (0, last)]
+
+    return [
+        (row * COLUMNS + first, row * COLUMNS + last)
+        for row in range(row_of(lat - lat_delta), row_of(lat + lat_delta) + 1)
+        for first, last in columns
+    ]
+
+
+def within(lat, lng, radius_km):
+    """Q narrowing providers to the grid cells covering a circle"""
+    q = Q()
+    for first, last in cell_ranges(lat, lng, radius_km):
+        q |= Q(geo_cell__range=(first, last))
+    return q
+
+
+def candidates(service=None):
+    """Active, available providers (offering ``service``, if given) that have a location"""
+    from .models import Provider
+
+    providers = Provider.objects.filter(is_active=True, is_available=True, geo_cell__isnull=False)
+    if service is not None:
+        # EXISTS rather than IN: SQLite then reads the nearby cells and probes
+        # (provider, service) for each, instead of every provider of the service
+        offering = Q(Exists(Provider.services.through.objects.filter(provider_id=OuterRef('pk'), service_id=service.pk)))
+        if service.provider_id:
+            offering |= Q(pk=service.provider_id)
+        providers = providers.filter(offering)
+    return providers
+
+
+def search(lat, lng, radius_km=RADIUS_KM, service=None, queryset=None):
+    """[(distance_km, provider_id), ...] within ``radius_km`` of a point, nearest first"""
+    lat, lng = float(lat), float(lng)
+    providers = candidates(service) if queryset is None else queryset
+    # As floats: Decimal conversion would cost more than the distance itself
+    rows = providers.filter(within(lat, lng, radius_km)).order_by().values_list(
+        'pk', Cast('latitude', FloatField()), Cast('longitude', FloatField())
+    )
+    found = []
+    for pk, provider_lat, provider_lng in rows:
+        distance = distance_km(lat, lng, provider_lat, provider_lng)
+        if distance <= radius_km:
+            found.append((distance, pk))
+    found.sort()
+    return found
+
+
+def nearest(lat, lng, limit=10, radius_km=RADIUS_KM, service=None, queryset=None):
+    """
+    Up to ``limit`` (distance_km, provider_id) pairs within ``radius_km``,
+    nearest first. Searches a one-cell circle first and widens it until
+    ``limit`` providers are found: all ``limit`` are within the circle
+    searched, so none outside it can be nearer.
+    """
+    step = CELL_DEGREES * KM_PER_DEGREE
+    while True:
+        step = min(step, radius_km)
+        found = search(lat, lng, step, service=service, queryset=queryset)
+        if len(found) >= limit or step >= radius_km:
+            return found[:limit]
+        # Enough area for ``limit`` at the density seen so far, and at least twice the radius
+        step *= max(2, 1.25 * math.sqrt(limit / max(len(found), 1)))
+
+
+def providers_near(lat, lng, limit=10, radius_km=RADIUS_KM, service=None):
+    """The nearest() providers as Provider instances, each with a ``distance_km`` attribute"""
+    from .models import Provider
+
+    found = nearest(lat, lng, limit=limit, radius_km=radius_km, service=service)
+    by_pk = Provider.objects.in_bulk([pk for _, pk in found])
+    providers = []
+    for distance, pk in found:
+        provider = by_pk.get(pk)
+        if provider is not None:
+            provider.distance_km = round(distance, 2)
+            providers.append(provider)
+    return providers
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-17 23:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+from providers.geo import cell_of
+
+
+def set_geo_cells(apps, schema_editor):
+    Provider = apps.get_model('providers', 'Provider')
+    providers = list(Provider.objects.filter(latitude__isnull=False, longitude__isnull=False).only('latitude', 'longitude'))
+    for provider in providers:
+        provider.geo_cell = cell_of(provider.latitude, provider.longitude)
+    Provider.objects.bulk_update(providers, ['geo_cell'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_active_services_count'),
+        ('providers', '0003_alter_provider_address'),
+        ('services', '0008_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='provider',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, editable=False, help_text='Grid cell of latitude/longitude for nearby searches (maintained automatically)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='provider',
+            index=models.Index(fields=['geo_cell'], name='provider_geo_cell_idx'),
+        ),
+        migrations.RunPython(set_geo_cells, migrations.RunPython.noop),
+    ]
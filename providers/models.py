@@ -6,6 +6,7 @@ from accounts.models import User
 from services.models import Service
 from categories.models import Category
 from ckeditor.fields import RichTextField
+from . import geo
 
 
 class Provider(models.Model):
@@ -71,6 +72,12 @@ class Provider(models.Model):
         blank=True,
         help_text='For map display'
     )
+    geo_cell = models.IntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Grid cell of latitude/longitude for nearby searches (maintained automatically)'
+    )
     
     # Services & Categories
     services = models.ManyToManyField(Service, related_name='providers', blank=True)
@@ -110,10 +117,21 @@ class Provider(models.Model):
         ordering = ['-is_featured', '-rating', '-created_at']
         verbose_name = 'Provider'
         verbose_name_plural = 'Providers'
+        indexes = [
+            # Nearby provider searches (providers.geo)
+            models.Index(fields=['geo_cell'], name='provider_geo_cell_idx'),
+        ]
     
     def __str__(self):
         return self.business_name
     
+    def save(self, *args, **kwargs):
+        self.geo_cell = geo.cell_of(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geo_cell'}
+        super().save(*args, **kwargs)
+    
     @property
     def success_rate(self):
         """Calculate job success rate"""
@@ -0,0 +1,108 @@
+import math
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core.benchmark_data import seed_providers
+from providers import geo
+from providers.models import Provider
+
+
+def east_of(lat, lng, km):
+    """The point ``km`` due east of (lat, lng), wrapped to -180..180"""
+    lng += km / (geo.KM_PER_DEGREE * math.cos(math.radians(lat)))
+    return lat, (lng + 180) % 360 - 180
+
+
+def covered(ranges, lat, lng):
+    cell = geo.cell_of(lat, lng)
+    return any(first <= cell <= last for first, last in ranges)
+
+
+class GridTests(TestCase):
+
+    def test_cell_ranges_cover_the_circle_and_little_else(self):
+        lat, lng = 25.2, 55.3
+        ranges = geo.cell_ranges(lat, lng, 5)
+        for point in (
+            (lat, lng),
+            east_of(lat, lng, 4.9),
+            east_of(lat, lng, -4.9),
+            (lat + 4.9 / geo.KM_PER_DEGREE, lng),
+            (lat - 4.9 / geo.KM_PER_DEGREE, lng),
+        ):
+            with self.subTest(point=point):
+                self.assertTrue(covered(ranges, *point))
+        self.assertFalse(covered(ranges, *east_of(lat, lng, 20)))
+        self.assertFalse(covered(ranges, lat + 20 / geo.KM_PER_DEGREE, lng))
+        # One range per grid row
+        rows = {first // geo.COLUMNS for first, _ in ranges}
+        self.assertEqual(len(ranges), len(rows))
+
+    def test_circles_across_the_antimeridian_get_two_ranges_per_row(self):
+        lat, lng = 0.0, 179.995
+        ranges = geo.cell_ranges(lat, lng, 5)
+        rows = {first // geo.COLUMNS for first, _ in ranges}
+        self.assertEqual(len(ranges), 2 * len(rows))
+        west = east_of(lat, lng, 3)
+        self.assertLess(west[1], 0)
+        self.assertTrue(covered(ranges, *west))
+        self.assertTrue(covered(ranges, *east_of(lat, lng, -3)))
+        self.assertFalse(covered(ranges, lat, 0.0))
+
+    def test_circles_around_a_pole_read_whole_rows(self):
+        lat, lng = 89.995, 10.0
+        ranges = geo.cell_ranges(lat, lng, 5)
+        self.assertTrue(all(last - first == geo.COLUMNS - 1 for first, last in ranges))
+        self.assertLess(max(last for _, last in ranges), geo.ROWS * geo.COLUMNS)
+        # Across the pole, on the other side of the globe
+        self.assertTrue(covered(ranges, lat, lng - 180))
+
+
+class NearestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_providers(3)
+        cls.lat, cls.lng = 25.2, 55.3
+        cls.providers = list(Provider.objects.order_by('pk'))
+        for provider, km in zip(cls.providers, (0.5, 3, 8)):
+            provider.latitude, provider.longitude = (f'{value:.6f}' for value in east_of(cls.lat, cls.lng, km))
+            provider.is_active = provider.is_available = True
+            provider.save()
+
+    def test_nearest_widens_the_search_until_it_has_enough(self):
+        with mock.patch.object(geo, 'search', wraps=geo.search) as search:
+            found = geo.nearest(self.lat, self.lng, limit=1)
+        self.assertEqual([pk for _, pk in found], [self.providers[0].pk])
+        self.assertEqual(search.call_count, 1)
+
+        with mock.patch.object(geo, 'search', wraps=geo.search) as search:
+            found = geo.nearest(self.lat, self.lng, limit=2)
+        self.assertEqual([pk for _, pk in found], [p.pk for p in self.providers[:2]])
+        radii = [call.args[2] for call in search.call_args_list]
+        self.assertGreater(len(radii), 1)
+        self.assertEqual(radii, sorted(radii))
+        self.assertAlmostEqual(found[1][0], 3, places=1)
+
+    def test_nearest_stops_at_the_radius(self):
+        found = geo.nearest(self.lat, self.lng, limit=5, radius_km=5)
+        self.assertEqual([pk for _, pk in found], [p.pk for p in self.providers[:2]])
+        self.assertEqual(len(geo.nearest(self.lat, self.lng, limit=5)), 3)
+
+    def test_nearby_view_refuses_numbers_it_cannot_search_with(self):
+        url = reverse('providers:nearby')
+        for params in (
+            {'lat': 'nan', 'lng': '55.3'},
+            {'lat': '25.2', 'lng': 'inf'},
+            {'lat': '25.2', 'lng': '55.3', 'radius': 'nan'},
+            {'lat': '25.2', 'lng': '55.3', 'radius': '-inf'},
+            {'lng': '55.3'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+        response = self.client.get(url, {'lat': '25.2', 'lng': '55.3', 'radius': '5'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['id'] for p in response.json()['providers']], [p.pk for p in self.providers[:2]])
@@ -6,4 +6,5 @@ app_name = 'providers'
 urlpatterns = [
     path('', views.provider_list, name='list'),
     path('<int:pk>/', views.provider_detail, name='detail'),
+    path('nearby/', views.nearby_providers, name='nearby'),
 ]
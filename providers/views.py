@@ -1,4 +1,9 @@
+import math
+
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
+from services.models import Service
+from . import geo
 from .models import Provider
 
 
@@ -21,3 +26,48 @@ def provider_detail(request, pk):
         'services': services,
     }
     return render(request, 'provider_details.html', context)
+
+
+def nearby_providers(request):
+    """
+    Active, available providers within ?radius= km (default
+    GEO_SEARCH_RADIUS_KM, at most 100) of ?lat=&lng=, nearest first,
+    optionally only those offering ?service=<id>. Returns at most ?limit=
+    (default 10, at most 50) as JSON.
+    """
+    try:
+        lat, lng = float(request.GET['lat']), float(request.GET['lng'])
+        radius_km = float(request.GET.get('radius', geo.RADIUS_KM))
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+        # nan and inf parse as floats, but no grid cell or distance can be computed from them
+        if not all(map(math.isfinite, (lat, lng, radius_km))):
+            raise ValueError
+    except (KeyError, ValueError):
+        return JsonResponse({
+            'success': False,
+            'error': 'lat and lng are required; radius and limit must be numbers'
+        }, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return JsonResponse({'success': False, 'error': 'Coordinates out of range'}, status=400)
+    radius_km = min(max(radius_km, 0.1), 100)
+    
+    service = None
+    if request.GET.get('service'):
+        service = get_object_or_404(Service.objects.only('id', 'provider_id'), id=request.GET['service'], is_active=True)
+    
+    providers = geo.providers_near(lat, lng, limit=limit, radius_km=radius_km, service=service)
+    return JsonResponse({
+        'success': True,
+        'providers': [
+            {
+                'id': provider.pk,
+                'business_name': provider.business_name,
+                'city': provider.city,
+                'rating': float(provider.rating),
+                'distance_km': provider.distance_km,
+                'latitude': float(provider.latitude),
+                'longitude': float(provider.longitude),
+            }
+            for provider in providers
+        ],
+    })
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from core.exports import ExportActionMixin
 from .models import ServiceRequest, RequestAttachment, QuotationResponse
 
 
@@ -18,14 +19,14 @@ class QuotationResponseInline(admin.StackedInline):
 
 
 @admin.register(ServiceRequest)
-class ServiceRequestAdmin(admin.ModelAdmin):
+class ServiceRequestAdmin(ExportActionMixin, admin.ModelAdmin):
     list_display = [
-        'id', 'customer_name', 'service', 'booking_date', 'booking_time',
+        'request_reference', 'customer_name', 'service', 'booking_date', 'booking_time',
         'total_amount', 'status', 'whatsapp_sent', 'created_at'
     ]
     list_filter = ['status', 'whatsapp_sent', 'cc_zone', 'created_at', 'service__category']
     search_fields = [
-        'first_name', 'last_name', 'email', 'phone', 
+        'request_reference', 'first_name', 'last_name', 'email', 'phone', 
         'service__name', 'location_address'
     ]
     list_editable = ['status']
@@ -35,7 +36,7 @@ class ServiceRequestAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Customer Information', {
-            'fields': ('user', 'first_name', 'last_name', 'email', 'phone')
+            'fields': ('request_reference', 'user', 'first_name', 'last_name', 'email', 'phone')
         }),
         ('Service Details', {
             'fields': ('service', 'pricing_tier', 'booking_estimate', 'number_of_people', 'hourly_rate')
@@ -57,13 +58,14 @@ class ServiceRequestAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ['cc_zone_charge', 'vat', 'total_amount', 'whatsapp_sent_at', 'created_at', 'updated_at']
+    readonly_fields = ['request_reference', 'cc_zone_charge', 'vat', 'total_amount', 'whatsapp_sent_at', 'created_at', 'updated_at']
     
     def customer_name(self, obj):
         return obj.customer_name
     customer_name.short_description = 'Customer'
     
-    actions = ['mark_as_contacted', 'mark_as_quoted', 'send_to_whatsapp']
+    actions = ['mark_as_contacted', 'mark_as_quoted', 'send_to_whatsapp', 'export_selected']
+    export_dataset = 'service_requests'
     
     def mark_as_contacted(self, request, queryset):
         updated = queryset.update(status='contacted')
@@ -76,17 +78,23 @@ class ServiceRequestAdmin(admin.ModelAdmin):
     mark_as_quoted.short_description = 'Mark as Quoted'
     
     def send_to_whatsapp(self, request, queryset):
-        # This would integrate with WhatsApp API
-        self.message_user(request, 'WhatsApp integration pending.')
+        from notifications.models import NotificationJob
+        queued_count = 0
+        for service_request in queryset:
+            NotificationJob.enqueue('quotation_whatsapp', service_request)
+            queued_count += 1
+        self.message_user(request, f'WhatsApp notification queued for {queued_count} request(s).')
     send_to_whatsapp.short_description = 'Send to WhatsApp'
 
 
 @admin.register(RequestAttachment)
-class RequestAttachmentAdmin(admin.ModelAdmin):
+class RequestAttachmentAdmin(ExportActionMixin, admin.ModelAdmin):
     list_display = ['request', 'file_name', 'file_type', 'file_size', 'uploaded_at']
     list_filter = ['file_type', 'uploaded_at']
     search_fields = ['request__first_name', 'request__last_name', 'file_name']
     ordering = ['-uploaded_at']
+    actions = ['export_selected']
+    export_dataset = 'attachments'
 
 
 @admin.register(QuotationResponse)
@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-17 22:54
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def assign_request_references(apps, schema_editor):
+    """Number existing requests per creation day and start today's sequences after them"""
+    ServiceRequest = apps.get_model('quotations', 'ServiceRequest')
+    ReferenceSequence = apps.get_model('core', 'ReferenceSequence')
+
+    last_values = {}
+    requests = list(ServiceRequest.objects.order_by('created_at', 'pk').only('pk', 'created_at'))
+    for service_request in requests:
+        created_at = service_request.created_at
+        if timezone.is_aware(created_at):
+            created_at = timezone.localtime(created_at)
+        day = created_at.date()
+        last_values[day] = last_values.get(day, 0) + 1
+        service_request.request_reference = f"SR-{day:%Y%m%d}-{last_values[day]:06d}"
+    ServiceRequest.objects.bulk_update(requests, ['request_reference'], batch_size=500)
+
+    for day, last_value in last_values.items():
+        ReferenceSequence.objects.update_or_create(prefix='SR', day=day, defaults={'last_value': last_value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_reference_sequence'),
+        ('quotations', '0005_alter_quotationresponse_breakdown_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicerequest',
+            name='request_reference',
+            field=models.CharField(editable=False, help_text='Unique request reference number', max_length=20, null=True, unique=True),
+        ),
+        migrations.RunPython(assign_request_references, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='servicerequest',
+            name='request_reference',
+            field=models.CharField(editable=False, help_text='Unique request reference number', max_length=20, unique=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-17 22:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotations', '0006_request_reference'),
+        ('services', '0008_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='servicerequest',
+            index=models.Index(fields=['status', 'created_at'], name='request_status_created_idx'),
+        ),
+    ]
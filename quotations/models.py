@@ -125,6 +125,12 @@ class ServiceRequest(models.Model):
     admin_notes = RichTextField(blank=True, config_name='default')
     
     # Metadata
+    request_reference = models.CharField(
+        max_length=20,
+        unique=True,
+        editable=False,
+        help_text='Unique request reference number'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -133,6 +139,10 @@ class ServiceRequest(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Service Request'
         verbose_name_plural = 'Service Requests'
+        indexes = [
+            # Admin status filter, newest first
+            models.Index(fields=['status', 'created_at'], name='request_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.service.name} ({self.get_status_display()})"
@@ -143,6 +153,11 @@ class ServiceRequest(models.Model):
         if not self.total_amount:
             self.total_amount = 0.00
         
+        # Generate request reference if not exists (e.g., SR-20251211-000042)
+        if not self.request_reference:
+            from core.references import allocate
+            self.request_reference = allocate('SR')[0]
+        
         super().save(*args, **kwargs)
     
     @property
@@ -150,18 +165,9 @@ class ServiceRequest(models.Model):
         return f"{self.first_name} {self.last_name}"
     
     def get_whatsapp_number(self):
-        """Get WhatsApp number for this service request (Service > Category > Default)"""
-        if self.service.whatsapp_number:
-            return self.service.whatsapp_number
-        elif self.service.category.whatsapp_number:
-            return self.service.category.whatsapp_number
-        else:
-            try:
-                from site_config.models import SiteConfiguration
-                config = SiteConfiguration.load()
-                return config.default_whatsapp if config and config.default_whatsapp else None
-            except Exception:
-                return None
+        """Normalized WhatsApp number for this service request (Service > Category > Default)"""
+        from core.whatsapp import number_for_service
+        return number_for_service(self.service)
 
 
 class RequestAttachment(models.Model):
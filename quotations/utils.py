@@ -1,66 +1,50 @@
+import logging
 import urllib.parse
 from datetime import datetime
 from django.utils import timezone
 
+from notifications.transports import PermanentNotificationError, get_transport
 
-def send_whatsapp_quotation(service_request):
+
+logger = logging.getLogger(__name__)
+
+
+def send_whatsapp_quotation(service_request, transport=None):
     """
     Send WhatsApp notification for a service request.
-    Returns True if successful, False otherwise.
+    Returns the transport's delivery reference; raises on failure.
+    
+    Runs in the notification worker (see notifications.worker), queued with
+    NotificationJob.enqueue('quotation_whatsapp', service_request).
     """
-    try:
-        # Get WhatsApp number
-        whatsapp_number = service_request.get_whatsapp_number()
-        
-        if not whatsapp_number:
-            print(f"No WhatsApp number available for service request {service_request.id}")
-            return False
-        
-        # Get country code from site configuration
-        try:
-            from site_config.models import SiteConfiguration
-            config = SiteConfiguration.load()
-            country_code = config.default_country_code if config and config.default_country_code else '971'
-        except Exception:
-            country_code = '971'
-        
-        # Clean WhatsApp number (remove spaces, dashes, etc.)
-        whatsapp_number = ''.join(filter(str.isdigit, whatsapp_number))
-        if whatsapp_number.startswith('0'):
-            whatsapp_number = country_code + whatsapp_number[1:]
-        elif not whatsapp_number.startswith('+'):
-            if not whatsapp_number.startswith(country_code):
-                whatsapp_number = country_code + whatsapp_number
-        
-        # Build message
-        message = build_quotation_message(service_request)
-        
-        # Update service request record
-        service_request.whatsapp_number_used = whatsapp_number
-        service_request.whatsapp_sent = True
-        service_request.whatsapp_sent_at = timezone.now()
-        service_request.save(update_fields=['whatsapp_number_used', 'whatsapp_sent', 'whatsapp_sent_at'])
-        
-        # Generate WhatsApp URL
-        whatsapp_url = generate_whatsapp_url(whatsapp_number, message)
-        
-        print(f"WhatsApp notification prepared for service request {service_request.id}")
-        print(f"WhatsApp URL: {whatsapp_url}")
-        
-        return True
-        
-    except Exception as e:
-        import traceback
-        print(f"Error sending WhatsApp notification for service request {service_request.id}: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return False
+    # Get WhatsApp number
+    whatsapp_number = service_request.get_whatsapp_number()
+    
+    if not whatsapp_number:
+        raise PermanentNotificationError(f"No WhatsApp number available for service request {service_request.id}")
+    
+    # Build message and hand it to the transport
+    message = build_quotation_message(service_request)
+    reference = (transport or get_transport()).send(whatsapp_number, message)
+    
+    # Update service request record
+    service_request.whatsapp_number_used = whatsapp_number
+    service_request.whatsapp_sent = True
+    service_request.whatsapp_sent_at = timezone.now()
+    service_request.save(update_fields=['whatsapp_number_used', 'whatsapp_sent', 'whatsapp_sent_at'])
+    
+    logger.info('WhatsApp notification sent', extra={'request_reference': service_request.request_reference})
+    
+    return reference
 
 
 def build_quotation_message(service_request):
     """Build WhatsApp message content for service request quotation"""
     
     # Format booking datetime
-    if isinstance(service_request.booking_datetime, str):
+    if not service_request.booking_datetime:
+        formatted_datetime = 'Not specified'
+    elif isinstance(service_request.booking_datetime, str):
         try:
             datetime_obj = datetime.strptime(service_request.booking_datetime, '%Y-%m-%d %H:%M:%S')
             formatted_datetime = datetime_obj.strftime('%A, %B %d, %Y at %I:%M %p')
@@ -73,7 +57,7 @@ def build_quotation_message(service_request):
     message = f"""
 🚚 *NEW SERVICE REQUEST*
 
-*Request ID:* {service_request.id}
+*Request Reference:* {service_request.request_reference}
 *Status:* {service_request.get_status_display()}
 
 *Customer Information:*
@@ -130,28 +114,8 @@ def get_whatsapp_quotation_url(service_request):
         if not whatsapp_number:
             return None
         
-        # Get country code from site configuration
-        try:
-            from site_config.models import SiteConfiguration
-            config = SiteConfiguration.load()
-            country_code = config.default_country_code if config and config.default_country_code else '971'
-        except Exception:
-            country_code = '971'
-        
-        # Clean number
-        whatsapp_number = ''.join(filter(str.isdigit, whatsapp_number))
-        if not whatsapp_number:
-            return None
-            
-        if whatsapp_number.startswith('0'):
-            whatsapp_number = country_code + whatsapp_number[1:]
-        elif not whatsapp_number.startswith(country_code):
-            whatsapp_number = country_code + whatsapp_number
-        
         message = build_quotation_message(service_request)
         return generate_whatsapp_url(whatsapp_number, message)
-    except Exception as e:
-        import traceback
-        print(f"Error generating WhatsApp URL for service request {service_request.id}: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.exception('Error generating WhatsApp URL', extra={'request_reference': service_request.request_reference})
         return None
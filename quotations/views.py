@@ -2,13 +2,19 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
+from django.db import transaction
 from django.utils import timezone
 from datetime import datetime
 import json
+import logging
 
+from notifications.models import NotificationJob
 from services.models import Service
 from .models import ServiceRequest
-from .utils import send_whatsapp_quotation, get_whatsapp_quotation_url
+from .utils import get_whatsapp_quotation_url
+
+
+logger = logging.getLogger(__name__)
 
 
 @require_http_methods(["POST"])
@@ -26,15 +32,12 @@ def create_service_request(request):
             data = request.POST
             files = request.FILES if hasattr(request, 'FILES') else None
         
-        print("=" * 60)
-        print("NEW SERVICE REQUEST RECEIVED")
-        print("=" * 60)
-        print(f"Content-Type: {request.content_type}")
-        print(f"Request Method: {request.method}")
-        print(f"Data received: {dict(data)}")
-        if files:
-            print(f"Files received: {list(files.keys())}")
-        print("=" * 60)
+        # Field names only: the payload itself is customer data
+        logger.debug('Service request received', extra={
+            'content_type': request.content_type,
+            'fields': sorted(data.keys()),
+            'files': sorted(files.keys()) if files else [],
+        })
         
         # Validate required fields
         required_fields = [
@@ -72,7 +75,7 @@ def create_service_request(request):
                 booking_datetime = datetime.combine(booking_date, time_obj)
                 booking_datetime = timezone.make_aware(booking_datetime, timezone.get_current_timezone())
             except ValueError as e:
-                print(f"Date/Time parsing error: {e}")
+                logger.warning('Could not parse booking date/time: %s', e)
                 booking_datetime = None
                 booking_date = None
                 booking_time = None
@@ -95,77 +98,83 @@ def create_service_request(request):
         except (ValueError, TypeError) as e:
             number_of_people = 1
             hourly_rate = None
-            print(f"Warning - numeric field parsing: {str(e)}")
-        
-        # Create service request
-        service_request = ServiceRequest.objects.create(
-            service=service,
-            first_name=data['first_name'].strip(),
-            last_name=data['last_name'].strip(),
-            email=data['email'].strip().lower(),
-            phone=data['phone'].strip(),
-            pricing_tier=data.get('pricing_tier', '').strip(),
-            booking_estimate=data.get('booking_estimate', '').strip(),
-            booking_date=booking_date,
-            booking_time=booking_time,  # Now stored as string
-            booking_datetime=booking_datetime,
-            number_of_people=number_of_people,
-            hourly_rate=hourly_rate,
-            location_address=location_address,
-            location_latitude=location_latitude,
-            location_longitude=location_longitude,
-            additional_notes=data.get('additional_notes', '').strip(),
-            cc_zone=data.get('cc_zone', 'false').lower() == 'true' if isinstance(data.get('cc_zone'), str) else bool(data.get('cc_zone', False))
-        )
-        
-        print(f"ServiceRequest created successfully: ID={service_request.id}, Customer={service_request.customer_name}")
-        
-        # Handle file uploads
-        if files:
-            from .models import RequestAttachment
-            for file_key in files:
-                for uploaded_file in files.getlist(file_key):
-                    # Determine file type
-                    file_type = 'document'
-                    if uploaded_file.content_type.startswith('image/'):
-                        file_type = 'image'
-                    elif uploaded_file.content_type.startswith('video/'):
-                        file_type = 'video'
+            logger.warning('Could not parse numeric fields: %s', e)
+        
+        # The request, its attachments and its notification are saved together
+        with transaction.atomic():
+            # Create service request
+            service_request = ServiceRequest.objects.create(
+                service=service,
+                first_name=data['first_name'].strip(),
+                last_name=data['last_name'].strip(),
+                email=data['email'].strip().lower(),
+                phone=data['phone'].strip(),
+                pricing_tier=data.get('pricing_tier', '').strip(),
+                booking_estimate=data.get('booking_estimate', '').strip(),
+                booking_date=booking_date,
+                booking_time=booking_time,  # Now stored as string
+                booking_datetime=booking_datetime,
+                number_of_people=number_of_people,
+                hourly_rate=hourly_rate,
+                location_address=location_address,
+                location_latitude=location_latitude,
+                location_longitude=location_longitude,
+                additional_notes=data.get('additional_notes', '').strip(),
+                cc_zone=data.get('cc_zone', 'false').lower() == 'true' if isinstance(data.get('cc_zone'), str) else bool(data.get('cc_zone', False))
+            )
+        
+            # Handle file uploads
+            attachments = 0
+            if files:
+                from .models import RequestAttachment
+                for file_key in files:
+                    for uploaded_file in files.getlist(file_key):
+                        # Determine file type
+                        file_type = 'document'
+                        if uploaded_file.content_type.startswith('image/'):
+                            file_type = 'image'
+                        elif uploaded_file.content_type.startswith('video/'):
+                            file_type = 'video'
                     
-                    # Create attachment
-                    RequestAttachment.objects.create(
-                        request=service_request,
-                        file=uploaded_file,
-                        file_type=file_type,
-                        file_name=uploaded_file.name,
-                        file_size=uploaded_file.size
-                    )
-                    print(f"File uploaded: {uploaded_file.name} ({file_type})")
-        
-        print(f"ServiceRequest created successfully: ID={service_request.id}, Customer={service_request.customer_name}")
-        
-        # Send WhatsApp notification automatically
-        try:
-            whatsapp_sent = send_whatsapp_quotation(service_request)
-        except Exception as e:
-            print(f"WhatsApp notification failed for request {service_request.id}: {str(e)}")
-            whatsapp_sent = False
+                        # Create attachment
+                        RequestAttachment.objects.create(
+                            request=service_request,
+                            file=uploaded_file,
+                            file_type=file_type,
+                            file_name=uploaded_file.name,
+                            file_size=uploaded_file.size
+                        )
+                        attachments += 1
+        
+            # Queue the WhatsApp notification (sent by the notification worker).
+            # In the same transaction, so the job exists exactly when the request does.
+            NotificationJob.enqueue('quotation_whatsapp', service_request)
+        
+        logger.info('Service request created', extra={
+            'request_id': service_request.id,
+            'request_reference': service_request.request_reference,
+            'service_id': service.id,
+            'attachments': attachments,
+        })
         
         # Generate WhatsApp URL
         try:
             whatsapp_url = get_whatsapp_quotation_url(service_request)
-        except Exception as e:
-            print(f"WhatsApp URL generation failed for request {service_request.id}: {str(e)}")
+        except Exception:
+            logger.exception('WhatsApp URL generation failed', extra={'request_reference': service_request.request_reference})
             whatsapp_url = None
         
         return JsonResponse({
             'success': True,
             'request_id': service_request.id,
+            'request_reference': service_request.request_reference,
             'message': 'Service request submitted successfully!',
-            'whatsapp_sent': whatsapp_sent,
+            'whatsapp_sent': service_request.whatsapp_sent,
+            'whatsapp_queued': True,
             'whatsapp_url': whatsapp_url,
             'request_details': {
                 'id': service_request.id,
+                'reference': service_request.request_reference,
                 'customer_name': service_request.customer_name,
                 'service_name': service_request.service.name,
                 'booking_date': booking_date.strftime('%B %d, %Y') if booking_date else 'Not specified',
@@ -182,9 +191,7 @@ def create_service_request(request):
         }, status=404)
     
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Service request creation error: {error_details}")
+        logger.exception('Service request creation failed')
         return JsonResponse({
             'success': False,
             'error': str(e)
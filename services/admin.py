@@ -83,14 +83,14 @@ class ServiceAdmin(admin.ModelAdmin):
         }),
         ('Statistics & Metrics', {
             'fields': ('rating', 'total_reviews', 'services_provided', 'views_count'),
-            'description': 'Service performance metrics and statistics'
+            'description': 'Service performance metrics and statistics. Rating and total reviews are kept up to date from approved provider reviews.'
         }),
         ('Display Settings', {
             'fields': ('is_featured', 'is_popular', 'is_active', 'order')
         }),
     )
     
-    readonly_fields = ['views_count']
+    readonly_fields = ['rating', 'total_reviews', 'views_count']
 
 
 @admin.register(AdditionalImage)
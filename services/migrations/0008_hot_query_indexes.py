@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-17 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_active_services_count'),
+        ('providers', '0003_alter_provider_address'),
+        ('services', '0007_alter_service_overview_alter_servicefaq_answer_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-is_featured', 'order', '-created_at'], name='service_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-rating', '-total_reviews'], name='service_active_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='service_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['order', '-rating'], name='service_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_popular', True)), fields=['-services_provided', '-rating'], name='service_popular_idx'),
+        ),
+    ]
@@ -5,6 +5,7 @@ from imagekit.models import ImageSpecField, ProcessedImageField
 from imagekit.processors import ResizeToFill, ResizeToFit
 from categories.models import Category, SubCategory
 from ckeditor.fields import RichTextField
+from core.counters import service_views
 
 
 class Service(models.Model):
@@ -109,6 +110,39 @@ class Service(models.Model):
         ordering = ['-is_featured', 'order', '-created_at']
         verbose_name = 'Service'
         verbose_name_plural = 'Services'
+        indexes = [
+            # Listings only ever show active services, and SQLite can't use a
+            # bare boolean filter as an index prefix, so these are partial.
+            # Services listing (default ordering)
+            models.Index(
+                fields=['-is_featured', 'order', '-created_at'],
+                condition=models.Q(is_active=True),
+                name='service_listing_idx',
+            ),
+            # Top rated section, ?sort=rating
+            models.Index(
+                fields=['-rating', '-total_reviews'],
+                condition=models.Q(is_active=True),
+                name='service_active_rating_idx',
+            ),
+            # Latest section, ?sort=newest
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(is_active=True),
+                name='service_active_created_idx',
+            ),
+            # Featured / popular sections: only the few flagged rows
+            models.Index(
+                fields=['order', '-rating'],
+                condition=models.Q(is_featured=True, is_active=True),
+                name='service_featured_idx',
+            ),
+            models.Index(
+                fields=['-services_provided', '-rating'],
+                condition=models.Q(is_popular=True, is_active=True),
+                name='service_popular_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.name
@@ -130,9 +164,9 @@ class Service(models.Model):
         return f"{self.rating:.1f}"
     
     def increment_views(self):
-        """Increment view count"""
+        """Increment view count (buffered, written to the database in batches)"""
         self.views_count += 1
-        self.save(update_fields=['views_count'])
+        service_views.increment(self.pk)
 
 
 class AdditionalImage(models.Model):
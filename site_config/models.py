@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import URLValidator
 from ckeditor.fields import RichTextField
+from core.caching import CachedValue
 
 
 class SiteConfiguration(models.Model):
@@ -64,6 +65,7 @@ class SiteConfiguration(models.Model):
         # Ensure only one instance exists (Singleton pattern)
         self.pk = 1
         super().save(*args, **kwargs)
+        transaction.on_commit(site_configuration_cache.bump)
     
     def delete(self, *args, **kwargs):
         # Prevent deletion
@@ -75,10 +77,18 @@ class SiteConfiguration(models.Model):
         obj, created = cls.objects.get_or_create(pk=1)
         return obj
     
+    @classmethod
+    def get_cached(cls):
+        """Cached load(), for read-only use. Refreshed whenever the configuration is saved."""
+        return site_configuration_cache.get()
+    
     def __str__(self):
         return self.site_name
 
 
+site_configuration_cache = CachedValue('site_configuration', SiteConfiguration.load)
+
+
 class ImportantLink(models.Model):
     """Footer important links"""
     
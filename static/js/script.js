@@ -1804,22 +1804,6 @@ jQuery(document).ready(function ($) {
 });
 
 
-// Custom Country Code Selector
-
-if ($('#phone').length > 0) {
-	var input = document.querySelector("#phone");
-	window.intlTelInput(input, {
-		utilsScript: "assets/plugins/intltelinput/js/utils.js",
-	});
-}
-
-if ($('#phone1').length > 0) {
-	var input = document.querySelector("#phone1");
-	window.intlTelInput(input, {
-		utilsScript: "assets/plugins/intltelinput/js/utils.js",
-	});
-}
-
 // Zoom Meet
 $('#google_meet').click(function () {
 	if ($(this).is(':checked')) {